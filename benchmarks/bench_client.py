@@ -0,0 +1,139 @@
+"""
+Throughput, latency and memory benchmarks of the pyvyos client against MockVyOSServer.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_client
+    python -m benchmarks.bench_client --scenario fleet --devices 50 --latency 0.01
+
+Every scenario prints requests per second, p50 and p99 latency per call and the peak Python memory allocated
+while it ran, so changes to connection handling or response parsing can be compared run against run.
+"""
+import argparse
+import time
+import tracemalloc
+
+from pyvyos.device import VyDevice
+from pyvyos.fleet import VyFleet
+from pyvyos.mock_server import MockVyOSServer, generate_config
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(name, calls, run):
+    """
+    Run a scenario and print its numbers.
+
+    Args:
+        name (str): The scenario name.
+        calls (int): The number of API calls the scenario makes, for the request rate.
+        run (callable): The scenario; returns the list of per-call latencies in seconds.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    latencies = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{name:<28} {calls / elapsed:>10.1f} req/s  p50 {percentile(latencies, 0.5) * 1000:>8.2f} ms  '
+          f'p99 {percentile(latencies, 0.99) * 1000:>8.2f} ms  peak {peak / 1024 / 1024:>8.2f} MiB')
+
+
+def timed_calls(count, call):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = call()
+        latencies.append(time.perf_counter() - start)
+        # ApiResponse carries error, BulkResult the failed paths
+        if getattr(response, 'error', False) or getattr(response, 'failed', False):
+            raise RuntimeError(f'benchmark call failed: {response}')
+    return latencies
+
+
+def bench_single(args):
+    with MockVyOSServer(latency=args.latency) as server:
+        for keepalive in (True, False):
+            with VyDevice(keepalive=keepalive, **server.device_kwargs()) as device:
+                measure(f'single show keepalive={keepalive}', args.requests,
+                        lambda: timed_calls(args.requests, lambda: device.show(["version"])))
+
+
+def bench_retrieve(args):
+    config = generate_config(interfaces=args.interfaces, firewall_rules=args.rules)
+    with MockVyOSServer(config=config, latency=args.latency) as server:
+        with VyDevice(**server.device_kwargs()) as device:
+            count = max(1, args.requests // 20)
+            measure('retrieve full config', count,
+                    lambda: timed_calls(count, lambda: device.retrieve_show_config([])))
+
+
+def bench_configure(args):
+    paths = [["firewall", "group", "address-group", "BENCH", "address", f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"]
+             for i in range(args.paths)]
+
+    with MockVyOSServer(latency=args.latency) as server:
+        with VyDevice(**server.device_kwargs()) as device:
+            count = min(len(paths), args.requests)
+            single = iter(paths)
+            measure('configure one path per call', count,
+                    lambda: timed_calls(count, lambda: device.configure_set(next(single))))
+            measure(f'configure batch of {len(paths)}', len(paths),
+                    lambda: timed_calls(1, lambda: device.configure_set(paths)))
+            measure(f'configure bulk of {len(paths)}', len(paths),
+                    lambda: timed_calls(1, lambda: device.configure_bulk(paths)))
+
+
+def bench_fleet(args):
+    servers = [MockVyOSServer(latency=args.latency).start() for _ in range(args.devices)]
+    try:
+        fleet = VyFleet([server.device_kwargs() for server in servers], max_workers=args.workers)
+        calls = args.devices * args.rounds
+
+        def run():
+            latencies = []
+            for _ in range(args.rounds):
+                latencies.extend(result.elapsed for result in fleet.run('show', ["version"]))
+            return latencies
+
+        measure(f'fleet show x{args.devices} devices', calls, run)
+        fleet.close()
+    finally:
+        for server in servers:
+            server.stop()
+
+
+SCENARIOS = {
+    'single': bench_single,
+    'retrieve': bench_retrieve,
+    'configure': bench_configure,
+    'fleet': bench_fleet,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', choices=['all'] + list(SCENARIOS), default='all')
+    parser.add_argument('--requests', type=int, default=500, help='calls per single-device scenario')
+    parser.add_argument('--latency', type=float, default=0.0, help='server-side latency per request in seconds')
+    parser.add_argument('--interfaces', type=int, default=200, help='interfaces in the retrieved configuration')
+    parser.add_argument('--rules', type=int, default=5000, help='firewall rules in the retrieved configuration')
+    parser.add_argument('--paths', type=int, default=5000, help='paths in the batched configure scenarios')
+    parser.add_argument('--devices', type=int, default=20, help='mock devices in the fleet scenario')
+    parser.add_argument('--workers', type=int, default=32, help='fleet concurrency')
+    parser.add_argument('--rounds', type=int, default=10, help='fleet-wide calls in the fleet scenario')
+    args = parser.parse_args()
+
+    for name, scenario in SCENARIOS.items():
+        if args.scenario in ('all', name):
+            scenario(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,67 @@
-from .device import VyDevice
-from .device import ApiResponse
\ No newline at end of file
+"""
+Python SDK for interacting with the VyOS API.
+
+The public classes are imported on first access, so importing pyvyos, or running the pyvyos command line,
+does not load requests or aiohttp until a device is actually used.
+"""
+import importlib
+
+# Public name -> the module defining it
+_EXPORTS = {
+    'VyDevice': 'device',
+    'ApiResponse': 'device',
+    'AsyncVyDevice': 'async_device',
+    'VyFleet': 'fleet',
+    'FleetResult': 'fleet',
+    'ResponseCache': 'cache',
+    'ConfigTree': 'config_tree',
+    'ConfigDiff': 'config_diff',
+    'config_diff': 'config_diff',
+    'Transaction': 'transaction',
+    'AsyncTransaction': 'transaction',
+    'BulkPusher': 'bulk',
+    'BulkResult': 'bulk',
+    'RetryPolicy': 'retry',
+    'CircuitBreaker': 'retry',
+    'RequestTiming': 'timing',
+    'MetricsCollector': 'metrics',
+    'ShowStream': 'stream',
+    'AsyncShowStream': 'stream',
+    'SnapshotStore': 'snapshot',
+    'Snapshot': 'snapshot',
+    'ConfigWatcher': 'watch',
+    'AsyncConfigWatcher': 'watch',
+    'ChangeEvent': 'watch',
+    'Singleflight': 'singleflight',
+    'HostLimiter': 'limiter',
+    'TokenBucket': 'limiter',
+    'TelemetryCollector': 'telemetry',
+    'ConfigTemplate': 'template',
+    'RenderedConfig': 'template',
+    'Rollout': 'rollout',
+    'AsyncRollout': 'rollout',
+    'RolloutResult': 'rollout',
+    'Transport': 'transport',
+    'RequestsTransport': 'transport',
+    'Urllib3Transport': 'transport',
+    'Http2Transport': 'transport',
+    'ConfigInventory': 'inventory',
+    'ConfigPool': 'inventory',
+    'FrozenConfig': 'inventory',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,591 @@
+import asyncio
+import time
+from urllib.parse import urlencode
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from .device import VyDevice, ApiResponse
+from .timing import RequestTiming
+from .config_tree import ConfigTree
+from .config_diff import config_diff
+from .transaction import AsyncTransaction
+from .bulk import AsyncBulkPusher
+from .stream import AsyncShowStream
+
+
+class AsyncVyDevice(VyDevice):
+    """
+    Represents a device for interacting with the VyOS API from asyncio code.
+
+    AsyncVyDevice accepts the same arguments as VyDevice and offers the same methods as coroutines. Payloads are
+    built by VyDevice._get_payload and responses are returned as ApiResponse objects, so both clients can be used
+    interchangeably. All requests run on the event loop over a pooled aiohttp session, so many devices can be
+    driven concurrently from a single thread. A transport given by name or instance replaces the aiohttp session:
+    'http2' multiplexes the requests on the event loop, the others run their requests in worker threads.
+
+    Requires the optional aiohttp dependency (pip install pyvyos[async]).
+
+    Methods:
+        close(): Close the pooled connections held by the device.
+        _get_session(): Get the pooled aiohttp session used for API requests.
+        _send_request(api_url, payload): Send a single HTTP request.
+        _perform_request(command, op, path, api_url, payload, generation): Send a request with retries and hooks.
+        _api_request(command, op, path=[], method='POST', file=None, url=None, name=None, confirm_time=None): Make an API request.
+        retrieve_show_config(path=[]): Retrieve and show the device configuration.
+        retrieve_return_values(path=[]): Retrieve and return specific configuration values.
+        retrieve_exists(path=[]): Check whether a configuration path exists.
+        retrieve_config_tree(path=[]): Retrieve the device configuration as a queryable ConfigTree.
+        snapshot(store, name=None): Retrieve the full configuration and add it to a SnapshotStore.
+        reset(path=[]): Reset a specific configuration element.
+        image_add(url=None, file=None, path=[]): Add an image from a URL or file.
+        image_delete(name, url=None, file=None, path=[]): Delete a specific image.
+        show(path=[]): Show configuration information.
+        show_stream(path=[], parser=None, chunk_size=65536): Stream the output of a show command line by line or as parsed records.
+        generate(path=[]): Generate configuration based on specified path.
+        configure_set(path=[], confirm_time=None): Set configuration based on specified path.
+        configure_delete(path=[], confirm_time=None): Delete configuration based on specified path.
+        configure_batch(operations, confirm_time=None): Apply mixed set and delete operations in a single commit.
+        configure_confirm(): Confirm a commit made with a confirm_time.
+        configure_sync(desired, path=[], current=None): Bring the configuration to a desired state with a minimal commit.
+        configure_bulk(path, op='set', **kwargs): Push a very large list of paths in adaptive chunks.
+        transaction(max_operations=None): Buffer set and delete operations and apply them in a single commit.
+        config_file_save(file=None): Save the configuration to a file.
+        config_file_load(file=None): Load the configuration from a file.
+        reboot(path=["now"]): Reboot the device.
+        poweroff(path=["now"]): Power off the device.
+    """
+    _default_transport = 'aiohttp'
+
+    def __init__(self, *args, **kwargs):
+        if aiohttp is None:
+            raise ImportError("AsyncVyDevice requires aiohttp, install it with 'pip install pyvyos[async]'")
+
+        super().__init__(*args, **kwargs)
+
+    def __enter__(self):
+        raise TypeError("AsyncVyDevice must be used with 'async with'")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the pooled connections held by the device.
+
+        The device stays usable after close(); the next request opens a new connection.
+        """
+        with self._session_lock:
+            session, self._session = self._session, None
+
+        if session is not None:
+            await session.close()
+
+        if self.transport is not None:
+            await self.transport.aclose()
+
+    def _get_session(self):
+        """
+        Get the pooled aiohttp session used for API requests.
+
+        The session is created on first use, from within the running event loop.
+
+        Returns:
+            aiohttp.ClientSession: The session bound to this device.
+        """
+        with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector_args = {'limit': 0, 'limit_per_host': self.pool_maxsize}
+                if not self.keepalive:
+                    connector_args['force_close'] = True
+                elif self.idle_timeout is not None:
+                    connector_args['keepalive_timeout'] = self.idle_timeout
+                if not self.verify:
+                    connector_args['ssl'] = False
+
+                trace_config = aiohttp.TraceConfig()
+                trace_config.on_connection_create_start.append(_on_connection_create_start)
+                trace_config.on_connection_create_end.append(_on_connection_create_end)
+                trace_config.on_request_end.append(_on_request_end)
+
+                self._session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(**connector_args),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                    trace_configs=[trace_config],
+                )
+
+            return self._session
+
+    async def _send_request(self, api_url, payload):
+        """
+        Send a single HTTP request.
+
+        Args:
+            api_url (str): The URL of the API command.
+            payload (dict): The payload for the request.
+
+        Returns:
+            tuple: The (status, content, error, timing) of the request; content is the raw response body, or None
+            with status 0 and timing None for transport failures. The connect time includes the TLS handshake,
+            which aiohttp does not report apart.
+        """
+        if self.transport is not None:
+            return await self.transport.asend(api_url, payload, self.timeout, self.verify)
+
+        content = None
+        error = None
+        timing = None
+
+        try:
+            session = self._get_session()
+            trace = {'start': time.perf_counter(), 'connect': 0.0}
+            async with session.post(api_url, data=payload, trace_request_ctx=trace) as resp:
+                status = resp.status
+                content = await resp.read()
+            total = time.perf_counter() - trace['start']
+
+            timing = RequestTiming(connect=trace['connect'], tls=None, ttfb=trace.get('ttfb', total), total=total,
+                                   request_bytes=len(urlencode(payload)), response_bytes=len(content))
+
+        except aiohttp.ClientConnectionError as e:
+            error = 'connection error: ' + str(e)
+            status = 0
+
+        except asyncio.TimeoutError as e:
+            error = 'timeout error: ' + str(e)
+            status = 0
+
+        return status, content, error, timing
+
+    async def _api_request(self, command, op, path=[], method='POST', file=None, url=None, name=None,
+                          confirm_time=None):
+        """
+        Make an API request.
+
+        Args:
+            command (str): The API command to execute.
+            op (str): The operation to perform in the API request.
+            path (list, optional): The path elements for the API request (default is an empty list).
+            method (str, optional): The HTTP method to use for the request (default is 'POST').
+            file (str, optional): The file to include in the request (default is None).
+            url (str, optional): The URL to include in the request (default is None).
+            name (str, optional): The name to include in the request (default is None).
+            confirm_time (int, optional): Minutes after which a configure commit is rolled back unless confirmed
+                (default is None, a plain commit).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        api_url = self._get_url(command)
+        payload = self._get_payload(op, path=path, file=file, url=url, name=name, confirm_time=confirm_time)
+
+        cached, generation = self._cache_lookup(command, op, path, payload)
+        if cached is not None:
+            return cached
+
+        if self.singleflight is None or command not in self.singleflight.commands:
+            return await self._perform_request(command, op, path, api_url, payload, generation)
+
+        async def perform():
+            response = await self._perform_request(command, op, path, api_url, payload, generation)
+            # Decoded once here, the callers sharing this call get copies with the same result
+            response.error
+            return response
+
+        response, _ = await self.singleflight.ado((api_url, payload['data']), perform)
+        return response.copy()
+
+    async def _perform_request(self, command, op, path, api_url, payload, generation):
+        """
+        Send a request with retries, circuit breaking, caching and hooks.
+
+        Args:
+            command (str): The API command to execute.
+            op (str): The operation to perform in the API request.
+            path (list): The path elements for the API request.
+            api_url (str): The URL of the API command.
+            payload (dict): The payload for the request.
+            generation (int): The cache generation returned by _cache_lookup.
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        self._run_hooks('request_start', command, op, path)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+                status, content, error, timing = 0, None, f'circuit open: {self.hostname} is failing, request not sent', None
+                break
+
+            token = await self.limiter.acquire_async() if self.limiter is not None else None
+            status = 0
+            try:
+                status, content, error, timing = await self._send_request(api_url, payload)
+            except BaseException:
+                # An escaping error must still settle a half-open trial, or the breaker never closes again
+                self._record_outcome(0)
+                raise
+            finally:
+                if token is not None:
+                    self.limiter.release(token, status, kind=self._latency_kind(command, op, path))
+            self._record_outcome(status)
+
+            if self.retry is None or not self.retry.should_retry(command, attempt, status):
+                break
+            await asyncio.sleep(self.retry.delay(attempt))
+
+        # Removing apikey from payload for security reasons
+        del(payload['key'])
+        if content is None:
+            response = ApiResponse(status=status, request=payload, result={}, error=error, timing=timing)
+        else:
+            response = ApiResponse.from_content(status, payload, content, timing)
+        self._cache_update(command, op, path, response, generation)
+        self._run_hooks('request_end', command, op, path, response)
+        return response
+
+    async def retrieve_show_config(self, path=[]):
+        """
+        Retrieve and show the device configuration.
+
+        Args:
+            path (list, optional): The path elements for the configuration retrieval (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="retrieve", op='showConfig', path=path, method="POST")
+
+    async def retrieve_return_values(self, path=[]):
+        """
+        Retrieve and return specific configuration values.
+
+        Args:
+            path (list, optional): The path elements for the configuration retrieval (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="retrieve", op='returnValues', path=path, method="POST")
+
+    async def retrieve_exists(self, path=[]):
+        """
+        Check whether a configuration path exists.
+
+        Args:
+            path (list, optional): The path elements to check (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object whose result is True or False.
+        """
+        return await self._api_request(command="retrieve", op='exists', path=path, method="POST")
+
+    async def retrieve_config_tree(self, path=[]):
+        """
+        Retrieve the device configuration as a queryable ConfigTree.
+
+        Args:
+            path (list, optional): The path elements for the configuration retrieval (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object whose result is a ConfigTree on success.
+        """
+        response = await self.retrieve_show_config(path=path)
+        if not response.error:
+            response.result = ConfigTree(response.result)
+        return response
+
+    async def snapshot(self, store, name=None):
+        """
+        Retrieve the full device configuration and store it as a snapshot.
+
+        Args:
+            store (SnapshotStore): The store to add the snapshot to.
+            name (str, optional): The name to store the snapshot under (default is the device hostname).
+
+        Returns:
+            ApiResponse: An ApiResponse object whose result is the stored Snapshot on success.
+        """
+        response = await self.retrieve_show_config(path=[])
+        if not response.error:
+            # Storing hashes, compresses and syncs to disk, keep it off the event loop
+            response.result = await asyncio.get_running_loop().run_in_executor(
+                None, store.put, name or self.hostname, response.result)
+        return response
+
+    async def reset(self, path=[]):
+        """
+        Reset a specific configuration element.
+
+        Args:
+            path (list, optional): The path elements for the configuration reset (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="reset", op='reset', path=path, method="POST")
+
+    async def image_add(self, url=None, file=None, path=[]):
+        """
+        Add an image from a URL or file.
+
+        Args:
+            url (str, optional): The URL of the image to add (default is None).
+            file (str, optional): The path to the local image file to add (default is None).
+            path (list, optional): The path elements for the image addition (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="image", op='add', url=url, method="POST")
+
+    async def image_delete(self, name, url=None, file=None, path=[]):
+        """
+        Delete a specific image.
+
+        Args:
+            name (str): The name of the image to delete.
+            url (str, optional): The URL of the image to delete (default is None).
+            file (str, optional): The path to the local image file to delete (default is None).
+            path (list, optional): The path elements for the image deletion (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="image", op='delete', name=name, method="POST")
+
+    async def show(self, path=[]):
+        """
+        Show configuration information.
+
+        Args:
+            path (list, optional): The path elements for the configuration display (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="show", op='show', path=path, method="POST")
+
+    def show_stream(self, path=[], parser=None, chunk_size=64 * 1024):
+        """
+        Show operational information, streaming the output while it is read.
+
+        Unlike show(), the output is never held in memory as a whole, which suits commands such as
+        show ip route on routers carrying a full table.
+
+        Args:
+            path (list, optional): The path elements of the show command (default is an empty list).
+            parser (str or object, optional): 'routes', 'interfaces', 'arp' or 'neighbors' to yield parsed records,
+                or a parser object with feed(line) and flush() methods; None yields the output lines (default is None).
+            chunk_size (int, optional): The number of bytes read at a time (default is 64 KiB).
+
+        Returns:
+            AsyncShowStream: An iterable over the lines or records; its status and error are set once iteration ends.
+        """
+        payload = self._get_payload('show', path=path)
+        # Removing apikey from payload for security reasons, the stream adds it when sending
+        del(payload['key'])
+        return AsyncShowStream(self, path, payload, parser=parser, chunk_size=chunk_size)
+
+    async def generate(self, path=[]):
+        """
+        Generate configuration based on the given path.
+
+        Args:
+            path (list, optional): The path elements for configuration generation (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="generate", op='generate', path=path, method="POST")
+
+    async def configure_set(self, path=[], confirm_time=None):
+        """
+        Set configuration based on the given path.
+
+        Args:
+            path (list, optional): The path elements for configuration setting (default is an empty list).
+            confirm_time (int, optional): Minutes after which the commit is rolled back unless confirmed with
+                configure_confirm (default is None, a plain commit).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="configure", op='set', path=path, method="POST",
+                                       confirm_time=confirm_time)
+
+    async def configure_delete(self, path=[], confirm_time=None):
+        """
+        Delete configuration based on the given path.
+
+        Args:
+            path (list, optional): The path elements for configuration deletion (default is an empty list).
+            confirm_time (int, optional): Minutes after which the commit is rolled back unless confirmed with
+                configure_confirm (default is None, a plain commit).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="configure", op='delete', path=path, method="POST",
+                                       confirm_time=confirm_time)
+
+    async def configure_batch(self, operations, confirm_time=None):
+        """
+        Apply mixed set and delete operations in a single configure request, and so a single commit.
+
+        Args:
+            operations (list): (op, path) tuples, where op is 'set' or 'delete', applied in order.
+            confirm_time (int, optional): Minutes after which the commit is rolled back unless confirmed with
+                configure_confirm (default is None, a plain commit).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response, or None if there was nothing to send.
+        """
+        if not operations:
+            return None
+
+        ops = [op for op, _ in operations]
+        paths = [list(path) for _, path in operations]
+        return await self._api_request(command="configure", op=ops, path=paths, method="POST",
+                                       confirm_time=confirm_time)
+
+    async def configure_confirm(self):
+        """
+        Confirm a commit made with a confirm_time, so that it is not rolled back.
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="configure", op='confirm', method="POST")
+
+    async def configure_sync(self, desired, path=[], current=None):
+        """
+        Bring the configuration under a path to a desired state with the minimal set of changes.
+
+        Args:
+            desired (dict or list): The desired configuration under path, as a showConfig-style nested dict or
+                a list of configure_set paths relative to path.
+            path (list, optional): The path elements of the subtree to synchronize (default is the whole configuration).
+            current (dict, optional): The current configuration under path; fetched with retrieve_show_config if
+                not given.
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response, or None if the configuration
+            already matches. If the current configuration could not be retrieved, its failed response is returned.
+        """
+        if current is None:
+            response = await self.retrieve_show_config(path=path)
+            if response.error:
+                return response
+            current = response.result
+
+        diff = config_diff(desired, current)
+        return await self.configure_batch([(op, list(path) + p) for op, p in diff.operations()])
+
+    async def configure_bulk(self, path, op='set', **kwargs):
+        """
+        Push a very large list of configuration paths in adaptively sized chunks.
+
+        Unlike configure_set with a list of paths, the change is split into several commits. Chunks the device
+        rejects are bisected until the failing paths are isolated, and the outcome is reported per path.
+
+        Args:
+            path (list): The list of configuration paths.
+            op (str, optional): The operation applied to every path, 'set' or 'delete' (default is 'set').
+            **kwargs: Chunking options passed to AsyncBulkPusher (initial_bytes, min_bytes, max_bytes,
+                target_latency, max_in_flight).
+
+        Returns:
+            BulkResult: The outcome of every path.
+        """
+        return await AsyncBulkPusher(self, **kwargs).push([(op, p) for p in path])
+
+    def transaction(self, max_operations=None):
+        """
+        Buffer set and delete operations and apply them in a single commit.
+
+        Example:
+            async with device.transaction() as tx:
+                await tx.delete(["interfaces", "dummy", "dum1"])
+                await tx.set(["interfaces", "dummy", "dum2", "address", "192.168.140.1/24"])
+
+        Args:
+            max_operations (int, optional): Flush automatically once this many operations are buffered
+                (default is None, flush only when the with block exits).
+
+        Returns:
+            AsyncTransaction: The transaction, to be used as an async context manager.
+        """
+        return AsyncTransaction(self, max_operations=max_operations)
+
+    async def config_file_save(self, file=None):
+        """
+        Save the configuration to a file.
+
+        Args:
+            file (str, optional): The path to the file where the configuration will be saved (default is None).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="config-file", op='save', file=file, method="POST")
+
+    async def config_file_load(self, file=None):
+        """
+        Load the configuration from a file.
+
+        Args:
+            file (str, optional): The path to the file from which the configuration will be loaded (default is None).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="config-file", op='load', file=file, method="POST")
+
+    async def reboot(self, path=["now"]):
+        """
+        Reboot the device.
+
+        Args:
+            path (list, optional): The path elements for the reboot operation (default is ["now"]).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="reboot", op='reboot', path=path, method="POST")
+
+    async def poweroff(self, path=["now"]):
+        """
+        Power off the device.
+
+        Args:
+            path (list, optional): The path elements for the power off operation (default is ["now"]).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return await self._api_request(command="poweroff", op='poweroff', path=path, method="POST")
+
+
+async def _on_connection_create_start(session, context, params):
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx['connect_start'] = time.perf_counter()
+
+
+async def _on_connection_create_end(session, context, params):
+    if context.trace_request_ctx is not None:
+        trace = context.trace_request_ctx
+        trace['connect'] = time.perf_counter() - trace['connect_start']
+
+
+async def _on_request_end(session, context, params):
+    if context.trace_request_ctx is not None:
+        trace = context.trace_request_ctx
+        trace['ttfb'] = time.perf_counter() - trace['start']
@@ -0,0 +1,241 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+
+from . import json_backend
+
+
+@dataclass
+class PathResult:
+    """
+    The outcome of one operation of a bulk push.
+
+    Attributes:
+        op (str): The operation, 'set' or 'delete'.
+        path (list): The configuration path.
+        success (bool): Whether the operation was committed.
+        error (str): False on success, otherwise the error the device returned for this path alone.
+    """
+    op: str
+    path: list
+    success: bool
+    error: str
+
+
+@dataclass
+class BulkResult:
+    """
+    The report of a bulk push.
+
+    Attributes:
+        results (list): One PathResult per operation, in input order.
+        requests (int): The number of configure requests sent, including bisection retries.
+    """
+    results: list = field(default_factory=list)
+    requests: int = 0
+
+    @property
+    def success(self):
+        """
+        bool: True if every operation was committed.
+        """
+        return all(r.success for r in self.results)
+
+    @property
+    def failed(self):
+        """
+        list: The PathResult of every operation that could not be committed.
+        """
+        return [r for r in self.results if not r.success]
+
+
+class BulkPusher:
+    """
+    Pushes very large lists of configure operations in adaptively sized chunks.
+
+    Operations are grouped into chunks that fit a byte budget. The budget starts at initial_bytes and is scaled
+    after every chunk so that a request takes about target_latency seconds, within [min_bytes, max_bytes]. Up to
+    max_in_flight chunks are outstanding at a time. A chunk the device rejects is split in two and both halves
+    are retried, recursively, so that only the operations that actually fail end up reported as failed, and
+    operations of successful chunks are never sent twice.
+
+    Only chunks the device answered with an API error are bisected. A transport failure, timeout, open circuit
+    or HTTP 5xx says nothing about the operations, so it aborts the push instead: the chunk and every operation
+    not sent yet are reported failed with that error.
+
+    Args:
+        device (VyDevice): The device to push to.
+        initial_bytes (int, optional): The starting chunk size in bytes of encoded operations (default is 64 KiB).
+        min_bytes (int, optional): The smallest chunk budget (default is 4 KiB).
+        max_bytes (int, optional): The largest chunk budget (default is 1 MiB).
+        target_latency (float, optional): The time in seconds a chunk should take (default is 5).
+        max_in_flight (int, optional): The maximum number of chunks sent at the same time (default is 2).
+
+    Methods:
+        push(operations): Push (op, path) operations and report the outcome of each one.
+    """
+
+    def __init__(self, device, initial_bytes=64 * 1024, min_bytes=4 * 1024, max_bytes=1024 * 1024,
+                 target_latency=5, max_in_flight=2):
+        self.device = device
+        self.budget = initial_bytes
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+        self.max_in_flight = max_in_flight
+
+    def _start(self, operations):
+        self._operations = [(op, list(path)) for op, path in operations]
+        self._sizes = [len(json_backend.dumps({'op': op, 'path': path})) + 2 for op, path in self._operations]
+        self._next = 0
+        self._retries = deque()
+        self._aborted = None
+        self._result = BulkResult(results=[None] * len(self._operations))
+
+    def _next_chunk(self):
+        """
+        Get the next chunk to send: a bisected retry if any, otherwise fresh operations up to the byte budget.
+        """
+        if self._aborted:
+            return []
+        if self._retries:
+            return self._retries.popleft()
+
+        chunk = []
+        size = 0
+        while self._next < len(self._operations) and (not chunk or size + self._sizes[self._next] <= self.budget):
+            size += self._sizes[self._next]
+            chunk.append(self._next)
+            self._next += 1
+        return chunk
+
+    def _adapt(self, chunk, latency, error):
+        if error:
+            # A slow failure is most likely a timeout, so the following chunks are made smaller
+            if latency >= self.target_latency:
+                self.budget = max(self.min_bytes, self.budget // 2)
+            return
+
+        size = sum(self._sizes[i] for i in chunk)
+
+        # Only full-size chunks say something about the right budget
+        if size >= self.budget / 2 and latency > 0:
+            scale = min(2.0, max(0.5, self.target_latency / latency))
+            self.budget = int(min(self.max_bytes, max(self.min_bytes, self.budget * scale)))
+
+    def _handle(self, chunk, response, latency):
+        self._result.requests += 1
+        error = response.error
+        self._adapt(chunk, latency, error)
+
+        if not error:
+            for i in chunk:
+                self._result.results[i] = PathResult(*self._operations[i], True, False)
+        elif response.status == 0 or response.status >= 500:
+            # The device did not judge the operations, bisecting would only repeat the failure
+            for i in chunk:
+                self._result.results[i] = PathResult(*self._operations[i], False, error)
+            self._aborted = self._aborted or error
+        elif len(chunk) == 1:
+            self._result.results[chunk[0]] = PathResult(*self._operations[chunk[0]], False, error)
+        else:
+            middle = len(chunk) // 2
+            self._retries.extend([chunk[:middle], chunk[middle:]])
+
+    def _finish(self):
+        """
+        Report the operations left unsent by an aborted push, and get the result.
+        """
+        for i, result in enumerate(self._result.results):
+            if result is None:
+                self._result.results[i] = PathResult(*self._operations[i], False, f'not sent: {self._aborted}')
+        return self._result
+
+    def _send(self, chunk):
+        start = time.monotonic()
+        try:
+            response = self.device.configure_batch([self._operations[i] for i in chunk])
+        except Exception as e:
+            response = _error_response(e)
+        return response, time.monotonic() - start
+
+    def push(self, operations):
+        """
+        Push configure operations.
+
+        Args:
+            operations (list): (op, path) tuples, where op is 'set' or 'delete'.
+
+        Returns:
+            BulkResult: The outcome of every operation.
+        """
+        self._start(operations)
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            while True:
+                while len(in_flight) < self.max_in_flight:
+                    chunk = self._next_chunk()
+                    if not chunk:
+                        break
+                    in_flight[executor.submit(self._send, chunk)] = chunk
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._handle(in_flight.pop(future), *future.result())
+
+        return self._finish()
+
+
+class AsyncBulkPusher(BulkPusher):
+    """
+    The AsyncVyDevice counterpart of BulkPusher; push() is a coroutine.
+    """
+
+    async def _send(self, chunk):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            response = await self.device.configure_batch([self._operations[i] for i in chunk])
+        except Exception as e:
+            response = _error_response(e)
+        return response, loop.time() - start
+
+    async def push(self, operations):
+        """
+        Push configure operations.
+
+        Args:
+            operations (list): (op, path) tuples, where op is 'set' or 'delete'.
+
+        Returns:
+            BulkResult: The outcome of every operation.
+        """
+        self._start(operations)
+        in_flight = {}
+
+        while True:
+            while len(in_flight) < self.max_in_flight:
+                chunk = self._next_chunk()
+                if not chunk:
+                    break
+                in_flight[asyncio.ensure_future(self._send(chunk))] = chunk
+
+            if not in_flight:
+                break
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                self._handle(in_flight.pop(task), *task.result())
+
+        return self._finish()
+
+
+def _error_response(exception):
+    from .device import ApiResponse
+    return ApiResponse(status=0, request={}, result={}, error=f'{type(exception).__name__}: {exception}')
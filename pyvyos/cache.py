@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    A read-through cache for the results of the VyOS 'retrieve' endpoint.
+
+    Results are keyed by operation and configuration path, expire after a TTL and are evicted in least recently
+    used order once maxsize entries are stored. A lookup that misses can still be answered from a cached
+    showConfig result of an ancestor path by walking down into it.
+
+    Cached results are shared between callers and should be treated as read-only.
+
+    Args:
+        maxsize (int, optional): The maximum number of cached results (default is 256).
+        ttl (float, optional): The time in seconds a result stays valid (default is 60, None never expires).
+
+    Attributes:
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to go to the device.
+        generation (int): Incremented on every invalidation, used to drop results fetched before it.
+    """
+
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get_entry(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires, result = entry
+        if expires is not None and expires <= now:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, op, path):
+        """
+        Look up a cached result.
+
+        Args:
+            op (str): The retrieve operation, 'showConfig' or 'returnValues'.
+            path (tuple): The configuration path.
+
+        Returns:
+            tuple: (True, result) on a hit, (False, None) on a miss.
+        """
+        path = tuple(path)
+        with self._lock:
+            now = time.monotonic()
+
+            entry = self._get_entry((op, path), now)
+            if entry is not None:
+                self.hits += 1
+                return True, entry[1]
+
+            # Walk down from the closest cached showConfig ancestor
+            for depth in range(len(path) - 1, -1, -1):
+                entry = self._get_entry(('showConfig', path[:depth]), now)
+                if entry is None:
+                    continue
+
+                node = entry[1]
+                for element in path[depth:]:
+                    if not isinstance(node, dict) or element not in node:
+                        node = None
+                        break
+                    node = node[element]
+
+                if op == 'showConfig' and isinstance(node, dict):
+                    self.hits += 1
+                    return True, node
+                if op == 'returnValues' and isinstance(node, (str, list)):
+                    self.hits += 1
+                    return True, [node] if isinstance(node, str) else node
+                break
+
+            self.misses += 1
+            return False, None
+
+    def put(self, op, path, result, generation=None):
+        """
+        Store a result.
+
+        Args:
+            op (str): The retrieve operation, 'showConfig' or 'returnValues'.
+            path (tuple): The configuration path.
+            result: The result data of the API response.
+            generation (int, optional): The generation observed before the request was sent. The result is
+                discarded if the cache was invalidated since then.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[(op, tuple(path))] = (expires, result)
+            self._entries.move_to_end((op, tuple(path)))
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path):
+        """
+        Drop every cached result that overlaps a changed configuration path.
+
+        Both the ancestors of the path, whose results contain it, and its descendants are dropped.
+
+        Args:
+            path (tuple): The configuration path that changed.
+        """
+        path = tuple(path)
+        with self._lock:
+            self.generation += 1
+            for key in list(self._entries):
+                cached = key[1]
+                shortest = min(len(cached), len(path))
+                if cached[:shortest] == path[:shortest]:
+                    del self._entries[key]
+
+    def clear(self):
+        """
+        Drop every cached result.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: The hits, misses and current size of the cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
@@ -0,0 +1,362 @@
+"""
+The pyvyos command line.
+
+Run a single API call:
+
+    pyvyos --host 192.0.2.1 --apikey KEY show system image
+    pyvyos retrieve interfaces ethernet
+    pyvyos set interfaces ethernet eth1 description uplink
+
+or a stream of calls, one JSON object per line, from a file or stdin:
+
+    pyvyos batch ops.jsonl --workers 32
+
+Connection settings default to the VYDEVICE_HOSTNAME, VYDEVICE_APIKEY, VYDEVICE_PORT, VYDEVICE_PROTOCOL and
+VYDEVICE_VERIFY_SSL environment variables. Only the standard library is imported until the arguments are parsed,
+so starting the command stays cheap when it is called many times from scripts.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Single-call subcommands -> (API command, op)
+COMMANDS = {
+    'show': ('show', 'show'),
+    'retrieve': ('retrieve', 'showConfig'),
+    'values': ('retrieve', 'returnValues'),
+    'exists': ('retrieve', 'exists'),
+    'set': ('configure', 'set'),
+    'delete': ('configure', 'delete'),
+    'generate': ('generate', 'generate'),
+    'reset': ('reset', 'reset'),
+    'save': ('config-file', 'save'),
+    'load': ('config-file', 'load'),
+}
+
+# The op used for a batch operation that names only the API command
+DEFAULT_OPS = {
+    'retrieve': 'showConfig',
+    'show': 'show',
+    'configure': 'set',
+    'generate': 'generate',
+    'reset': 'reset',
+    'config-file': 'save',
+    'reboot': 'reboot',
+    'poweroff': 'poweroff',
+}
+
+
+def build_parser():
+    """
+    Build the argument parser of the command line.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    verify = os.getenv('VYDEVICE_VERIFY_SSL')
+
+    parser = argparse.ArgumentParser(prog='pyvyos', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=os.getenv('VYDEVICE_HOSTNAME'), help='the device hostname or address')
+    parser.add_argument('--apikey', default=os.getenv('VYDEVICE_APIKEY'), help='the API key')
+    parser.add_argument('--port', type=int, default=int(os.getenv('VYDEVICE_PORT') or 443), help='the API port')
+    parser.add_argument('--protocol', default=os.getenv('VYDEVICE_PROTOCOL') or 'https', choices=['http', 'https'])
+    parser.add_argument('--insecure', action='store_true', default=verify is not None and verify.lower() == 'false',
+                        help='do not verify TLS certificates')
+    parser.add_argument('--timeout', type=float, default=10, help='the request timeout in seconds')
+    parser.add_argument('--inventory', help='a JSON file mapping device names to VyDevice arguments')
+    parser.add_argument('--json', action='store_true', help='print the whole response as JSON')
+
+    subparsers = parser.add_subparsers(dest='subcommand', required=True)
+    for name, (command, op) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=f'{command} {op}')
+        if name in ('save', 'load'):
+            subparser.add_argument('file', nargs='?' if name == 'save' else None, help='the configuration file')
+        else:
+            subparser.add_argument('path', nargs='*', help='the path elements')
+
+    batch = subparsers.add_parser('batch', help='run JSONL operations from a file or stdin')
+    batch.add_argument('input', nargs='?', default='-', help='the JSONL file (default is stdin)')
+    batch.add_argument('--output', default='-', help='the file to write results to (default is stdout)')
+    batch.add_argument('--workers', type=int, default=16, help='the number of devices served concurrently')
+    batch.add_argument('--max-pending', type=int, default=1024,
+                       help='the number of operations read ahead of the results written')
+    return parser
+
+
+class DeviceFactory:
+    """
+    Creates one VyDevice per device name and reuses it, so that its connections are reused.
+
+    Args:
+        args (argparse.Namespace): The parsed connection arguments.
+        inventory (dict, optional): VyDevice keyword arguments per device name, completed by the connection
+            arguments (default is None).
+
+    Methods:
+        get(name): Get the device for a name.
+        close(): Close all devices.
+    """
+
+    def __init__(self, args, inventory=None):
+        self.args = args
+        self.inventory = inventory or {}
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """
+        Get the device for a name.
+
+        Args:
+            name (str): The device name; used as the hostname when it is not in the inventory.
+
+        Returns:
+            VyDevice: The device.
+        """
+        from .device import VyDevice
+
+        name = name or self.args.host
+        with self._lock:
+            device = self._devices.get(name)
+            if device is None:
+                kwargs = {'hostname': name, 'apikey': self.args.apikey, 'port': self.args.port,
+                          'protocol': self.args.protocol, 'verify': not self.args.insecure,
+                          'timeout': self.args.timeout}
+                kwargs.update(self.inventory.get(name, {}))
+                device = self._devices[name] = VyDevice(**kwargs)
+            return device
+
+    def close(self):
+        """
+        Close all devices.
+        """
+        with self._lock:
+            for device in self._devices.values():
+                device.close()
+            self._devices.clear()
+
+
+class BatchRunner:
+    """
+    Runs batch operations concurrently across devices and writes their results as they complete.
+
+    Operations on the same device run one after the other in input order, so a configure followed by a
+    retrieve sees its change; different devices run concurrently on up to workers threads. At most max_pending
+    operations are held in memory, so the input may be an unbounded stream.
+
+    Args:
+        factory (DeviceFactory): Provides the device of each operation.
+        write (callable): Called with each result dict, from worker threads, one call at a time.
+        workers (int, optional): The number of devices served concurrently (default is 16).
+        max_pending (int, optional): The number of operations read ahead of their results (default is 1024).
+
+    Attributes:
+        failed (int): The number of results written with an error.
+
+    Methods:
+        submit(operation): Queue an operation.
+        report(result): Write a result that does not come from a device.
+        wait(): Wait until every queued operation has completed.
+    """
+
+    def __init__(self, factory, write, workers=16, max_pending=1024):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.factory = factory
+        self.write = write
+        self.failed = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def submit(self, operation):
+        """
+        Queue an operation, blocking while max_pending operations are in flight.
+
+        Args:
+            operation (dict): The decoded operation.
+        """
+        self._pending.acquire()
+        name = operation.get('device') or self.factory.args.host
+        with self._lock:
+            queue = self._queues.get(name)
+            if queue is not None:
+                queue.append(operation)
+                return
+            self._queues[name] = deque([operation])
+        self._executor.submit(self._drain, name)
+
+    def _drain(self, name):
+        while True:
+            with self._lock:
+                queue = self._queues[name]
+                if not queue:
+                    del self._queues[name]
+                    return
+                operation = queue.popleft()
+            try:
+                self._emit(run_operation(self.factory.get(name), operation))
+            except Exception as e:
+                self._emit(dict(_echo(operation), status=0, result=None, error=f'{type(e).__name__}: {e}'))
+            finally:
+                self._pending.release()
+
+    def _emit(self, result):
+        with self._write_lock:
+            if result.get('error'):
+                self.failed += 1
+            self.write(result)
+
+    def report(self, result):
+        """
+        Write a result that does not come from a device, such as an invalid input line.
+
+        Args:
+            result (dict): The result to write.
+        """
+        self._emit(result)
+
+    def wait(self):
+        """
+        Wait until every queued operation has completed.
+        """
+        self._executor.shutdown(wait=True)
+
+
+def _echo(operation):
+    return {key: operation[key] for key in ('id', 'device', 'command', 'op', 'path') if key in operation}
+
+
+def run_operation(device, operation):
+    """
+    Run one batch operation.
+
+    Args:
+        device (VyDevice): The device to run it on.
+        operation (dict): The operation, with command, op (optional for most commands), path, and optionally
+            file, url and name.
+
+    Returns:
+        dict: The operation fields with the status, result, error and elapsed time of the call.
+    """
+    command = operation.get('command', 'show')
+    op = operation.get('op') or DEFAULT_OPS.get(command)
+    start = time.perf_counter()
+    response = device._api_request(command=command, op=op, path=operation.get('path', []),
+                                   file=operation.get('file'), url=operation.get('url'), name=operation.get('name'))
+    return dict(_echo(operation), status=response.status, result=response.result, error=response.error,
+                elapsed=round(time.perf_counter() - start, 6))
+
+
+def run_batch(args, factory, stdin=None, stdout=None):
+    """
+    Run the batch subcommand.
+
+    Returns:
+        int: The exit status, 1 when any operation failed.
+    """
+    from . import json_backend
+
+    source = (stdin or sys.stdin) if args.input == '-' else open(args.input)
+    target = (stdout or sys.stdout) if args.output == '-' else open(args.output, 'w')
+
+    def write(result):
+        target.write(json_backend.dumps(result) + '\n')
+        target.flush()
+
+    runner = BatchRunner(factory, write, workers=args.workers, max_pending=args.max_pending)
+    try:
+        for number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                operation = json_backend.loads(line)
+            except ValueError as e:
+                runner.report({'line': number, 'status': 0, 'result': None, 'error': f'invalid JSON: {e}'})
+                continue
+            if not isinstance(operation, dict):
+                runner.report({'line': number, 'status': 0, 'result': None, 'error': 'operation is not an object'})
+                continue
+            if not operation.get('device') and not args.host:
+                runner.report(dict(_echo(operation), line=number, status=0, result=None,
+                                   error='operation has no device and no --host is given'))
+                continue
+            runner.submit(operation)
+        runner.wait()
+    finally:
+        if source is not sys.stdin and source is not stdin:
+            source.close()
+        if target is not sys.stdout and target is not stdout:
+            target.close()
+
+    return 1 if runner.failed else 0
+
+
+def run_single(args, factory, stdout=None):
+    """
+    Run a single-call subcommand.
+
+    Returns:
+        int: The exit status, 1 when the call failed.
+    """
+    from . import json_backend
+
+    stdout = stdout or sys.stdout
+    command, op = COMMANDS[args.subcommand]
+    device = factory.get(args.host)
+    if args.subcommand in ('save', 'load'):
+        response = device._api_request(command=command, op=op, file=args.file)
+    else:
+        response = device._api_request(command=command, op=op, path=args.path)
+
+    if args.json:
+        stdout.write(json_backend.dumps({'status': response.status, 'result': response.result,
+                                         'error': response.error}) + '\n')
+    elif response.error:
+        sys.stderr.write(f'pyvyos: {response.error}\n')
+    elif isinstance(response.result, str):
+        stdout.write(response.result if response.result.endswith('\n') else response.result + '\n')
+    elif response.result is not None:
+        stdout.write(json_backend.dumps(response.result) + '\n')
+
+    return 1 if response.error else 0
+
+
+def main(argv=None, stdin=None, stdout=None):
+    """
+    Run the command line.
+
+    Args:
+        argv (list, optional): The arguments (default is sys.argv[1:]).
+        stdin (file, optional): The batch input when reading from stdin (default is sys.stdin).
+        stdout (file, optional): Where results are written (default is sys.stdout).
+
+    Returns:
+        int: The exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    inventory = None
+    if args.inventory:
+        import json
+        with open(args.inventory) as inventory_file:
+            inventory = json.load(inventory_file)
+    if not args.apikey and not inventory:
+        parser.error('an API key is required, use --apikey or VYDEVICE_APIKEY')
+    if args.subcommand != 'batch' and not args.host:
+        parser.error('a device is required, use --host or VYDEVICE_HOSTNAME')
+
+    factory = DeviceFactory(args, inventory)
+    try:
+        if args.subcommand == 'batch':
+            return run_batch(args, factory, stdin=stdin, stdout=stdout)
+        return run_single(args, factory, stdout=stdout)
+    finally:
+        factory.close()
@@ -0,0 +1,107 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ConfigDiff:
+    """
+    The configure operations that turn one configuration into another.
+
+    Attributes:
+        delete (list): The paths to delete, each the highest node that is absent from the desired configuration.
+        set (list): The paths to set, each a full path to a leaf value or valueless node.
+    """
+    delete: list = field(default_factory=list)
+    set: list = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.delete or self.set)
+
+    def operations(self):
+        """
+        Get the diff as a list of (op, path) tuples, deletes first, ready for VyDevice.configure_batch.
+
+        Returns:
+            list: The (op, path) tuples.
+        """
+        return [('delete', p) for p in self.delete] + [('set', p) for p in self.set]
+
+
+def flatten_config(config, prefix=()):
+    """
+    Flatten a showConfig-style nested dict into full configuration paths.
+
+    Every leaf value becomes the last element of its path, and valueless nodes (empty dicts) end the path, so
+    the result matches the paths accepted by configure_set.
+
+    Args:
+        config (dict): A showConfig-style nested dict.
+        prefix (tuple, optional): Path elements prepended to every path (default is empty).
+
+    Returns:
+        list: The paths, as tuples, in configuration order.
+    """
+    paths = []
+    stack = [(tuple(prefix), config)]
+    while stack:
+        path, node = stack.pop()
+        if isinstance(node, dict) and node:
+            stack.extend((path + (name,), child) for name, child in reversed(list(node.items())))
+        elif isinstance(node, dict):
+            if path:
+                paths.append(path)
+        elif isinstance(node, list):
+            paths.extend(path + (value,) for value in node)
+        else:
+            paths.append(path + (node,))
+    return paths
+
+
+def config_diff(desired, current):
+    """
+    Compute the minimal configure operations that turn the current configuration into the desired one.
+
+    Deletes are collapsed to the highest node that has nothing left in the desired configuration. A leaf value
+    that is no longer desired is deleted by its full path, whether the leaf holds a list or a single string:
+    showConfig returns a multi-value node holding one value as a plain string, so a set alone could add a
+    second value next to the old one. The diff is computed in time linear in
+    the size of both configurations.
+
+    Args:
+        desired (dict or list): The desired configuration, as a showConfig-style nested dict or as a list of
+            configure_set paths.
+        current (dict): The current configuration, as returned by retrieve_show_config.
+
+    Returns:
+        ConfigDiff: The paths to delete and to set.
+    """
+    if isinstance(desired, dict):
+        desired_paths = flatten_config(desired)
+    else:
+        desired_paths = [tuple(p) for p in desired]
+
+    current_paths = set(flatten_config(current or {}))
+    desired_set = set(desired_paths)
+
+    # Every node that still has something below it in the desired configuration
+    desired_nodes = set()
+    for path in desired_paths:
+        for depth in range(len(path) - 1, 0, -1):
+            if path[:depth] in desired_nodes:
+                break
+            desired_nodes.add(path[:depth])
+
+    diff = ConfigDiff()
+
+    stack = [((), current or {})]
+    while stack:
+        path, node = stack.pop()
+        if path and path not in desired_nodes and path not in desired_set:
+            diff.delete.append(list(path))
+        elif isinstance(node, dict):
+            stack.extend((path + (name,), child) for name, child in reversed(list(node.items())))
+        else:
+            values = node if isinstance(node, list) else [node]
+            diff.delete.extend(list(path + (value,)) for value in values if path + (value,) not in desired_set)
+
+    diff.set = [list(p) for p in desired_paths if p not in current_paths]
+    return diff
@@ -0,0 +1,168 @@
+_VALUE = object()
+
+
+class ConfigTree:
+    """
+    A queryable local copy of a VyOS configuration.
+
+    The tree is built once from a showConfig result (nested dicts, as returned by retrieve_show_config) and
+    indexes every node and value by its path, so lookups do not need another request to the device. Paths are
+    relative to the path the configuration was retrieved from; retrieving with path=[] gives full paths.
+
+    Leaf values are part of the index the same way VyOS treats them, so
+    exists(["interfaces", "ethernet", "eth0", "address", "192.0.2.1/24"]) is True when that address is set.
+
+    Args:
+        config (dict): A showConfig result.
+
+    Attributes:
+        config (dict): The showConfig result the tree was built from.
+
+    Methods:
+        from_response(response): Build a ConfigTree from a successful retrieve_show_config ApiResponse.
+        exists(path): Check whether a node or value exists.
+        get(path, default=None): Get the showConfig subtree or leaf value at a path.
+        return_value(path, default=None): Get the single value of a leaf node.
+        return_values(path): Get the values of a leaf node as a list.
+        list_nodes(path): List the child node names of a node.
+        iter_prefix(prefix=[]): Iterate over the leaf values below a path.
+    """
+
+    def __init__(self, config):
+        self.config = config if config is not None else {}
+        self._index = {(): self.config}
+
+        stack = [((), self.config)]
+        while stack:
+            path, node = stack.pop()
+            if isinstance(node, dict):
+                for name, child in node.items():
+                    child_path = path + (name,)
+                    self._index[child_path] = child
+                    stack.append((child_path, child))
+            elif isinstance(node, list):
+                for value in node:
+                    self._index[path + (value,)] = _VALUE
+            else:
+                self._index[path + (node,)] = _VALUE
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Build a ConfigTree from a retrieve_show_config response.
+
+        Args:
+            response (ApiResponse): A successful showConfig response.
+
+        Returns:
+            ConfigTree: The tree built from the response result.
+        """
+        if response.error:
+            raise ValueError(f"cannot build a ConfigTree from a failed response: {response.error}")
+        return cls(response.result)
+
+    def __contains__(self, path):
+        return self.exists(path)
+
+    def __len__(self):
+        return len(self._index) - 1
+
+    def exists(self, path):
+        """
+        Check whether a node or value exists.
+
+        Args:
+            path (list): The path elements, optionally ending with a value.
+
+        Returns:
+            bool: True if the path exists in the configuration.
+        """
+        return tuple(path) in self._index
+
+    def get(self, path, default=None):
+        """
+        Get the showConfig subtree or leaf value at a path.
+
+        Args:
+            path (list): The path elements of a node.
+            default (optional): The value returned when the node does not exist (default is None).
+
+        Returns:
+            The subtree dict, the leaf value(s), or default.
+        """
+        node = self._index.get(tuple(path), _VALUE)
+        return default if node is _VALUE else node
+
+    def return_value(self, path, default=None):
+        """
+        Get the single value of a leaf node.
+
+        Args:
+            path (list): The path elements of the leaf node.
+            default (optional): The value returned when the leaf has no value (default is None).
+
+        Returns:
+            str: The first value of the leaf node, or default.
+        """
+        values = self.return_values(path)
+        return values[0] if values else default
+
+    def return_values(self, path):
+        """
+        Get the values of a leaf node as a list, like the API returnValues operation.
+
+        Args:
+            path (list): The path elements of the leaf node.
+
+        Returns:
+            list: The values of the leaf node; empty if the path does not exist or is not a leaf node.
+        """
+        node = self._index.get(tuple(path))
+        if isinstance(node, list):
+            return list(node)
+        if isinstance(node, str):
+            return [node]
+        return []
+
+    def list_nodes(self, path):
+        """
+        List the child node names of a node.
+
+        Args:
+            path (list): The path elements of the node.
+
+        Returns:
+            list: The child node names; empty if the path does not exist or is a leaf node.
+        """
+        node = self._index.get(tuple(path))
+        return list(node) if isinstance(node, dict) else []
+
+    def iter_prefix(self, prefix=[]):
+        """
+        Iterate over the leaf values below a path, in configuration order.
+
+        Valueless leaf nodes (such as 'disable') are yielded with an empty list.
+
+        Args:
+            prefix (list, optional): The path elements to start from (default is the whole tree).
+
+        Yields:
+            tuple: (path, values) pairs, where path is a tuple of path elements and values is a list.
+        """
+        prefix = tuple(prefix)
+        node = self._index.get(prefix)
+        if node is None or node is _VALUE:
+            return
+
+        stack = [(prefix, node)]
+        while stack:
+            path, node = stack.pop()
+            if isinstance(node, dict) and node:
+                stack.extend((path + (name,), child) for name, child in reversed(list(node.items())))
+            elif isinstance(node, dict):
+                if path:
+                    yield path, []
+            elif isinstance(node, list):
+                yield path, list(node)
+            else:
+                yield path, [node]
@@ -1,24 +1,139 @@
-import urllib3
-import requests
-import json
-import pprint
-from dataclasses import dataclass
+import threading
+import time
+
+from . import json_backend
+from .cache import ResponseCache
+from .config_tree import ConfigTree
+from .config_diff import config_diff
+from .transaction import Transaction
+from .bulk import BulkPusher
+from .retry import RetryPolicy, get_circuit_breaker
+from .transport import get_transport, new_session, send_with_session
+from .stream import ShowStream
+from .singleflight import Singleflight
+from .limiter import get_limiter
+from .template import RenderedConfig
 
-@dataclass
 class ApiResponse:
     """
     Represents an API response.
 
+    Responses read from the device keep the raw body and decode it on first access of result or error, so callers
+    that only check the status, or forward the body elsewhere, never pay for JSON parsing. The raw body is
+    released once decoded.
+
+    Args:
+        status (int): The HTTP status code of the response.
+        request (dict): The request payload sent to the API.
+        result (dict): The data result of the API response.
+        error (str): Any error message in case of a failed response.
+        timing (RequestTiming, optional): Timing and size information of the request (default is None).
+
     Attributes:
         status (int): The HTTP status code of the response.
         request (dict): The request payload sent to the API.
         result (dict): The data result of the API response.
         error (str): Any error message in case of a failed response.
+        timing (RequestTiming): Timing and size information of the request, None if no request was sent.
+        raw (bytes): The undecoded response body, None once decoded or when built from a result.
+
+    Methods:
+        from_content(status, request, content, timing=None): Build a response decoded lazily from a raw body.
+        copy(): Get a shallow copy of the response.
     """
-    status: int
-    request: dict
-    result: dict
-    error: str
+
+    __slots__ = ('status', 'request', 'timing', 'raw', '_result', '_error')
+
+    def __init__(self, status, request, result, error, timing=None):
+        self.status = status
+        self.request = request
+        self.timing = timing
+        self.raw = None
+        self._result = result
+        self._error = error
+
+    @classmethod
+    def from_content(cls, status, request, content, timing=None):
+        """
+        Build a response decoded lazily from a raw body.
+
+        Args:
+            status (int): The HTTP status code of the response.
+            request (dict): The request payload sent to the API.
+            content (bytes): The raw response body.
+            timing (RequestTiming, optional): Timing and size information of the request (default is None).
+
+        Returns:
+            ApiResponse: The response; bodies of non-200 responses are never decoded.
+        """
+        if status != 200:
+            return cls(status, request, {}, 'http error', timing)
+
+        response = cls(status, request, None, None, timing)
+        response.raw = content
+        return response
+
+    def copy(self):
+        """
+        Get a shallow copy of the response.
+
+        Returns:
+            ApiResponse: A new response sharing the request, result and timing of this one.
+        """
+        response = ApiResponse(self.status, self.request, self._result, self._error, self.timing)
+        response.raw = self.raw
+        return response
+
+    def _decode(self):
+        # raw is cleared last, so a concurrent reader that sees it gone also sees the decoded fields
+        content = self.raw
+        if content is None:
+            return
+
+        try:
+            decoded = json_backend.loads(content)
+        except ValueError:
+            self._result, self._error = {}, 'json decode error'
+        else:
+            if decoded['success'] == True:
+                self._result, self._error = decoded['data'], False
+            else:
+                self._result, self._error = {}, decoded['error']
+        self.raw = None
+
+    @property
+    def result(self):
+        if self.raw is not None:
+            self._decode()
+        return self._result
+
+    @result.setter
+    def result(self, value):
+        if self.raw is not None:
+            self._decode()
+        self._result = value
+
+    @property
+    def error(self):
+        if self.raw is not None:
+            self._decode()
+        return self._error
+
+    @error.setter
+    def error(self, value):
+        if self.raw is not None:
+            self._decode()
+        self._error = value
+
+    def __eq__(self, other):
+        if not isinstance(other, ApiResponse):
+            return NotImplemented
+        return ((self.status, self.request, self.result, self.error, self.timing) ==
+                (other.status, other.request, other.result, other.error, other.timing))
+
+    def __repr__(self):
+        return (f'ApiResponse(status={self.status!r}, request={self.request!r}, result={self.result!r}, '
+                f'error={self.error!r}, timing={self.timing!r})')
 
 class VyDevice:
     """
@@ -31,6 +146,23 @@ class VyDevice:
         port (int, optional): The port to use (default is 443).
         verify (bool, optional): Whether to verify SSL certificates (default is True).
         timeout (int, optional): The request timeout in seconds (default is 10).
+        pool_maxsize (int, optional): The maximum number of pooled connections kept to the device (default is 10).
+        keepalive (bool, optional): Whether to keep connections open between requests (default is True).
+        idle_timeout (float, optional): Seconds a pooled connection may stay idle before it is discarded
+            instead of reused (default is 60, None disables idle eviction).
+        cache (ResponseCache or bool, optional): A cache for the results of retrieve requests; True creates a
+            default ResponseCache (default is None, no caching).
+        retry (RetryPolicy or bool, optional): The policy for retrying failed requests; True creates a default
+            RetryPolicy (default is None, no retries).
+        circuit_breaker (CircuitBreaker or bool, optional): A circuit breaker failing requests fast while the device
+            is unhealthy; True uses the breaker shared by all devices with the same hostname (default is None).
+        hooks (dict, optional): Callbacks per event, see register_hook (default is None).
+        singleflight (Singleflight or bool, optional): Coalesces identical read-only requests made concurrently into
+            one API call; True creates a default Singleflight (default is None).
+        limiter (HostLimiter or bool, optional): Paces requests with a rate limit and an adaptive concurrency
+            limit; True uses the limiter shared by all devices with the same hostname (default is None).
+        transport (Transport or str, optional): The transport sending the HTTP requests, a Transport or the name of
+            one: 'requests', 'urllib3' or 'http2' (default is None, the pooled requests session).
 
     Attributes:
         hostname (str): The hostname or IP address of the VyOS device.
@@ -39,29 +171,62 @@ class VyDevice:
         port (int): The port used for communication.
         verify (bool): Whether SSL certificate verification is enabled.
         timeout (int): The request timeout in seconds.
+        pool_maxsize (int): The maximum number of pooled connections kept to the device.
+        keepalive (bool): Whether connections are kept open between requests.
+        idle_timeout (float): Seconds a pooled connection may stay idle before it is discarded.
+        cache (ResponseCache): The cache for retrieve results, or None when caching is disabled.
+        retry (RetryPolicy): The retry policy, or None when failed requests are not retried.
+        circuit_breaker (CircuitBreaker): The circuit breaker, or None when disabled.
+        hooks (dict): The registered callbacks per event.
+        singleflight (Singleflight): The request coalescer, or None when disabled.
+        limiter (HostLimiter): The request limiter, or None when disabled.
+        transport (Transport): The transport sending the HTTP requests, or None for the pooled requests session.
 
     Methods:
+        close(): Close the pooled connections held by the device.
+        register_hook(event, callback): Register a callback for request start or end events.
+        _get_session(): Get the pooled HTTP session used for API requests.
         _get_url(command): Get the full URL for a given API command.
-        _get_payload(op, path=[], file=None, url=None, name=None): Generate the API request payload.
-        _api_request(command, op, path=[], method='POST', file=None, url=None, name=None): Make an API request.
+        _get_payload(op, path=[], file=None, url=None, name=None, confirm_time=None): Generate the API request payload.
+        _cache_lookup(command, op, path, payload): Answer a request from the cache.
+        _cache_update(command, op, path, response, generation): Store or invalidate cached results after a request.
+        _record_outcome(status): Report the outcome of a request to the circuit breaker.
+        _latency_kind(command, op, path): Get the kind of a request for the latency baselines of the limiter.
+        _run_hooks(event, *args): Call the callbacks registered for an event.
+        _send_request(api_url, payload): Send a single HTTP request.
+        _perform_request(command, op, path, api_url, payload, generation): Send a request with retries and hooks.
+        _api_request(command, op, path=[], method='POST', file=None, url=None, name=None, confirm_time=None): Make an API request.
         retrieve_show_config(path=[]): Retrieve and show the device configuration.
         retrieve_return_values(path=[]): Retrieve and return specific configuration values.
+        retrieve_exists(path=[]): Check whether a configuration path exists.
+        retrieve_config_tree(path=[]): Retrieve the device configuration as a queryable ConfigTree.
+        snapshot(store, name=None): Retrieve the full configuration and add it to a SnapshotStore.
         reset(path=[]): Reset a specific configuration element.
         image_add(url=None, file=None, path=[]): Add an image from a URL or file.
         image_delete(name, url=None, file=None, path=[]): Delete a specific image.
         show(path=[]): Show configuration information.
+        show_stream(path=[], parser=None, chunk_size=65536): Stream the output of a show command line by line or as parsed records.
         generate(path=[]): Generate configuration based on specified path.
-        configure_set(path=[]): Sets configuration based on the specified path. This method is versatile, accepting 
+        configure_set(path=[], confirm_time=None): Sets configuration based on the specified path. This method is versatile, accepting 
         either a single configuration path or a list of configuration paths. This flexibility 
         allows for setting both individual and multiple configurations in a single operation.
-        configure_delete(path=[]): Delete configuration based on specified path.
+        configure_delete(path=[], confirm_time=None): Delete configuration based on specified path.
+        configure_batch(operations, confirm_time=None): Apply mixed set and delete operations in a single commit.
+        configure_confirm(): Confirm a commit made with a confirm_time.
+        configure_sync(desired, path=[], current=None): Bring the configuration to a desired state with a minimal commit.
+        configure_bulk(path, op='set', **kwargs): Push a very large list of paths in adaptive chunks.
+        transaction(max_operations=None): Buffer set and delete operations and apply them in a single commit.
         config_file_save(file=None): Save the configuration to a file.
         config_file_load(file=None): Load the configuration from a file.
         reboot(path=["now"]): Reboot the device.
         poweroff(path=["now"]): Power off the device.
     """
+    # The transport name that means the built-in client
+    _default_transport = 'requests'
 
-    def __init__(self, hostname, apikey, protocol='https', port=443, verify=True, timeout=10):
+    def __init__(self, hostname, apikey, protocol='https', port=443, verify=True, timeout=10,
+                 pool_maxsize=10, keepalive=True, idle_timeout=60, cache=None, retry=None, circuit_breaker=None,
+                 hooks=None, singleflight=None, limiter=None, transport=None):
         """
         Initializes a VyDevice instance.
 
@@ -72,6 +237,24 @@ class VyDevice:
             port (int, optional): The port to use (default is 443).
             verify (bool, optional): Whether to verify SSL certificates (default is True).
             timeout (int, optional): The request timeout in seconds (default is 10).
+            pool_maxsize (int, optional): The maximum number of pooled connections kept to the device (default is 10).
+            keepalive (bool, optional): Whether to keep connections open between requests (default is True).
+            idle_timeout (float, optional): Seconds a pooled connection may stay idle before it is discarded
+                instead of reused (default is 60, None disables idle eviction).
+            cache (ResponseCache or bool, optional): A cache for the results of retrieve requests; True creates a
+                default ResponseCache (default is None, no caching).
+            retry (RetryPolicy or bool, optional): The policy for retrying failed requests; True creates a default
+                RetryPolicy (default is None, no retries).
+            circuit_breaker (CircuitBreaker or bool, optional): A circuit breaker failing requests fast while the
+                device is unhealthy; True uses the breaker shared by all devices with the same hostname
+                (default is None).
+            hooks (dict, optional): Callbacks per event, see register_hook (default is None).
+            singleflight (Singleflight or bool, optional): Coalesces identical read-only requests made concurrently
+                into one API call; True creates a default Singleflight (default is None).
+            limiter (HostLimiter or bool, optional): Paces requests with a rate limit and an adaptive concurrency
+                limit; True uses the limiter shared by all devices with the same hostname (default is None).
+            transport (Transport or str, optional): The transport sending the HTTP requests, a Transport or the
+                name of one: 'requests', 'urllib3' or 'http2' (default is None, the pooled requests session).
         """
         self.hostname = hostname
         self.apikey = apikey
@@ -79,6 +262,99 @@ class VyDevice:
         self.port = port
         self.verify = verify
         self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self.cache = ResponseCache() if cache is True else cache or None
+        self.retry = RetryPolicy() if retry is True else retry or None
+        self.circuit_breaker = get_circuit_breaker(hostname) if circuit_breaker is True else circuit_breaker or None
+        self.singleflight = Singleflight() if singleflight is True else singleflight or None
+        self.limiter = get_limiter(hostname) if limiter is True else limiter or None
+        if transport is None or transport == self._default_transport:
+            self.transport = None
+        else:
+            self.transport = get_transport(transport, pool_maxsize=pool_maxsize, keepalive=keepalive,
+                                           idle_timeout=idle_timeout)
+
+        self.hooks = {'request_start': [], 'request_end': []}
+        for event, callbacks in (hooks or {}).items():
+            for callback in (callbacks if isinstance(callbacks, (list, tuple)) else [callbacks]):
+                self.register_hook(event, callback)
+
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._last_used = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close the pooled connections held by the device.
+
+        The device stays usable after close(); the next request opens a new connection.
+        """
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+        if self.transport is not None:
+            self.transport.close()
+
+    def register_hook(self, event, callback):
+        """
+        Register a callback for request start or end events.
+
+        Hooks run around every request sent to the device; requests answered from the cache send none.
+
+        - 'request_start': called as callback(device, command, op, path) before the request is sent.
+        - 'request_end': called as callback(device, command, op, path, response) with the final ApiResponse,
+          after retries.
+
+        Args:
+            event (str): 'request_start' or 'request_end'.
+            callback (callable): The function to call.
+        """
+        if event not in self.hooks:
+            raise ValueError(f"unknown hook event '{event}', expected one of {', '.join(self.hooks)}")
+        self.hooks[event].append(callback)
+
+    def _run_hooks(self, event, *args):
+        """
+        Call the callbacks registered for an event.
+
+        Args:
+            event (str): The event name.
+            *args: The arguments passed to each callback after the device.
+        """
+        for callback in self.hooks[event]:
+            callback(self, *args)
+
+    def _get_session(self):
+        """
+        Get the pooled HTTP session used for API requests.
+
+        The session sends the requests unless another transport was given, and always carries the show_stream
+        requests. It is created on first use. Connections that stayed idle for longer than idle_timeout
+        are dropped first, since the device has most likely closed them on its side already.
+
+        Returns:
+            requests.Session: The session bound to this device.
+        """
+        with self._session_lock:
+            now = time.monotonic()
+
+            if self._session is None:
+                self._session = new_session(self.pool_maxsize, self.keepalive)
+            elif self.idle_timeout is not None and now - self._last_used > self.idle_timeout:
+                self._session.close()
+
+            self._last_used = now
+            return self._session
 
     def _get_url(self, command):
         """
@@ -92,24 +368,38 @@ class VyDevice:
         """
         return f"{self.protocol}://{self.hostname}:{self.port}/{command}"
 
-    def _get_payload(self, op, path=[], file=None, url=None, name=None):
+    def _get_payload(self, op, path=[], file=None, url=None, name=None, confirm_time=None):
         """
         Generate the payload for an API request.
 
         Args:
-            op (str): The operation to perform in the API request.
+            op (str or list): The operation to perform in the API request. With multiple configuration paths this
+                                can also be a list holding the operation of each path.
             path (list, optional): The path elements for the API request. This can be a single list for a single
-                                configuration path or a list of lists for multiple configuration paths.
+                                configuration path, a list of lists for multiple configuration paths, or a
+                                RenderedConfig.
             file (str, optional): The file to include in the request (default is None).
             url (str, optional): The URL to include in the request (default is None).
             name (str, optional): The name to include in the request (default is None).
+            confirm_time (int, optional): Minutes after which a configure commit is rolled back unless confirmed;
+                the operations are then sent as the commands of a commit-confirm request (default is None).
 
         Returns:
             dict: The payload for the API request.
         """
+        if isinstance(path, RenderedConfig):
+            # Joined from the fragments the template encoded once, the paths themselves are not built
+            data = path.encode(op)
+            if confirm_time:
+                data = '{"commands":' + data + ',"confirm_time":' + str(int(confirm_time)) + '}'
+            return {'data': data, 'key': self.apikey}
+
         # Adjusting the data structure based on whether path is single or multiple
-        if isinstance(path[0], list):  # Handling multiple paths
-            data = [{'op': op, 'path': p} for p in path]
+        if path and isinstance(path[0], list):  # Handling multiple paths
+            if isinstance(op, list):  # One operation per path
+                data = [{'op': o, 'path': p} for o, p in zip(op, path)]
+            else:
+                data = [{'op': op, 'path': p} for p in path]
         else:  # Handling a single path
             data = {'op': op, 'path': path}
 
@@ -134,16 +424,130 @@ class VyDevice:
                     d['name'] = name
             else:
                 data['name'] = name
-                
+
+        if confirm_time:
+            data = {'commands': data if isinstance(data, list) else [data], 'confirm_time': int(confirm_time)}
+
         payload = {
-            'data': json.dumps(data),
+            'data': json_backend.dumps(data),
             'key': self.apikey
         }
 
         return payload
 
 
-    def _api_request(self, command, op, path=[], method='POST', file=None, url=None, name=None):
+    def _cache_lookup(self, command, op, path, payload):
+        """
+        Answer a request from the cache.
+
+        Args:
+            command (str): The API command of the request.
+            op (str): The operation of the request.
+            path (list): The path elements of the request.
+            payload (dict): The payload built for the request.
+
+        Returns:
+            tuple: The cached ApiResponse or None, and the cache generation to pass to _cache_update, or None
+            when the request is not cacheable.
+        """
+        if (self.cache is None or command != 'retrieve' or isinstance(path, RenderedConfig)
+                or (path and isinstance(path[0], list))):
+            return None, None
+
+        generation = self.cache.generation
+        found, result = self.cache.get(op, path)
+        if not found:
+            return None, generation
+
+        del(payload['key'])
+        return ApiResponse(status=200, request=payload, result=result, error=False), generation
+
+    def _cache_update(self, command, op, path, response, generation):
+        """
+        Store or invalidate cached results after a request.
+
+        Args:
+            command (str): The API command of the request.
+            op (str): The operation of the request.
+            path (list): The path elements of the request.
+            response (ApiResponse): The response of the request.
+            generation (int): The generation returned by _cache_lookup.
+        """
+        if self.cache is None:
+            return
+
+        if command == 'retrieve':
+            if generation is not None and not response.error:
+                self.cache.put(op, path, response.result, generation)
+        elif command == 'configure':
+            if isinstance(path, RenderedConfig):
+                # Invalidating the top-level sections spares building the rendered paths
+                changed_paths = [[root] for root in path.roots()]
+            elif path and isinstance(path[0], list):
+                changed_paths = path
+            else:
+                changed_paths = [path]
+            for changed in changed_paths:
+                self.cache.invalidate(changed)
+        elif (command, op) in (('config-file', 'load'), ('reset', 'reset')):
+            self.cache.clear()
+
+    def _record_outcome(self, status):
+        """
+        Report the outcome of a request to the circuit breaker.
+
+        Transport failures (status 0) and server errors count as failures; API errors such as an invalid path
+        mean the device is healthy and count as successes.
+
+        Args:
+            status (int): The HTTP status of the request, 0 for transport failures.
+        """
+        if self.circuit_breaker is None:
+            return
+
+        if status == 0 or status >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    @staticmethod
+    def _latency_kind(command, op, path):
+        """
+        Get the kind of a request for the latency baselines of the limiter.
+
+        The size of a response depends on the command and on the configuration section it covers, so a retrieve
+        of the whole configuration is not compared with a retrieve of one section, nor with a show command.
+
+        Args:
+            command (str): The API command of the request.
+            op (str): The operation of the request.
+            path (list): The path elements of the request.
+
+        Returns:
+            tuple: The command, the operation and the top-level section of the path, None for other paths.
+        """
+        section = path[0] if isinstance(path, list) and path and isinstance(path[0], str) else None
+        return command, op, section
+
+    def _send_request(self, api_url, payload):
+        """
+        Send a single HTTP request.
+
+        Args:
+            api_url (str): The URL of the API command.
+            payload (dict): The payload for the request.
+
+        Returns:
+            tuple: The (status, content, error, timing) of the request; content is the raw response body, or None
+            with status 0 and timing None for transport failures.
+        """
+        if self.transport is not None:
+            return self.transport.send(api_url, payload, self.timeout, self.verify)
+
+        return send_with_session(self._get_session(), api_url, payload, self.timeout, self.verify)
+
+    def _api_request(self, command, op, path=[], method='POST', file=None, url=None, name=None,
+                    confirm_time=None):
         """
         Make an API request.
 
@@ -155,44 +559,81 @@ class VyDevice:
             file (str, optional): The file to include in the request (default is None).
             url (str, optional): The URL to include in the request (default is None).
             name (str, optional): The name to include in the request (default is None).
+            confirm_time (int, optional): Minutes after which a configure commit is rolled back unless confirmed
+                (default is None, a plain commit).
 
         Returns:
             ApiResponse: An ApiResponse object representing the API response.
         """
-        url = self._get_url(command)
-        payload = self._get_payload(op, path=path, file=file, url=url, name=name)
-        
-        headers = {}
-        error = False      
-        result = {}
+        api_url = self._get_url(command)
+        payload = self._get_payload(op, path=path, file=file, url=url, name=name, confirm_time=confirm_time)
 
-        try:
-            resp = requests.post(url, verify=self.verify, data=payload, timeout=self.timeout, headers=headers)
-
-            if resp.status_code == 200:
-                try:
-                    resp_decoded = resp.json()
-                    
-                    if resp_decoded['success'] == True:
-                        result = resp_decoded['data']
-                        error = False
-                    else:   
-                        error = resp_decoded['error']
-                   
-                except json.JSONDecodeError:
-                    error = 'json decode error'
-            else:
-                error = 'http error'
+        cached, generation = self._cache_lookup(command, op, path, payload)
+        if cached is not None:
+            return cached
+
+        if self.singleflight is None or command not in self.singleflight.commands:
+            return self._perform_request(command, op, path, api_url, payload, generation)
+
+        def perform():
+            response = self._perform_request(command, op, path, api_url, payload, generation)
+            # Decoded once here, the callers sharing this call get copies with the same result
+            response.error
+            return response
+
+        response, _ = self.singleflight.do((api_url, payload['data']), perform)
+        return response.copy()
 
-            status = resp.status_code
+    def _perform_request(self, command, op, path, api_url, payload, generation):
+        """
+        Send a request with retries, circuit breaking, caching and hooks.
+
+        Args:
+            command (str): The API command to execute.
+            op (str): The operation to perform in the API request.
+            path (list): The path elements for the API request.
+            api_url (str): The URL of the API command.
+            payload (dict): The payload for the request.
+            generation (int): The cache generation returned by _cache_lookup.
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        self._run_hooks('request_start', command, op, path)
 
-        except requests.exceptions.ConnectionError as e:
-            error = 'connection error: ' + str(e)
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+                status, content, error, timing = 0, None, f'circuit open: {self.hostname} is failing, request not sent', None
+                break
+
+            token = self.limiter.acquire() if self.limiter is not None else None
             status = 0
-  
+            try:
+                status, content, error, timing = self._send_request(api_url, payload)
+            except BaseException:
+                # An escaping error must still settle a half-open trial, or the breaker never closes again
+                self._record_outcome(0)
+                raise
+            finally:
+                if token is not None:
+                    self.limiter.release(token, status, kind=self._latency_kind(command, op, path))
+            self._record_outcome(status)
+
+            if self.retry is None or not self.retry.should_retry(command, attempt, status):
+                break
+            time.sleep(self.retry.delay(attempt))
+
         # Removing apikey from payload for security reasons
         del(payload['key'])
-        return ApiResponse(status=status, request=payload, result=result, error=error)
+        if content is None:
+            response = ApiResponse(status=status, request=payload, result={}, error=error, timing=timing)
+        else:
+            response = ApiResponse.from_content(status, payload, content, timing)
+        self._cache_update(command, op, path, response, generation)
+        self._run_hooks('request_end', command, op, path, response)
+        return response
 
     def retrieve_show_config(self, path=[]):
         """
@@ -218,6 +659,51 @@ class VyDevice:
         """
         return self._api_request(command="retrieve", op='returnValues', path=path, method="POST")
 
+    def retrieve_exists(self, path=[]):
+        """
+        Check whether a configuration path exists.
+
+        Args:
+            path (list, optional): The path elements to check (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object whose result is True or False.
+        """
+        return self._api_request(command="retrieve", op='exists', path=path, method="POST")
+
+    def retrieve_config_tree(self, path=[]):
+        """
+        Retrieve the device configuration as a queryable ConfigTree.
+
+        The configuration is fetched with a single showConfig request; further lookups on the tree are local.
+
+        Args:
+            path (list, optional): The path elements for the configuration retrieval (default is an empty list).
+
+        Returns:
+            ApiResponse: An ApiResponse object whose result is a ConfigTree on success.
+        """
+        response = self.retrieve_show_config(path=path)
+        if not response.error:
+            response.result = ConfigTree(response.result)
+        return response
+
+    def snapshot(self, store, name=None):
+        """
+        Retrieve the full device configuration and store it as a snapshot.
+
+        Args:
+            store (SnapshotStore): The store to add the snapshot to.
+            name (str, optional): The name to store the snapshot under (default is the device hostname).
+
+        Returns:
+            ApiResponse: An ApiResponse object whose result is the stored Snapshot on success.
+        """
+        response = self.retrieve_show_config(path=[])
+        if not response.error:
+            response.result = store.put(name or self.hostname, response.result)
+        return response
+
     def reset(self, path=[]):
         """
         Reset a specific configuration element.
@@ -271,6 +757,27 @@ class VyDevice:
         """
         return self._api_request(command="show", op='show', path=path, method="POST")
 
+    def show_stream(self, path=[], parser=None, chunk_size=64 * 1024):
+        """
+        Show operational information, streaming the output while it is read.
+
+        Unlike show(), the output is never held in memory as a whole, which suits commands such as
+        show ip route on routers carrying a full table.
+
+        Args:
+            path (list, optional): The path elements of the show command (default is an empty list).
+            parser (str or object, optional): 'routes', 'interfaces', 'arp' or 'neighbors' to yield parsed records,
+                or a parser object with feed(line) and flush() methods; None yields the output lines (default is None).
+            chunk_size (int, optional): The number of bytes read at a time (default is 64 KiB).
+
+        Returns:
+            ShowStream: An iterable over the lines or records; its status and error are set once iteration ends.
+        """
+        payload = self._get_payload('show', path=path)
+        # Removing apikey from payload for security reasons, the stream adds it when sending
+        del(payload['key'])
+        return ShowStream(self, path, payload, parser=parser, chunk_size=chunk_size)
+
     def generate(self, path=[]):
         """
         Generate configuration based on the given path.
@@ -283,30 +790,125 @@ class VyDevice:
         """
         return self._api_request(command="generate", op='generate', path=path, method="POST")
 
-    def configure_set(self, path=[]):
+    def configure_set(self, path=[], confirm_time=None):
         """
         Set configuration based on the given path.
 
         Args:
             path (list, optional): The path elements for configuration setting (default is an empty list).
+            confirm_time (int, optional): Minutes after which the commit is rolled back unless confirmed with
+                configure_confirm (default is None, a plain commit).
 
         Returns:
             ApiResponse: An ApiResponse object representing the API response.
         """
-        return self._api_request(command="configure", op='set', path=path, method="POST")
+        return self._api_request(command="configure", op='set', path=path, method="POST", confirm_time=confirm_time)
 
 
-    def configure_delete(self, path=[]):
+    def configure_delete(self, path=[], confirm_time=None):
         """
         Delete configuration based on the given path.
 
         Args:
             path (list, optional): The path elements for configuration deletion (default is an empty list).
+            confirm_time (int, optional): Minutes after which the commit is rolled back unless confirmed with
+                configure_confirm (default is None, a plain commit).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response.
+        """
+        return self._api_request(command="configure", op='delete', path=path, method="POST", confirm_time=confirm_time)
+
+    def configure_batch(self, operations, confirm_time=None):
+        """
+        Apply mixed set and delete operations in a single configure request, and so a single commit.
+
+        Args:
+            operations (list): (op, path) tuples, where op is 'set' or 'delete', applied in order.
+            confirm_time (int, optional): Minutes after which the commit is rolled back unless confirmed with
+                configure_confirm (default is None, a plain commit).
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response, or None if there was nothing to send.
+        """
+        if not operations:
+            return None
+
+        ops = [op for op, _ in operations]
+        paths = [list(path) for _, path in operations]
+        return self._api_request(command="configure", op=ops, path=paths, method="POST", confirm_time=confirm_time)
+
+    def configure_confirm(self):
+        """
+        Confirm a commit made with a confirm_time, so that it is not rolled back.
 
         Returns:
             ApiResponse: An ApiResponse object representing the API response.
         """
-        return self._api_request(command="configure", op='delete', path=path, method="POST")
+        return self._api_request(command="configure", op='confirm', method="POST")
+
+    def configure_sync(self, desired, path=[], current=None):
+        """
+        Bring the configuration under a path to a desired state with the minimal set of changes.
+
+        The current configuration is compared with the desired one by config_diff and the resulting deletes and
+        sets are sent as a single configure request.
+
+        Args:
+            desired (dict or list): The desired configuration under path, as a showConfig-style nested dict or
+                a list of configure_set paths relative to path.
+            path (list, optional): The path elements of the subtree to synchronize (default is the whole configuration).
+            current (dict, optional): The current configuration under path; fetched with retrieve_show_config if
+                not given.
+
+        Returns:
+            ApiResponse: An ApiResponse object representing the API response, or None if the configuration
+            already matches. If the current configuration could not be retrieved, its failed response is returned.
+        """
+        if current is None:
+            response = self.retrieve_show_config(path=path)
+            if response.error:
+                return response
+            current = response.result
+
+        diff = config_diff(desired, current)
+        return self.configure_batch([(op, list(path) + p) for op, p in diff.operations()])
+
+    def configure_bulk(self, path, op='set', **kwargs):
+        """
+        Push a very large list of configuration paths in adaptively sized chunks.
+
+        Unlike configure_set with a list of paths, the change is split into several commits. Chunks the device
+        rejects are bisected until the failing paths are isolated, and the outcome is reported per path.
+
+        Args:
+            path (list): The list of configuration paths.
+            op (str, optional): The operation applied to every path, 'set' or 'delete' (default is 'set').
+            **kwargs: Chunking options passed to BulkPusher (initial_bytes, min_bytes, max_bytes,
+                target_latency, max_in_flight).
+
+        Returns:
+            BulkResult: The outcome of every path.
+        """
+        return BulkPusher(self, **kwargs).push([(op, p) for p in path])
+
+    def transaction(self, max_operations=None):
+        """
+        Buffer set and delete operations and apply them in a single commit.
+
+        Example:
+            with device.transaction() as tx:
+                tx.delete(["interfaces", "dummy", "dum1"])
+                tx.set(["interfaces", "dummy", "dum2", "address", "192.168.140.1/24"])
+
+        Args:
+            max_operations (int, optional): Flush automatically once this many operations are buffered
+                (default is None, flush only when the with block exits).
+
+        Returns:
+            Transaction: The transaction, to be used as a context manager.
+        """
+        return Transaction(self, max_operations=max_operations)
 
     def config_file_save(self, file=None):
         """
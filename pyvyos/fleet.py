@@ -0,0 +1,199 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Any
+
+from .device import VyDevice
+
+# Seconds between checks for queued devices picked up by a worker, when a timeout is set
+_QUEUE_POLL = 0.05
+
+
+@dataclass
+class FleetResult:
+    """
+    Represents the outcome of one operation on one device of a fleet.
+
+    Attributes:
+        hostname (str): The hostname of the device the operation ran on.
+        response (Any): The value returned by the device method, usually an ApiResponse.
+        error (str): False on success, otherwise the timeout or exception that stopped the operation.
+        elapsed (float): The time in seconds the operation ran for.
+    """
+    hostname: str
+    response: Any
+    error: str
+    elapsed: float
+
+
+class VyFleet:
+    """
+    Runs the same operation across many VyOS devices in parallel.
+
+    Devices are described either as VyDevice instances or as dicts of VyDevice keyword arguments. Operations run
+    on a bounded thread pool (run) or on the event loop (arun), and results are yielded as soon as each device
+    completes, so a fleet-wide change takes roughly as long as the slowest device.
+
+    Args:
+        devices (list): VyDevice instances or dicts of VyDevice keyword arguments.
+        max_workers (int, optional): The maximum number of devices worked on at the same time (default is 32).
+        timeout (float, optional): The time in seconds each device gets to complete an operation before its
+            result is reported as timed out (default is None, no limit besides the request timeout).
+
+    Methods:
+        run(method, *args, **kwargs): Run a device method on every device, yielding FleetResult objects.
+        arun(method, *args, **kwargs): Async variant of run() built on AsyncVyDevice.
+        close(): Close the connections of every device in the fleet.
+    """
+
+    def __init__(self, devices, max_workers=32, timeout=None):
+        self.definitions = list(devices)
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self._devices = None
+        self._async_devices = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.definitions)
+
+    @property
+    def devices(self):
+        """
+        list: The VyDevice objects of the fleet, created on first use and reused across runs.
+        """
+        if self._devices is None:
+            self._devices = [self._build_device(d, VyDevice) for d in self.definitions]
+        return self._devices
+
+    @property
+    def async_devices(self):
+        """
+        list: The AsyncVyDevice objects of the fleet, created on first use and reused across runs.
+        """
+        if self._async_devices is None:
+            from .async_device import AsyncVyDevice
+            self._async_devices = [self._build_device(d, AsyncVyDevice) for d in self.definitions]
+        return self._async_devices
+
+    def _build_device(self, definition, device_class):
+        if isinstance(definition, dict):
+            return device_class(**definition)
+        if isinstance(definition, device_class):
+            return definition
+        raise TypeError(f"cannot use {definition!r} as a {device_class.__name__}")
+
+    def _get_call(self, device, method):
+        if callable(method):
+            return lambda *args, **kwargs: method(device, *args, **kwargs)
+        return getattr(device, method)
+
+    def run(self, method, *args, **kwargs):
+        """
+        Run a device method on every device of the fleet.
+
+        Args:
+            method (str or callable): The name of the VyDevice method to call, or a callable taking the device
+                as its first argument.
+            *args: Positional arguments passed to the method.
+            **kwargs: Keyword arguments passed to the method.
+
+        Yields:
+            FleetResult: One result per device, in completion order.
+        """
+        devices = self.devices
+        started = {}
+
+        def call(index):
+            started[index] = time.monotonic()
+            return self._get_call(devices[index], method)(*args, **kwargs)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = {executor.submit(call, i): i for i in range(len(devices))}
+
+        try:
+            while pending:
+                wait_timeout = None
+                if self.timeout is not None:
+                    now = time.monotonic()
+                    # Queued devices get their deadline once a worker picks them up, so poll for that too
+                    deadlines = [started[i] + self.timeout - now if i in started else min(self.timeout, _QUEUE_POLL)
+                                 for i in pending.values()]
+                    wait_timeout = max(0, min(deadlines))
+
+                done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    index = pending.pop(future)
+                    elapsed = time.monotonic() - started[index]
+                    try:
+                        yield FleetResult(devices[index].hostname, future.result(), False, elapsed)
+                    except Exception as e:
+                        yield FleetResult(devices[index].hostname, None, f'{type(e).__name__}: {e}', elapsed)
+
+                if self.timeout is not None:
+                    now = time.monotonic()
+                    for future, index in list(pending.items()):
+                        if index in started and now - started[index] >= self.timeout:
+                            del pending[future]
+                            yield FleetResult(devices[index].hostname, None, 'timeout', now - started[index])
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    async def arun(self, method, *args, **kwargs):
+        """
+        Run an AsyncVyDevice method on every device of the fleet from the event loop.
+
+        Args:
+            method (str or callable): The name of the AsyncVyDevice method to call, or a coroutine function
+                taking the device as its first argument.
+            *args: Positional arguments passed to the method.
+            **kwargs: Keyword arguments passed to the method.
+
+        Yields:
+            FleetResult: One result per device, in completion order.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def call(device):
+            async with semaphore:
+                start = loop.time()
+                try:
+                    response = await asyncio.wait_for(self._get_call(device, method)(*args, **kwargs), self.timeout)
+                    return FleetResult(device.hostname, response, False, loop.time() - start)
+                except asyncio.TimeoutError:
+                    return FleetResult(device.hostname, None, 'timeout', loop.time() - start)
+                except Exception as e:
+                    return FleetResult(device.hostname, None, f'{type(e).__name__}: {e}', loop.time() - start)
+
+        tasks = [asyncio.ensure_future(call(device)) for device in self.async_devices]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def close(self):
+        """
+        Close the connections of every device in the fleet.
+        """
+        for device in self._devices or []:
+            device.close()
+
+    async def aclose(self):
+        """
+        Close the connections of every async device in the fleet.
+        """
+        for device in self._async_devices or []:
+            await device.close()
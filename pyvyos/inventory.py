@@ -0,0 +1,430 @@
+import json
+import sys
+import threading
+import weakref
+from collections.abc import Mapping
+
+from .fleet import VyFleet
+
+# Nodes up to this many children are searched by a scan of their key tuple, larger ones get a dict index
+_SCAN_LIMIT = 8
+
+
+class FrozenConfig(Mapping):
+    """
+    An immutable, compact node of a showConfig configuration, read like the nested dict it was built from.
+
+    A node keeps its child names and children in two tuples instead of a dict. Names and string values are
+    interned, multi-value leaves are tuples of values, and every node is hash-consed by its ConfigPool: two
+    identical subtrees, of one device or of different devices, are the same object. Nodes hash by content with a
+    hash computed once, and compare their children by identity first, since those are already shared.
+
+    Nodes are built by ConfigPool.loads() or ConfigPool.freeze(), not directly.
+
+    Args:
+        keys (tuple): The child names.
+        values (tuple): The children: FrozenConfig nodes, values, or tuples of values.
+
+    Methods:
+        to_dict(): Convert the node to nested dicts and lists, as returned by retrieve_show_config.
+        values(): Get the children, as a tuple.
+        items(): Get the (name, child) pairs, as a tuple.
+    """
+    __slots__ = ('_keys', '_values', '_hash', '_index', '__weakref__')
+
+    def __init__(self, keys, values):
+        self._keys = keys
+        self._values = values
+        self._hash = hash((keys, values))
+        self._index = None
+
+    def _position(self, key):
+        index = self._index
+        if index is None:
+            if len(self._keys) <= _SCAN_LIMIT:
+                # Interned names compare by identity first, a scan beats hashing for small nodes
+                for position, name in enumerate(self._keys):
+                    if name == key:
+                        return position
+                return -1
+            index = self._index = {name: position for position, name in enumerate(self._keys)}
+        return index.get(key, -1)
+
+    def __getitem__(self, key):
+        position = self._position(key)
+        if position < 0:
+            raise KeyError(key)
+        return self._values[position]
+
+    def __contains__(self, key):
+        return self._position(key) >= 0
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, FrozenConfig):
+            return self._hash == other._hash and self._keys == other._keys and self._values == other._values
+        if isinstance(other, Mapping):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f'FrozenConfig({self.to_dict()!r})'
+
+    def values(self):
+        return self._values
+
+    def items(self):
+        return tuple(zip(self._keys, self._values))
+
+    def to_dict(self):
+        """
+        Convert the node to nested dicts and lists, as returned by retrieve_show_config.
+
+        Returns:
+            dict: A new, mutable copy of the configuration.
+        """
+        result = {}
+        for name, child in zip(self._keys, self._values):
+            if isinstance(child, FrozenConfig):
+                result[name] = child.to_dict()
+            elif isinstance(child, tuple):
+                result[name] = list(child)
+            else:
+                result[name] = child
+        return result
+
+
+class ConfigPool:
+    """
+    Builds FrozenConfig nodes and shares the identical ones.
+
+    The pool keeps one node per distinct subtree, weakly: a subtree is dropped from the pool once no
+    configuration holds it anymore. Configurations built with the same pool share every subtree they have in
+    common, so a fleet of similar devices costs little more than its differences.
+
+    Methods:
+        loads(raw): Build a configuration from a JSON document.
+        freeze(config): Build a configuration from nested dicts.
+    """
+
+    def __init__(self):
+        self._nodes = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _node(self, pairs):
+        # Called for every object while parsing, kept to plain loops
+        intern = sys.intern
+        keys = []
+        values = []
+        for name, value in pairs:
+            keys.append(intern(name))
+            if type(value) is str:
+                value = intern(value)
+            elif type(value) is list:
+                value = tuple([intern(item) if type(item) is str else item for item in value])
+            values.append(value)
+
+        key = (tuple(keys), tuple(values))
+        with self._lock:
+            node = self._nodes.get(key)
+            if node is None:
+                node = self._nodes[key] = FrozenConfig(*key)
+            return node
+
+    def loads(self, raw):
+        """
+        Build a configuration from a JSON document.
+
+        Objects are turned into shared nodes as they are parsed, so the nested dicts of the document are never
+        built.
+
+        Args:
+            raw (bytes or str): The JSON document.
+
+        Returns:
+            The document, with every object as a FrozenConfig.
+        """
+        # object_pairs_hook is only offered by the standard json module, whatever the json_backend
+        return json.loads(raw, object_pairs_hook=self._node)
+
+    def freeze(self, config):
+        """
+        Build a configuration from nested dicts.
+
+        Args:
+            config (dict): A showConfig result, as returned by retrieve_show_config.
+
+        Returns:
+            FrozenConfig: The configuration.
+        """
+        if isinstance(config, FrozenConfig):
+            config = config.to_dict()
+        return self._node([(name, self.freeze(child) if isinstance(child, Mapping) else child)
+                           for name, child in config.items()])
+
+
+def _walk(node, pattern, value, memo):
+    """
+    Check whether a node has a match of a path pattern, evaluating every shared node only once.
+    """
+    key = (id(node), len(pattern))
+    found = memo.get(key)
+    if found is not None:
+        return found
+
+    if not pattern:
+        found = value is None or value in node
+    else:
+        head, rest = pattern[0], pattern[1:]
+        if head == '*':
+            children = node.values()
+        else:
+            position = node._position(head)
+            children = (node._values[position],) if position >= 0 else ()
+        found = any(_walk(child, rest, value, memo) if isinstance(child, FrozenConfig)
+                    else not rest and _leaf_matches(child, value) for child in children)
+    memo[key] = found
+    return found
+
+
+def _leaf_matches(leaf, value):
+    if value is None:
+        return True
+    if isinstance(leaf, tuple):
+        return value in leaf
+    return leaf == value
+
+
+def _collect(node, pattern, memo):
+    """
+    Get the values at the matches of a path pattern, evaluating every shared node only once.
+    """
+    key = (id(node), len(pattern))
+    found = memo.get(key)
+    if found is not None:
+        return found
+
+    if not pattern:
+        found = tuple(node)
+    else:
+        head, rest = pattern[0], pattern[1:]
+        if head == '*':
+            children = node.values()
+        else:
+            position = node._position(head)
+            children = (node._values[position],) if position >= 0 else ()
+        values = []
+        for child in children:
+            if isinstance(child, FrozenConfig):
+                values.extend(_collect(child, rest, memo))
+            elif not rest:
+                values.extend(child if isinstance(child, tuple) else (child,))
+        found = tuple(values)
+    memo[key] = found
+    return found
+
+
+class ConfigInventory:
+    """
+    Keeps the configurations of a fleet resident in a compact form, and queries them fleet-wide.
+
+    Configurations are stored as FrozenConfig trees of one ConfigPool. They are built straight from the raw
+    response bodies, without decoding them to nested dicts first, and identical subtrees are stored once for
+    the whole fleet: the system, service and firewall sections that most devices share, every unconfigured
+    interface, every rule that appears on several devices. The footprint therefore grows with what differs
+    between devices rather than with the number of devices.
+
+    Queries take path patterns, where '*' matches any node name. Since shared subtrees are the same object, a
+    query evaluates each distinct subtree once, however many devices hold it.
+
+    Example:
+        inventory = ConfigInventory(fleet)
+        inventory.refresh()
+        inventory.find(["interfaces", "*", "*", "address"], "192.0.2.1/24")
+
+    Args:
+        devices (VyFleet or list, optional): The fleet to retrieve configurations from, or the device list of one
+            (default is an empty fleet, configurations are then added with add()).
+        path (list, optional): The configuration path retrieved from every device (default is the whole
+            configuration).
+        max_workers (int, optional): The maximum number of devices polled at once (default is 32).
+
+    Attributes:
+        fleet (VyFleet): The polled fleet.
+        pool (ConfigPool): The pool the configurations are built with.
+        configs (dict): The configuration of every device, keyed by hostname.
+
+    Methods:
+        add(hostname, config): Add or replace the configuration of a device.
+        remove(hostname): Remove the configuration of a device.
+        refresh(): Retrieve the configuration of every device of the fleet.
+        arefresh(): Retrieve the configuration of every device of the fleet from the event loop.
+        find(path, value=None): Find the devices with a node or value at a path pattern.
+        values(path): Get the values at a path pattern on every device.
+        stats(): Get the number of configurations and stored nodes.
+    """
+
+    def __init__(self, devices=(), path=[], max_workers=32):
+        self.fleet = devices if isinstance(devices, VyFleet) else VyFleet(devices, max_workers=max_workers)
+        self.path = list(path)
+        self.pool = ConfigPool()
+        self.configs = {}
+
+    def __len__(self):
+        return len(self.configs)
+
+    def __iter__(self):
+        return iter(self.configs)
+
+    def __contains__(self, hostname):
+        return hostname in self.configs
+
+    def __getitem__(self, hostname):
+        return self.configs[hostname]
+
+    def add(self, hostname, config):
+        """
+        Add or replace the configuration of a device.
+
+        Args:
+            hostname (str): The hostname of the device.
+            config (ApiResponse, bytes, dict or FrozenConfig): A retrieve_show_config response, the raw body of
+                one, or its result.
+
+        Returns:
+            FrozenConfig: The stored configuration.
+        """
+        raw = getattr(config, 'raw', None)
+        if raw is not None:
+            config = raw
+        elif hasattr(config, 'result'):
+            if config.error:
+                raise ValueError(f"cannot add a failed response: {config.error}")
+            config = config.result
+
+        if isinstance(config, (bytes, bytearray, str)):
+            # Objects are built as nodes while parsing, the response envelope among them
+            envelope = self.pool.loads(config)
+            if not envelope.get('success'):
+                raise ValueError(f"cannot add a failed response: {envelope.get('error')}")
+            config = envelope['data']
+
+        if not isinstance(config, FrozenConfig):
+            config = self.pool.freeze(config if config is not None else {})
+        self.configs[hostname] = config
+        return config
+
+    def remove(self, hostname):
+        """
+        Remove the configuration of a device.
+
+        Args:
+            hostname (str): The hostname of the device.
+        """
+        self.configs.pop(hostname, None)
+
+    def _store(self, result):
+        response = result.response
+        if result.error:
+            return result.error
+        if response.status != 200:
+            return response.error
+        try:
+            self.add(result.hostname, response)
+        except ValueError as e:
+            return str(e)
+        return None
+
+    def refresh(self):
+        """
+        Retrieve the configuration of every device of the fleet.
+
+        Devices that fail keep their previous configuration.
+
+        Returns:
+            dict: The error of every device whose configuration could not be retrieved, keyed by hostname.
+        """
+        errors = {}
+        for result in self.fleet.run('retrieve_show_config', self.path):
+            error = self._store(result)
+            if error:
+                errors[result.hostname] = error
+        return errors
+
+    async def arefresh(self):
+        """
+        Retrieve the configuration of every device of the fleet from the event loop.
+
+        Returns:
+            dict: The error of every device whose configuration could not be retrieved, keyed by hostname.
+        """
+        errors = {}
+        async for result in self.fleet.arun('retrieve_show_config', self.path):
+            error = self._store(result)
+            if error:
+                errors[result.hostname] = error
+        return errors
+
+    def find(self, path, value=None):
+        """
+        Find the devices with a node or value at a path pattern.
+
+        Example:
+            inventory.find(["interfaces", "*", "*", "address"], "192.0.2.1/24")
+            inventory.find(["service", "ssh"])
+
+        Args:
+            path (list): The path elements, where '*' matches any node name.
+            value (str, optional): A value the matched leaf must hold, or a child the matched node must have
+                (default is None, any match).
+
+        Returns:
+            list: The hostnames of the matching devices.
+        """
+        pattern = tuple(path)
+        memo = {}
+        return [hostname for hostname, config in self.configs.items() if _walk(config, pattern, value, memo)]
+
+    def values(self, path):
+        """
+        Get the values at a path pattern on every device.
+
+        Leaf matches give their values, node matches the names of their children, so
+        values(["interfaces", "ethernet"]) lists the ethernet interfaces of every device.
+
+        Args:
+            path (list): The path elements, where '*' matches any node name.
+
+        Returns:
+            dict: The tuple of values of every device with a match, keyed by hostname.
+        """
+        pattern = tuple(path)
+        memo = {}
+        result = {}
+        for hostname, config in self.configs.items():
+            found = _collect(config, pattern, memo)
+            if found:
+                result[hostname] = found
+        return result
+
+    def stats(self):
+        """
+        Get the number of configurations and stored nodes.
+
+        Returns:
+            dict: The number of devices, and the number of distinct nodes stored for all of them.
+        """
+        return {'devices': len(self.configs), 'nodes': len(self.pool)}
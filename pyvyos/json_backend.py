@@ -0,0 +1,56 @@
+"""
+The JSON encoder and decoder used for API payloads and responses.
+
+The fastest available library is picked at import time: orjson, then ujson, then the standard library json
+module. set_backend() switches explicitly, for example to compare backends in benchmarks.
+"""
+import json
+
+BACKENDS = ('orjson', 'ujson', 'json')
+
+backend = None
+dumps = None
+loads = None
+
+
+def set_backend(name=None):
+    """
+    Select the JSON library.
+
+    Args:
+        name (str, optional): 'orjson', 'ujson' or 'json'; None picks the fastest installed one (default is None).
+
+    Returns:
+        str: The name of the selected backend.
+    """
+    global backend, dumps, loads
+
+    for candidate in ([name] if name else BACKENDS):
+        if candidate == 'orjson':
+            try:
+                import orjson
+            except ImportError:
+                if name:
+                    raise
+                continue
+
+            def orjson_dumps(obj):
+                return orjson.dumps(obj).decode()
+
+            backend, dumps, loads = 'orjson', orjson_dumps, orjson.loads
+        elif candidate == 'ujson':
+            try:
+                import ujson
+            except ImportError:
+                if name:
+                    raise
+                continue
+            backend, dumps, loads = 'ujson', ujson.dumps, ujson.loads
+        elif candidate == 'json':
+            backend, dumps, loads = 'json', json.dumps, json.loads
+        else:
+            raise ValueError(f"unknown JSON backend '{candidate}', expected one of {', '.join(BACKENDS)}")
+        return backend
+
+
+set_backend()
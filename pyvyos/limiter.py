@@ -0,0 +1,322 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """
+    Limits the rate of requests, allowing short bursts.
+
+    Requests take a token each; tokens are refilled at rate per second up to burst. A request that finds the
+    bucket empty reserves the next token and waits for it, so waiting requests are served in arrival order.
+
+    Args:
+        rate (float): The sustained number of requests per second.
+        burst (int, optional): The number of requests that may be sent at once after a quiet period (default is
+            the rate rounded up, at least 1).
+
+    Methods:
+        reserve(): Take a token and get the time to wait for it.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate + 0.999))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and get the time to wait for it.
+
+        Returns:
+            float: The seconds to wait before sending, 0 when a token was available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class HostLimiter:
+    """
+    Paces the requests sent to one device with a rate limit and an adaptive concurrency limit.
+
+    The optional token bucket caps requests per second. The concurrency limit, the number of requests in flight
+    at once, adapts AIMD-style: it grows by about one for every limit requests that complete without error and
+    without a rise in latency, and is multiplied by decrease_factor when a request fails (transport error, HTTP
+    429 or 5xx) or the smoothed latency exceeds latency_tolerance times the lowest latency seen (or
+    latency_target, when given). It settles near the highest concurrency the device serves without slowing
+    down. Latencies are tracked per kind of request, so that a large retrieve is compared with earlier large
+    retrieves rather than with quick show commands. Only one decrease is made per round of requests, since requests in flight when the limit was cut
+    report the same congestion.
+
+    Requests wait in acquire() while the device is at its limit; sync and async callers can share a limiter.
+
+    Args:
+        rate (float, optional): The maximum requests per second (default is None, no rate limit).
+        burst (int, optional): The burst size of the rate limit (default is derived from rate).
+        initial_limit (int, optional): The concurrency limit to start with (default is 4).
+        min_limit (int, optional): The lowest concurrency limit (default is 1).
+        max_limit (int, optional): The highest concurrency limit (default is 32).
+        decrease_factor (float, optional): The factor applied to the limit on congestion (default is 0.5).
+        latency_tolerance (float, optional): How many times the lowest latency counts as congestion (default is 2).
+        latency_target (float, optional): A fixed latency in seconds above which the device is considered
+            congested, instead of latency_tolerance (default is None).
+
+    Attributes:
+        limit (int): The current concurrency limit.
+        in_flight (int): The number of requests currently sent.
+
+    Methods:
+        acquire(): Wait until a request may be sent.
+        acquire_async(): Wait until a request may be sent, from a coroutine.
+        release(token, status, latency=True, kind=None): Report the end of a request.
+        stats(): Get the current limits and the throttling counters.
+    """
+
+    def __init__(self, rate=None, burst=None, initial_limit=4, min_limit=1, max_limit=32, decrease_factor=0.5,
+                 latency_tolerance=2.0, latency_target=None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_target = latency_target
+
+        self.in_flight = 0
+        self.throttled = 0
+        self.throttle_seconds = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.latency = None
+        self.min_latency = None
+        # The smoothed and lowest latency of every kind of request
+        self._latencies = {}
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._decreased_at = 0.0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        return max(self.min_limit, int(self._limit))
+
+    def _take_slot(self, waker):
+        """
+        Take a concurrency slot, or queue the waker to be called when one may be free.
+
+        A waker returns False when its waiter is gone, so that the slot goes to the next waiter.
+
+        Returns:
+            bool: True if the slot was taken.
+        """
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                return True
+            if waker is not None:
+                self._waiters.append(waker)
+            return False
+
+    def _retake_slot(self, waker):
+        # A woken waiter goes first, ahead of requests that arrive meanwhile
+        with self._lock:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            self._waiters.appendleft(waker)
+            return False
+
+    def acquire(self):
+        """
+        Wait until a request may be sent.
+
+        Returns:
+            float: The token to pass to release().
+        """
+        start = time.monotonic()
+        delay = self.bucket.reserve() if self.bucket is not None else 0.0
+        if delay:
+            time.sleep(delay)
+
+        event = threading.Event()
+
+        def wake():
+            event.set()
+            return True
+
+        if not self._take_slot(wake):
+            while True:
+                event.wait()
+                event.clear()
+                if self._retake_slot(wake):
+                    break
+
+        return self._started(start)
+
+    async def acquire_async(self):
+        """
+        Wait until a request may be sent, from a coroutine.
+
+        Returns:
+            float: The token to pass to release().
+        """
+        start = time.monotonic()
+        delay = self.bucket.reserve() if self.bucket is not None else 0.0
+        if delay:
+            await asyncio.sleep(delay)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            if future.done():
+                return False
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+            return True
+
+        if not self._take_slot(wake):
+            while True:
+                try:
+                    await future
+                except asyncio.CancelledError:
+                    self._abandon(wake)
+                    raise
+                future = loop.create_future()
+                if self._retake_slot(wake):
+                    break
+
+        return self._started(start)
+
+    def _started(self, start):
+        now = time.monotonic()
+        if now - start > 0.0005:
+            with self._lock:
+                self.throttled += 1
+                self.throttle_seconds += now - start
+        return now
+
+    def release(self, token, status, latency=True, kind=None):
+        """
+        Report the end of a request, adapting the concurrency limit.
+
+        Args:
+            token (float): The token returned by acquire().
+            status (int): The HTTP status of the request, 0 for transport failures.
+            latency (bool, optional): Whether the duration of the request reflects the load of the device; False
+                for long-running requests such as streams (default is True).
+            kind (hashable, optional): The kind of request, whose latency is compared with that of earlier
+                requests of the same kind only (default is None, one kind for all requests).
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+
+            congested = status == 0 or status == 429 or status >= 500
+            if latency and not congested:
+                congested = self._observe(now - token, kind)
+
+            if congested:
+                # Requests sent before the last decrease report the congestion that caused it
+                if token >= self._decreased_at:
+                    self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+                    self._decreased_at = now
+                    self.decreases += 1
+            elif self._limit < self.max_limit:
+                before = self.limit
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+                if self.limit > before:
+                    self.increases += 1
+
+            self._wake_waiters()
+
+    def _wake_waiters(self):
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            if self._waiters.popleft()():
+                free -= 1
+
+    def _abandon(self, waker):
+        # A cancelled waiter may already have been woken for a free slot, which goes to the next one then
+        with self._lock:
+            try:
+                self._waiters.remove(waker)
+            except ValueError:
+                pass
+            self._wake_waiters()
+
+    def _observe(self, elapsed, kind=None):
+        """
+        Record the latency of a request.
+
+        Returns:
+            bool: True if the latency shows congestion.
+        """
+        latencies = self._latencies.get(kind)
+        if latencies is None:
+            latency = lowest = elapsed
+        else:
+            latency, lowest = latencies
+            latency = 0.8 * latency + 0.2 * elapsed
+            if elapsed < lowest:
+                lowest = elapsed
+            else:
+                # Let the baseline drift up slowly, so that a lasting change of the device is accepted
+                lowest += (elapsed - lowest) * 0.01
+        self._latencies[kind] = (latency, lowest)
+        self.latency = latency
+        self.min_latency = lowest
+
+        if self.latency_target is not None:
+            return latency > self.latency_target
+        return latency > lowest * self.latency_tolerance
+
+    def stats(self):
+        """
+        Get the current limits and the throttling counters.
+
+        Returns:
+            dict: The concurrency limit, requests in flight and waiting, the rate limit, the number of requests
+            that had to wait and the total time they waited, the limit increases and decreases, and the smoothed
+            and lowest latency of the last kind of request observed.
+        """
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'waiting': len(self._waiters),
+                'rate': self.bucket.rate if self.bucket is not None else None,
+                'throttled': self.throttled,
+                'throttle_seconds': self.throttle_seconds,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'latency': self.latency,
+                'min_latency': self.min_latency,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(hostname, **kwargs):
+    """
+    Get the limiter shared by every device object talking to a hostname.
+
+    Args:
+        hostname (str): The hostname of the device.
+        **kwargs: HostLimiter arguments, used when the limiter is created.
+
+    Returns:
+        HostLimiter: The limiter for the hostname.
+    """
+    with _limiters_lock:
+        if hostname not in _limiters:
+            _limiters[hostname] = HostLimiter(**kwargs)
+        return _limiters[hostname]
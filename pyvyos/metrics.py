@@ -0,0 +1,154 @@
+import threading
+from bisect import bisect_left
+
+
+class LatencyHistogram:
+    """
+    A cumulative latency histogram with fixed bucket bounds, as used by Prometheus.
+
+    Args:
+        buckets (tuple): The upper bounds of the buckets in seconds, in increasing order.
+
+    Attributes:
+        counts (list): The number of observations per bucket, the last one being +Inf.
+        sum (float): The sum of all observations.
+        count (int): The number of observations.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Add an observation.
+
+        Args:
+            value (float): The observed latency in seconds.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Get the cumulative bucket counts.
+
+        Returns:
+            list: (upper bound, count) pairs, ending with ('+Inf', count).
+        """
+        pairs = []
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class MetricsCollector:
+    """
+    Aggregates request metrics of one or more devices through their request_end hook.
+
+    For every (hostname, command, op) it keeps a latency histogram, the error count and the request and response
+    byte totals, and exports them in the Prometheus text exposition format.
+
+    Example:
+        metrics = MetricsCollector()
+        metrics.attach(device)
+        ...
+        print(metrics.export_prometheus())
+
+    Args:
+        buckets (tuple, optional): The latency bucket bounds in seconds (default is DEFAULT_BUCKETS).
+
+    Methods:
+        attach(device): Collect the metrics of a device.
+        record(device, command, op, path, response): The request_end hook.
+        export_prometheus(): Export the metrics in the Prometheus text format.
+    """
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def attach(self, device):
+        """
+        Collect the metrics of a device.
+
+        Args:
+            device (VyDevice): The device to collect the metrics of.
+        """
+        device.register_hook('request_end', self.record)
+
+    def record(self, device, command, op, path, response):
+        """
+        Record a finished request; registered as the request_end hook by attach().
+        """
+        op = ','.join(sorted(set(op))) if isinstance(op, list) else op
+        key = (device.hostname, command, op)
+
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {
+                    'latency': LatencyHistogram(self.buckets),
+                    'errors': 0,
+                    'request_bytes': 0,
+                    'response_bytes': 0,
+                }
+
+            if response.error:
+                series['errors'] += 1
+            if response.timing is not None:
+                series['latency'].observe(response.timing.total)
+                series['request_bytes'] += response.timing.request_bytes
+                series['response_bytes'] += response.timing.response_bytes
+
+    def export_prometheus(self):
+        """
+        Export the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        lines = [
+            '# HELP pyvyos_request_duration_seconds Duration of VyOS API requests.',
+            '# TYPE pyvyos_request_duration_seconds histogram',
+        ]
+        counters = {
+            'pyvyos_request_errors_total': ('errors', 'VyOS API requests that returned an error.'),
+            'pyvyos_request_bytes_total': ('request_bytes', 'Bytes sent in VyOS API request bodies.'),
+            'pyvyos_response_bytes_total': ('response_bytes', 'Bytes received in VyOS API response bodies.'),
+        }
+
+        with self._lock:
+            series = sorted(self.series.items())
+
+            for (hostname, command, op), values in series:
+                labels = _labels(hostname, command, op)
+                histogram = values['latency']
+                for bound, count in histogram.cumulative():
+                    lines.append(f'pyvyos_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'pyvyos_request_duration_seconds_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'pyvyos_request_duration_seconds_count{{{labels}}} {histogram.count}')
+
+            for name, (field, description) in counters.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} counter')
+                for (hostname, command, op), values in series:
+                    lines.append(f'{name}{{{_labels(hostname, command, op)}}} {values[field]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(hostname, command, op):
+    return f'host="{_escape(hostname)}",command="{_escape(command)}",op="{_escape(op)}"'
@@ -0,0 +1,470 @@
+import copy
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+MULTI_VALUE_LEAVES = frozenset(['address', 'name-server', 'member', 'network', 'port'])
+VALUELESS_NODES = frozenset(['disable', 'enable', 'log'])
+
+
+class MockError(Exception):
+    """
+    An API error returned by MockVyOSServer with success false.
+    """
+
+
+class MockVyOSServer:
+    """
+    A local stand-in for the VyOS HTTP API, for tests and benchmarks.
+
+    The server implements the /retrieve, /configure, /show, /config-file, /image, /generate, /reset, /reboot
+    and /poweroff endpoints over plain HTTP/1.1 with keep-alive, on a background thread. The configuration is
+    held in memory in showConfig format. Since the server has no VyOS schema, the last element of a set path is
+    stored as the value of the leaf before it, except for names in valueless_nodes; values of leaves in
+    multi_value_leaves accumulate in a list, other leaves keep a single value. A configure request with a
+    confirm_time is rolled back after that many minutes, of confirm_minute seconds each, unless confirmed.
+
+    Example:
+        with MockVyOSServer(config=generate_config(interfaces=100), latency=0.005) as server:
+            device = VyDevice(**server.device_kwargs())
+            device.retrieve_show_config(["interfaces"])
+
+    Args:
+        apikey (str, optional): The API key clients must send (default is 'key').
+        config (dict, optional): The initial configuration (default is an empty configuration).
+        latency (float or tuple, optional): Seconds added to every request, or a (min, max) range to draw from
+            (default is 0).
+        error_rate (float, optional): The probability of answering a request with HTTP error_status (default is 0).
+        error_status (int, optional): The HTTP status of injected errors (default is 503).
+        show_output (dict or callable, optional): The output of show commands, either a dict from path tuples to
+            text or a function taking the path and returning the text (default is a short generated text).
+        reject (callable, optional): A function taking a configure path and returning an error message to refuse
+            it, or None to accept it (default accepts every path).
+        host (str, optional): The address to listen on (default is '127.0.0.1').
+        port (int, optional): The port to listen on (default is 0, any free port).
+        multi_value_leaves (set, optional): Leaf names that hold a list of values (default is MULTI_VALUE_LEAVES).
+        valueless_nodes (set, optional): Node names set without a value (default is VALUELESS_NODES).
+        confirm_minute (float, optional): The seconds a minute of confirm_time lasts, shortened in tests
+            (default is 60).
+
+    Attributes:
+        config (dict): The running configuration.
+        commits (list): The times of the configuration commits, oldest first, listed by 'show system commit'.
+            'show system commit diff <n>' lists the top-level sections changed by commit n.
+        files (dict): The saved configuration files by name.
+        images (list): The installed image names.
+        request_count (int): The number of requests served.
+
+    Methods:
+        start(): Start serving on a background thread.
+        stop(): Stop serving.
+        device_kwargs(): Get VyDevice keyword arguments pointing to the server.
+    """
+
+    def __init__(self, apikey='key', config=None, latency=0, error_rate=0, error_status=503, show_output=None,
+                 reject=None, host='127.0.0.1', port=0, multi_value_leaves=MULTI_VALUE_LEAVES,
+                 valueless_nodes=VALUELESS_NODES, confirm_minute=60):
+        self.apikey = apikey
+        self.config = copy.deepcopy(config) if config is not None else {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.show_output = show_output
+        self.reject = reject
+        self.multi_value_leaves = multi_value_leaves
+        self.valueless_nodes = valueless_nodes
+        self.confirm_minute = confirm_minute
+        self.commits = []
+        # The 'show system commit diff' output of every commit, oldest first
+        self._diffs = []
+        self.files = {}
+        self.images = ['1.4.0']
+        self.request_count = 0
+
+        # The configuration to restore and when, while a commit-confirm is pending
+        self._rollback = None
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def host(self):
+        """
+        str: The address the server listens on.
+        """
+        return self._httpd.server_address[0]
+
+    @property
+    def port(self):
+        """
+        int: The port the server listens on.
+        """
+        return self._httpd.server_address[1]
+
+    def device_kwargs(self):
+        """
+        Get VyDevice keyword arguments pointing to the server.
+
+        Returns:
+            dict: hostname, apikey, protocol and port.
+        """
+        return {'hostname': self.host, 'apikey': self.apikey, 'protocol': 'http', 'port': self.port}
+
+    def start(self):
+        """
+        Start serving on a background thread.
+
+        Returns:
+            MockVyOSServer: The server itself.
+        """
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the listening socket.
+        """
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _delay(self):
+        if isinstance(self.latency, (tuple, list)):
+            return random.uniform(*self.latency)
+        return self.latency
+
+    def handle(self, command, data):
+        """
+        Run an API command against the in-memory state.
+
+        Args:
+            command (str): The endpoint name.
+            data (dict or list): The decoded 'data' field of the request.
+
+        Returns:
+            The 'data' of a successful response.
+        """
+        handler = getattr(self, '_' + command.replace('-', '_'), None)
+        if handler is None:
+            raise MockError(f"unknown endpoint '{command}'")
+        with self._lock:
+            if self._rollback is not None and time.monotonic() >= self._rollback[1]:
+                self._replace(self._rollback[0])
+                self._rollback = None
+            return handler(data)
+
+    def _find(self, path):
+        node = self.config
+        for element in path:
+            if isinstance(node, dict) and element in node:
+                node = node[element]
+            elif isinstance(node, list) and element in node or node == element:
+                return element
+            else:
+                raise KeyError(element)
+        return node
+
+    def _retrieve(self, data):
+        op = data.get('op')
+        path = data.get('path', [])
+
+        if op == 'exists':
+            try:
+                self._find(path)
+                return True
+            except KeyError:
+                return False
+
+        try:
+            node = self._find(path)
+        except KeyError:
+            raise MockError('Configuration under specified path is empty')
+
+        if op == 'showConfig':
+            if isinstance(node, dict) and not node and path:
+                raise MockError('Configuration under specified path is empty')
+            return node
+        if op == 'returnValues':
+            if isinstance(node, dict):
+                raise MockError('Path is not a leaf node')
+            return node if isinstance(node, list) else [node]
+        raise MockError(f"'{op}' is not a valid operation")
+
+    def _set(self, path):
+        if path[-1] in self.valueless_nodes or len(path) == 1:
+            parent, name, value = path[:-1], path[-1], None
+        else:
+            parent, name, value = path[:-2], path[-2], path[-1]
+
+        node = self.config
+        for element in parent:
+            child = node.setdefault(element, {})
+            if not isinstance(child, dict):
+                raise MockError(f"Cannot set '{element}': it is a leaf node")
+            node = child
+
+        if value is None:
+            node.setdefault(name, {})
+        elif name in self.multi_value_leaves:
+            current = node.get(name)
+            if current is None:
+                node[name] = value
+            elif isinstance(current, list):
+                if value not in current:
+                    current.append(value)
+            elif current != value:
+                node[name] = [current, value]
+        else:
+            node[name] = value
+
+    def _delete(self, path):
+        node = self.config
+        for depth, element in enumerate(path[:-1]):
+            if not isinstance(node, dict) or element not in node:
+                raise MockError('Nothing to delete (the specified node does not exist)')
+            parent, node = node, node[element]
+
+        name = path[-1]
+        if isinstance(node, dict) and name in node:
+            del node[name]
+        elif isinstance(node, list) and name in node:
+            node.remove(name)
+            if len(node) == 1:
+                parent[path[-2]] = node[0]
+        elif node == name and len(path) > 1:
+            del parent[path[-2]]
+        else:
+            raise MockError('Nothing to delete (the specified node does not exist)')
+
+    def _configure(self, data):
+        if isinstance(data, dict) and data.get('op') == 'confirm':
+            if self._rollback is None:
+                raise MockError('No confirmation required')
+            self._rollback = None
+            return None
+
+        confirm_time = 0
+        if isinstance(data, dict) and 'commands' in data:
+            confirm_time = data.get('confirm_time', 0)
+            data = data['commands']
+        operations = data if isinstance(data, list) else [data]
+
+        for operation in operations:
+            if operation.get('op') not in ('set', 'delete'):
+                raise MockError(f"'{operation.get('op')}' is not a valid operation")
+            if not operation.get('path'):
+                raise MockError('Missing required field "path"')
+            if self.reject is not None:
+                error = self.reject(operation['path'])
+                if error:
+                    raise MockError(error)
+
+        # Keep a copy of the touched top-level sections so a failing batch leaves the configuration untouched
+        backup = {root: copy.deepcopy(self.config[root])
+                  for root in {op['path'][0] for op in operations} if root in self.config}
+        if confirm_time and self._rollback is None:
+            rollback = (copy.deepcopy(self.config), time.monotonic() + confirm_time * self.confirm_minute)
+        else:
+            rollback = self._rollback
+        try:
+            for operation in operations:
+                if operation['op'] == 'set':
+                    self._set(operation['path'])
+                else:
+                    self._delete(operation['path'])
+        except MockError:
+            for root in {op['path'][0] for op in operations}:
+                self.config.pop(root, None)
+            self.config.update(backup)
+            raise
+        self._rollback = rollback
+        self._commit({op['path'][0] for op in operations}, set(backup))
+        return None
+
+    def _show(self, data):
+        path = tuple(data.get('path', []))
+        if callable(self.show_output):
+            return self.show_output(list(path))
+        if self.show_output is not None and path in self.show_output:
+            return self.show_output[path]
+        if path == ('system', 'commit'):
+            return ''.join(f"{number}   {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(committed))} by vyos via cli\n"
+                           for number, committed in enumerate(reversed(self.commits)))
+        if path[:3] == ('system', 'commit', 'diff') and len(path) == 4:
+            revision = int(path[3]) if path[3].isdigit() else -1
+            # Commits appended to the log by hand have no diff
+            if len(self._diffs) != len(self.commits) or not 0 <= revision < len(self._diffs):
+                raise MockError(f'Invalid revision {path[3]}')
+            return self._diffs[-1 - revision]
+        return f"mock output of 'show {' '.join(path)}'\n"
+
+    def _commit(self, roots, existed):
+        """
+        Log a commit that changed the given top-level sections, in the format of 'show system commit diff'.
+
+        Args:
+            roots (set): The changed top-level sections.
+            existed (set): The sections among them that were configured before the commit.
+        """
+        lines = []
+        for root in sorted(roots):
+            if root not in existed and root in self.config:
+                lines += [f'+ {root} {{', '+ }']
+            elif root in existed and root not in self.config:
+                lines += [f'- {root} {{', '- }']
+            else:
+                lines.append(f'[{root}]')
+        self.commits.append(time.time())
+        self._diffs.append(''.join(line + '\n' for line in lines))
+
+    def _replace(self, config):
+        old, self.config = self.config, config
+        self._commit({root for root in set(old) | set(config) if old.get(root) != config.get(root)}, set(old))
+
+    def _config_file(self, data):
+        file = data.get('file') or '/config/config.boot'
+        if data.get('op') == 'save':
+            self.files[file] = copy.deepcopy(self.config)
+            return f'Saving configuration to \'{file}\'...\nDone\n'
+        if data.get('op') == 'load':
+            if file not in self.files:
+                raise MockError(f'Configuration file {file} does not exist')
+            self._replace(copy.deepcopy(self.files[file]))
+            self._rollback = None
+            return None
+        raise MockError(f"'{data.get('op')}' is not a valid operation")
+
+    def _image(self, data):
+        if data.get('op') == 'add':
+            name = data.get('url', '').rsplit('/', 1)[-1] or 'image'
+            self.images.append(name)
+            return f'Image {name} added\n'
+        if data.get('op') == 'delete':
+            if data.get('name') not in self.images:
+                raise MockError(f"Image {data.get('name')} not found")
+            self.images.remove(data['name'])
+            return f"Image {data['name']} deleted\n"
+        raise MockError(f"'{data.get('op')}' is not a valid operation")
+
+    def _generate(self, data):
+        return f"mock output of 'generate {' '.join(data.get('path', []))}'\n"
+
+    def _reset(self, data):
+        return ''
+
+    def _reboot(self, data):
+        return ''
+
+    def _poweroff(self, data):
+        return ''
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, keep-alive connections stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            # clients may drop the connection mid-response, e.g. when a show stream is closed early
+            pass
+
+    def _reply(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        mock = self.server.mock
+        form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+
+        with mock._lock:
+            mock.request_count += 1
+
+        delay = mock._delay()
+        if delay:
+            time.sleep(delay)
+
+        if mock.error_rate and random.random() < mock.error_rate:
+            return self._reply(mock.error_status, b'injected error', 'text/plain')
+
+        if form.get('key', [None])[0] != mock.apikey:
+            body = {'success': False, 'error': 'Valid API key is required', 'data': None}
+            return self._reply(401, json.dumps(body).encode())
+
+        try:
+            data = json.loads(form['data'][0])
+            body = {'success': True, 'data': mock.handle(self.path.strip('/'), data), 'error': None}
+            status = 200
+        except MockError as e:
+            body = {'success': False, 'error': str(e), 'data': None}
+            status = 400
+        except (KeyError, ValueError) as e:
+            body = {'success': False, 'error': f'Invalid request: {e}', 'data': None}
+            status = 400
+
+        self._reply(status, json.dumps(body).encode())
+
+
+def generate_config(interfaces=10, addresses=2, firewall_rules=0, static_routes=0, hostname='vyos'):
+    """
+    Generate a configuration of a given size for MockVyOSServer.
+
+    Args:
+        interfaces (int, optional): The number of ethernet interfaces (default is 10).
+        addresses (int, optional): The number of addresses per interface (default is 2).
+        firewall_rules (int, optional): The number of rules in an IPv4 firewall chain (default is 0).
+        static_routes (int, optional): The number of IPv4 static routes (default is 0).
+        hostname (str, optional): The host name (default is 'vyos').
+
+    Returns:
+        dict: The configuration in showConfig format.
+    """
+    config = {
+        'interfaces': {'ethernet': {}},
+        'system': {'host-name': hostname, 'name-server': ['192.0.2.53', '192.0.2.54']},
+    }
+
+    for i in range(interfaces):
+        address = [f'10.{i // 256}.{i % 256}.{a + 1}/24' for a in range(addresses)]
+        config['interfaces']['ethernet'][f'eth{i}'] = {
+            'address': address[0] if len(address) == 1 else address,
+            'description': f'interface {i}',
+            'mtu': '1500',
+        }
+
+    if firewall_rules:
+        config['firewall'] = {'ipv4': {'name': {'WAN-IN': {'default-action': 'drop', 'rule': {
+            str(r + 1): {
+                'action': 'accept',
+                'destination': {'port': str(1024 + r)},
+                'protocol': 'tcp',
+                'source': {'address': f'198.51.{r // 256 % 256}.{r % 256}'},
+            } for r in range(firewall_rules)
+        }}}}}
+
+    if static_routes:
+        config['protocols'] = {'static': {'route': {
+            f'172.{16 + r // 65536 % 16}.{r // 256 % 256}.{r % 256}/32': {'next-hop': {'192.0.2.1': {}}}
+            for r in range(static_routes)
+        }}}
+
+    return config
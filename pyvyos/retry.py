@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed API request is sent again.
+
+    A request is retried after a transport failure (connection error or timeout, reported with status 0) or one
+    of the given HTTP statuses, with exponential backoff and full jitter between attempts. Only read-only
+    commands are retried by default, since a configure request that timed out may still have been applied.
+
+    Args:
+        max_attempts (int, optional): The maximum number of attempts, including the first one (default is 3).
+        backoff (float, optional): The delay in seconds before the first retry (default is 0.5).
+        max_backoff (float, optional): The upper bound of the delay in seconds (default is 10).
+        jitter (bool, optional): Whether to randomize the delay between 0 and its computed value (default is True).
+        commands (tuple, optional): The API commands that may be retried (default is ('retrieve', 'show')).
+        statuses (tuple, optional): The HTTP statuses that are retried (default is (502, 503, 504)).
+    """
+
+    def __init__(self, max_attempts=3, backoff=0.5, max_backoff=10, jitter=True, commands=('retrieve', 'show'),
+                 statuses=(502, 503, 504)):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.commands = tuple(commands)
+        self.statuses = tuple(statuses)
+
+    def should_retry(self, command, attempt, status):
+        """
+        Check whether a failed attempt should be retried.
+
+        Args:
+            command (str): The API command of the request.
+            attempt (int): The number of attempts made so far.
+            status (int): The HTTP status of the last attempt, 0 for transport failures.
+
+        Returns:
+            bool: True if the request should be sent again.
+        """
+        return (attempt < self.max_attempts and command in self.commands
+                and (status == 0 or status in self.statuses))
+
+    def delay(self, attempt):
+        """
+        Get the time to wait before the next attempt.
+
+        Args:
+            attempt (int): The number of attempts made so far.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class CircuitBreaker:
+    """
+    Fails requests to an unhealthy device fast instead of waiting for every timeout.
+
+    After failure_threshold consecutive failures the circuit opens and requests are rejected without being
+    sent for reset_timeout seconds. Then a single trial request is let through (half-open): if it succeeds the
+    circuit closes again, otherwise it stays open for another reset_timeout.
+
+    Args:
+        failure_threshold (int, optional): The consecutive failures that open the circuit (default is 5).
+        reset_timeout (float, optional): The cool-down in seconds before a trial request (default is 30).
+
+    Attributes:
+        state (str): 'closed', 'open' or 'half-open'.
+        failures (int): The current number of consecutive failures.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Check whether a request may be sent.
+
+        Returns:
+            bool: True if the request may be sent, False if it should fail fast.
+        """
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                return True
+            return False
+
+    def record_success(self):
+        """
+        Record a successful request, closing the circuit.
+        """
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        """
+        Record a failed request, opening the circuit when the threshold is reached or the trial failed.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(hostname, **kwargs):
+    """
+    Get the circuit breaker shared by every device object talking to a hostname.
+
+    Args:
+        hostname (str): The hostname of the device.
+        **kwargs: CircuitBreaker arguments, used when the breaker is created.
+
+    Returns:
+        CircuitBreaker: The breaker for the hostname.
+    """
+    with _circuit_breakers_lock:
+        if hostname not in _circuit_breakers:
+            _circuit_breakers[hostname] = CircuitBreaker(**kwargs)
+        return _circuit_breakers[hostname]
@@ -0,0 +1,460 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .fleet import VyFleet
+from .template import RenderedConfig
+
+
+@dataclass
+class DeviceOutcome:
+    """
+    The outcome of a rollout on one device.
+
+    Attributes:
+        hostname (str): The device.
+        wave (int): The number of the wave the device was in, 0 for the canary wave.
+        status (str): 'applied', 'failed' (the change was not committed), 'rolled back' (committed, then the
+            backup was restored), 'reverting' (committed but left unconfirmed, the device reverts when
+            confirm_time runs out), 'rollback failed' or 'skipped' (the rollout halted before its wave).
+        error (str): False when applied, otherwise why the device was not left with the change.
+        elapsed (float): The seconds the device took.
+    """
+    hostname: str
+    wave: int
+    status: str = 'skipped'
+    error: str = False
+    elapsed: float = 0.0
+
+
+@dataclass
+class RolloutResult:
+    """
+    The report of a rollout.
+
+    Attributes:
+        outcomes (list): One DeviceOutcome per device, in fleet order.
+        waves (list): The hostnames of every wave that was run, in order.
+        halted (str): False when every wave ran, otherwise why the rollout stopped.
+    """
+    outcomes: list = field(default_factory=list)
+    waves: list = field(default_factory=list)
+    halted: str = False
+
+    @property
+    def success(self):
+        """
+        bool: True if the change was applied to every device.
+        """
+        return all(outcome.status == 'applied' for outcome in self.outcomes)
+
+    def by_status(self, status):
+        """
+        Get the outcomes with a status.
+
+        Args:
+            status (str): The status, such as 'applied' or 'rolled back'.
+
+        Returns:
+            list: The matching DeviceOutcome objects.
+        """
+        return [outcome for outcome in self.outcomes if outcome.status == status]
+
+
+def plan_waves(count, canary=1, growth=2.0, max_wave=None):
+    """
+    Split a number of devices into waves of growing size.
+
+    Args:
+        count (int): The number of devices.
+        canary (int, optional): The size of the first wave (default is 1).
+        growth (float, optional): The factor by which every wave is larger than the previous one (default is 2).
+        max_wave (int, optional): The largest wave size (default is None, no limit).
+
+    Returns:
+        list: The wave sizes, adding up to count.
+    """
+    sizes = []
+    size = max(1, canary)
+    remaining = count
+    while remaining > 0:
+        size = min(size, max_wave) if max_wave else size
+        sizes.append(min(size, remaining))
+        remaining -= sizes[-1]
+        size = max(size + 1, int(size * growth))
+    return sizes
+
+
+def _checked(response, verify):
+    # Device methods return coroutines on AsyncVyDevice, the check then has to be awaited as well
+    if asyncio.iscoroutine(response):
+        async def wait():
+            return verify(await response)
+        return wait()
+    return verify(response)
+
+
+def show_check(path, contains=None):
+    """
+    Build a health check running a show command.
+
+    Args:
+        path (list): The show command path, such as ["ip", "bgp", "summary"].
+        contains (str, optional): Text the output must contain (default is None, any successful output).
+
+    Returns:
+        callable: The health check, taking a VyDevice or AsyncVyDevice and returning its show response.
+    """
+    def verify(response):
+        if not response.error and contains is not None and contains not in (response.result or ''):
+            response.error = f"show {' '.join(path)}: output does not contain {contains!r}"
+        return response
+
+    return lambda device: _checked(device.show(path), verify)
+
+
+def exists_check(path):
+    """
+    Build a health check requiring a configuration path to exist.
+
+    Args:
+        path (list): The configuration path.
+
+    Returns:
+        callable: The health check, taking a VyDevice or AsyncVyDevice and returning its exists response.
+    """
+    def verify(response):
+        if not response.error and response.result is not True:
+            response.error = f"{' '.join(path)} does not exist"
+        return response
+
+    return lambda device: _checked(device.retrieve_exists(path), verify)
+
+
+class _RolloutBase:
+    """
+    The configuration and bookkeeping shared by Rollout and AsyncRollout.
+    """
+
+    def __init__(self, devices, operations, canary=1, growth=2.0, max_wave=None, max_failure_rate=0.0,
+                 health_check=None, settle=0, confirm_time=5, backup_file='/config/pyvyos-rollout.boot',
+                 on_failure='halt', max_workers=32):
+        if on_failure not in ('halt', 'rollback'):
+            raise ValueError(f"on_failure must be 'halt' or 'rollback', not {on_failure!r}")
+        if on_failure == 'rollback' and not backup_file:
+            raise ValueError("on_failure='rollback' needs a backup_file to restore")
+
+        self.fleet = devices if isinstance(devices, VyFleet) else VyFleet(devices, max_workers=max_workers)
+        self.operations = operations
+        self.canary = canary
+        self.growth = growth
+        self.max_wave = max_wave
+        self.max_failure_rate = max_failure_rate
+        self.health_check = health_check
+        self.settle = settle
+        self.confirm_time = confirm_time
+        self.backup_file = backup_file
+        self.on_failure = on_failure
+        self.max_workers = max_workers
+
+    def _waves(self, devices):
+        waves = []
+        start = 0
+        for size in plan_waves(len(devices), self.canary, self.growth, self.max_wave):
+            waves.append(list(range(start, start + size)))
+            start += size
+        return waves
+
+    def _change(self, device):
+        """
+        Get the change for a device.
+
+        Returns:
+            tuple: The configure method name and its argument.
+        """
+        operations = self.operations(device) if callable(self.operations) else self.operations
+        if isinstance(operations, RenderedConfig):
+            return 'configure_set', operations
+        return 'configure_batch', list(operations)
+
+    @staticmethod
+    def _check_result(result):
+        """
+        Interpret the value returned by a health check.
+
+        Returns:
+            str: False when healthy, otherwise the reason.
+        """
+        if hasattr(result, 'error'):
+            return result.error or False
+        return False if result else 'health check failed'
+
+    def _start(self, devices):
+        """
+        Plan the waves and the initial, skipped, outcomes.
+
+        Returns:
+            tuple: The device indexes of every wave, and the RolloutResult to fill in.
+        """
+        waves = self._waves(devices)
+        outcomes = [None] * len(devices)
+        for number, indexes in enumerate(waves):
+            for i in indexes:
+                outcomes[i] = DeviceOutcome(hostname=devices[i].hostname, wave=number)
+        return waves, RolloutResult(outcomes=outcomes)
+
+    def _to_revert(self, result):
+        """
+        Mark the devices already changed for rollback after the rollout halted.
+
+        Returns:
+            list: The indexes of the devices to restore.
+        """
+        indexes = [i for i, outcome in enumerate(result.outcomes) if outcome.status == 'applied']
+        for i in indexes:
+            result.outcomes[i].error = 'rolled back after the rollout halted'
+        return indexes
+
+    def _wave_failed(self, outcomes):
+        failed = sum(1 for outcome in outcomes if outcome.status != 'applied')
+        return failed > self.max_failure_rate * len(outcomes)
+
+    def _halt_reason(self, number, outcomes):
+        failed = [outcome for outcome in outcomes if outcome.status != 'applied']
+        return (f"wave {number}: {len(failed)} of {len(outcomes)} devices failed, "
+                f"first {failed[0].hostname}: {failed[0].error}")
+
+
+class Rollout(_RolloutBase):
+    """
+    Rolls a configuration change out to a fleet in waves: a canary, then progressively larger parallel waves.
+
+    Every device of a wave, in parallel:
+
+    1. saves its running configuration to backup_file with config_file_save;
+    2. commits the change with commit-confirm, so that a device made unreachable by the change reverts by
+       itself after confirm_time minutes;
+    3. waits settle seconds and runs the health check;
+    4. if healthy, confirms the commit; otherwise confirms it too, so that it does not fire later, and
+       restores the backup with config_file_load.
+
+    When more than max_failure_rate of the devices of a wave fail, the rollout halts and the remaining devices
+    are skipped; with on_failure='rollback' every device changed by the rollout is restored as well.
+
+    Example:
+        rollout = Rollout(fleet, [("set", ["system", "ntp", "server", "192.0.2.123"])],
+                          health_check=show_check(["ntp"], contains="192.0.2.123"))
+        result = rollout.run()
+        if result.halted:
+            print(result.halted)
+
+    Args:
+        devices (VyFleet or list): The fleet, or the device list of one, in rollout order.
+        operations (list or callable): The (op, path) tuples to apply, a RenderedConfig to set, or a function
+            taking a device and returning either, for per-device changes.
+        canary (int, optional): The size of the first wave (default is 1).
+        growth (float, optional): The factor by which every wave is larger than the previous one (default is 2).
+        max_wave (int, optional): The largest wave size (default is None, no limit).
+        max_failure_rate (float, optional): The fraction of a wave that may fail without halting the rollout
+            (default is 0).
+        health_check (callable, optional): A function taking a device and returning an ApiResponse, healthy
+            when it has no error, or a bool, such as show_check or exists_check (default is None, no check).
+        settle (float, optional): The seconds to wait between the commit and the health check (default is 0).
+        confirm_time (int, optional): The commit-confirm timeout in minutes (default is 5, None commits
+            without confirmation on devices whose API does not support it).
+        backup_file (str, optional): The file the running configuration is saved to before the change and
+            restored from on failure (default is '/config/pyvyos-rollout.boot', None disables backups).
+        on_failure (str, optional): 'halt' to stop at a failing wave, or 'rollback' to also restore every device
+            already changed (default is 'halt').
+        max_workers (int, optional): The number of devices changed at the same time (default is 32).
+
+    Methods:
+        run(): Run the rollout.
+    """
+
+    def _rollback(self, device, outcome, pending=False):
+        try:
+            if self.backup_file:
+                if pending:
+                    # Left pending, the commit-confirm would still fire its action (a reboot) after the restore
+                    response = device.configure_confirm()
+                    if response.error:
+                        outcome.error = f'{outcome.error}; confirm failed: {response.error}'
+                        outcome.status = 'reverting'
+                        return
+                    pending = False
+                response = device.config_file_load(file=self.backup_file)
+                if not response.error:
+                    outcome.status = 'rolled back'
+                    return
+                outcome.error = f'{outcome.error}; restore failed: {response.error}'
+        except Exception as e:
+            outcome.error = f'{outcome.error}; restore failed: {type(e).__name__}: {e}'
+        # Only a commit-confirm still outstanding reverts the device by itself
+        outcome.status = 'reverting' if pending else 'rollback failed'
+
+    def _apply(self, device, wave):
+        outcome = DeviceOutcome(hostname=device.hostname, wave=wave, status='failed')
+        start = time.monotonic()
+        committed = False
+        confirmed = False
+        try:
+            if self.backup_file:
+                response = device.config_file_save(file=self.backup_file)
+                if response.error:
+                    outcome.error = f'backup failed: {response.error}'
+                    return outcome
+
+            method, change = self._change(device)
+            response = getattr(device, method)(change, confirm_time=self.confirm_time)
+            if response is not None and response.error:
+                outcome.error = response.error
+                return outcome
+            committed = response is not None
+
+            if self.settle:
+                time.sleep(self.settle)
+            outcome.error = self._check_result(self.health_check(device)) if self.health_check else False
+            if not outcome.error and self.confirm_time and committed:
+                response = device.configure_confirm()
+                confirmed = not response.error
+                if response.error:
+                    outcome.error = f'confirm failed: {response.error}'
+
+            if outcome.error:
+                self._rollback(device, outcome, pending=bool(self.confirm_time and committed and not confirmed))
+            else:
+                outcome.status = 'applied'
+        except Exception as e:
+            outcome.error = f'{type(e).__name__}: {e}'
+            if committed:
+                outcome.status = 'reverting' if self.confirm_time and not confirmed else 'rollback failed'
+        finally:
+            outcome.elapsed = time.monotonic() - start
+        return outcome
+
+    def run(self):
+        """
+        Run the rollout.
+
+        Returns:
+            RolloutResult: The outcome of every device.
+        """
+        devices = self.fleet.devices
+        waves, result = self._start(devices)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for number, indexes in enumerate(waves):
+                result.waves.append([devices[i].hostname for i in indexes])
+                outcomes = list(executor.map(lambda i: self._apply(devices[i], number), indexes))
+                for i, outcome in zip(indexes, outcomes):
+                    result.outcomes[i] = outcome
+
+                if self._wave_failed(outcomes):
+                    result.halted = self._halt_reason(number, outcomes)
+                    if self.on_failure == 'rollback':
+                        list(executor.map(lambda i: self._rollback(devices[i], result.outcomes[i]),
+                                          self._to_revert(result)))
+                    break
+        return result
+
+
+class AsyncRollout(_RolloutBase):
+    """
+    Rolls a configuration change out to a fleet of AsyncVyDevice objects in waves; the asynchronous
+    counterpart of Rollout, taking the same arguments.
+
+    Methods:
+        run(): Run the rollout.
+    """
+
+    async def _rollback(self, device, outcome, pending=False):
+        try:
+            if self.backup_file:
+                if pending:
+                    # Left pending, the commit-confirm would still fire its action (a reboot) after the restore
+                    response = await device.configure_confirm()
+                    if response.error:
+                        outcome.error = f'{outcome.error}; confirm failed: {response.error}'
+                        outcome.status = 'reverting'
+                        return
+                    pending = False
+                response = await device.config_file_load(file=self.backup_file)
+                if not response.error:
+                    outcome.status = 'rolled back'
+                    return
+                outcome.error = f'{outcome.error}; restore failed: {response.error}'
+        except Exception as e:
+            outcome.error = f'{outcome.error}; restore failed: {type(e).__name__}: {e}'
+        # Only a commit-confirm still outstanding reverts the device by itself
+        outcome.status = 'reverting' if pending else 'rollback failed'
+
+    async def _apply(self, device, wave, semaphore):
+        outcome = DeviceOutcome(hostname=device.hostname, wave=wave, status='failed')
+        start = time.monotonic()
+        committed = False
+        confirmed = False
+        async with semaphore:
+            try:
+                if self.backup_file:
+                    response = await device.config_file_save(file=self.backup_file)
+                    if response.error:
+                        outcome.error = f'backup failed: {response.error}'
+                        return outcome
+
+                method, change = self._change(device)
+                response = await getattr(device, method)(change, confirm_time=self.confirm_time)
+                if response is not None and response.error:
+                    outcome.error = response.error
+                    return outcome
+                committed = response is not None
+
+                if self.settle:
+                    await asyncio.sleep(self.settle)
+                if self.health_check:
+                    check = self.health_check(device)
+                    outcome.error = self._check_result(await check if asyncio.iscoroutine(check) else check)
+                if not outcome.error and self.confirm_time and committed:
+                    response = await device.configure_confirm()
+                    confirmed = not response.error
+                    if response.error:
+                        outcome.error = f'confirm failed: {response.error}'
+
+                if outcome.error:
+                    await self._rollback(device, outcome,
+                                         pending=bool(self.confirm_time and committed and not confirmed))
+                else:
+                    outcome.status = 'applied'
+            except Exception as e:
+                outcome.error = f'{type(e).__name__}: {e}'
+                if committed:
+                    outcome.status = 'reverting' if self.confirm_time and not confirmed else 'rollback failed'
+            finally:
+                outcome.elapsed = time.monotonic() - start
+        return outcome
+
+    async def run(self):
+        """
+        Run the rollout.
+
+        Returns:
+            RolloutResult: The outcome of every device.
+        """
+        devices = self.fleet.async_devices
+        semaphore = asyncio.Semaphore(self.max_workers)
+        waves, result = self._start(devices)
+
+        for number, indexes in enumerate(waves):
+            result.waves.append([devices[i].hostname for i in indexes])
+            outcomes = await asyncio.gather(*(self._apply(devices[i], number, semaphore) for i in indexes))
+            for i, outcome in zip(indexes, outcomes):
+                result.outcomes[i] = outcome
+
+            if self._wave_failed(outcomes):
+                result.halted = self._halt_reason(number, outcomes)
+                if self.on_failure == 'rollback':
+                    await asyncio.gather(*(self._rollback(devices[i], result.outcomes[i])
+                                           for i in self._to_revert(result)))
+                break
+        return result
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Singleflight:
+    """
+    Coalesces identical requests that are in flight at the same time into a single API call.
+
+    The first caller of a key runs the call; callers of the same key that arrive while it is running wait for it
+    and receive its outcome instead of sending their own request. Threads and coroutines are coalesced
+    separately, each with their own kind of caller. Once the call has completed the next caller of the key runs
+    a new one, so results are never reused after the fact; that is the job of ResponseCache.
+
+    Only read-only commands should be coalesced, since a configure request is expected to be applied once per
+    call. Coalesced callers share the decoded result, which should be treated as read-only.
+
+    Args:
+        commands (tuple, optional): The API commands that are coalesced (default is ('retrieve', 'show')).
+
+    Attributes:
+        calls (int): The number of calls that were run.
+        shared (int): The number of callers that received the outcome of another caller's call, that is the
+            number of requests saved.
+
+    Methods:
+        do(key, function): Run a call, or wait for the identical call in flight.
+        ado(key, function): Run a coroutine call, or wait for the identical call in flight.
+        stats(): Get the counters.
+    """
+
+    def __init__(self, commands=('retrieve', 'show')):
+        self.commands = tuple(commands)
+        self.calls = 0
+        self.shared = 0
+
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._futures = {}
+
+    def do(self, key, function):
+        """
+        Run a call, or wait for the identical call in flight.
+
+        Args:
+            key (hashable): Identifies identical calls.
+            function (callable): Runs the call and returns its result.
+
+        Returns:
+            tuple: The result, and True if it came from another caller's call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    async def ado(self, key, function):
+        """
+        Run a coroutine call, or wait for the identical call in flight.
+
+        The call runs as a task of its own that every caller waits for, so a cancelled caller, the first one
+        included, does not cancel the call for the others. The call is only cancelled with its last caller.
+
+        Args:
+            key (hashable): Identifies identical calls.
+            function (callable): Returns the coroutine running the call.
+
+        Returns:
+            tuple: The result, and True if it came from another caller's call.
+        """
+        flight = self._futures.get(key)
+        shared = flight is not None and not flight[0].done()
+        if shared:
+            self.shared += 1
+        else:
+            flight = self._futures[key] = [asyncio.ensure_future(function()), 0]
+            self.calls += 1
+
+            def forget(_):
+                if self._futures.get(key) is flight:
+                    del self._futures[key]
+
+            flight[0].add_done_callback(forget)
+
+        task = flight[0]
+        flight[1] += 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and flight[1] == 1:
+                task.cancel()
+            raise
+        finally:
+            flight[1] -= 1
+        return result, shared
+
+    def stats(self):
+        """
+        Get the counters.
+
+        Returns:
+            dict: The calls run, the requests saved by sharing and the calls currently in flight.
+        """
+        return {'calls': self.calls, 'shared': self.shared, 'in_flight': len(self._calls) + len(self._futures)}
@@ -0,0 +1,358 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from . import json_backend
+from .config_diff import ConfigDiff, config_diff
+
+# An index record: the binary SHA-256 of the blob, its offset in the pack and its compressed length
+_INDEX_RECORD = struct.Struct('>32sQI')
+
+# Entry kinds of an encoded node: the value itself, or the hash of the blob of a child node
+_VALUE = 0
+_REF = 1
+
+
+@dataclass
+class Snapshot:
+    """
+    A stored configuration snapshot.
+
+    Attributes:
+        device (str): The name the snapshot is stored under, usually the device hostname.
+        timestamp (float): When the snapshot was taken, in seconds since the epoch.
+        root (str): The hash of the root node of the configuration.
+        new_blobs (int): The number of blobs the snapshot added to the store; 0 when nothing changed.
+    """
+    device: str
+    timestamp: float
+    root: str
+    new_blobs: int = 0
+
+
+class SnapshotStore:
+    """
+    A content-addressed, compressed store of configuration snapshots.
+
+    Every configuration node larger than inline_size is stored once as a zlib-compressed blob keyed by the hash
+    of its content, with its children referenced by hash. Subtrees that did not change between snapshots, or
+    that are the same on several devices, are therefore stored only once. Blobs are appended to a single pack
+    file that is read through mmap, and an index file maps hashes to their position in the pack.
+
+    Files in the directory:
+        objects.pack: The compressed blobs, one after the other.
+        objects.idx: Fixed-size (hash, offset, length) records, one per blob.
+        snapshots.jsonl: One line per snapshot with the device name, timestamp and root hash.
+
+    Example:
+        with SnapshotStore('/var/lib/vyos-snapshots') as store:
+            device.snapshot(store)
+            config = store.get(device.hostname)
+
+    Args:
+        directory (str): The directory holding the store, created if missing.
+        inline_size (int, optional): Nodes whose encoding is shorter than this many bytes are kept inline in their
+            parent instead of getting a blob of their own (default is 256).
+        compress_level (int, optional): The zlib compression level (default is 6).
+        cache_size (int, optional): The number of decoded nodes kept in memory for reconstruction (default is 4096).
+
+    Methods:
+        put(device, config, timestamp=None): Store a configuration snapshot.
+        history(device): List the snapshots of a device.
+        devices(): List the devices with snapshots.
+        get(device, index=-1): Reconstruct a snapshot of a device.
+        load(root): Reconstruct the configuration with the given root hash.
+        diff(old, new): Compute the configure operations between two snapshots.
+        stats(): Get the number of blobs and the size of the store.
+        close(): Close the files of the store.
+    """
+
+    def __init__(self, directory, inline_size=256, compress_level=6, cache_size=4096):
+        self.directory = directory
+        self.inline_size = inline_size
+        self.compress_level = compress_level
+        self.cache_size = cache_size
+
+        os.makedirs(directory, exist_ok=True)
+        self._pack_path = os.path.join(directory, 'objects.pack')
+        self._index_path = os.path.join(directory, 'objects.idx')
+        self._snapshots_path = os.path.join(directory, 'snapshots.jsonl')
+
+        self._lock = threading.RLock()
+        self._index = {}
+        self._snapshots = {}
+        self._nodes = OrderedDict()
+        self._map = None
+
+        self._pack = open(self._pack_path, 'ab+')
+        self._load_index()
+        self._load_snapshots()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close the files of the store.
+        """
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._pack.close()
+
+    def _load_index(self):
+        pack_size = os.path.getsize(self._pack_path)
+        if not os.path.exists(self._index_path):
+            return
+
+        with open(self._index_path, 'rb') as index:
+            data = index.read()
+
+        # A record cut short by a crash, or pointing past the pack, is ignored; the blob is written again
+        for start in range(0, len(data) - _INDEX_RECORD.size + 1, _INDEX_RECORD.size):
+            digest, offset, length = _INDEX_RECORD.unpack_from(data, start)
+            if offset + length <= pack_size:
+                self._index[digest.hex()] = (offset, length)
+
+    def _load_snapshots(self):
+        if not os.path.exists(self._snapshots_path):
+            return
+
+        with open(self._snapshots_path, 'rb') as snapshots:
+            for line in snapshots:
+                try:
+                    entry = json_backend.loads(line)
+                except ValueError:
+                    continue
+                if entry['root'] in self._index:
+                    self._snapshots.setdefault(entry['device'], []).append(
+                        Snapshot(device=entry['device'], timestamp=entry['timestamp'], root=entry['root']))
+
+    def _encode(self, node, new_blobs):
+        """
+        Encode a node, storing the blobs of large child nodes.
+
+        Returns:
+            bytes: The canonical encoding of the node, with its keys sorted so that equal nodes hash the same
+            whatever the order their keys arrived in.
+        """
+        entries = []
+        for key, value in sorted(node.items()):
+            if isinstance(value, dict) and value:
+                encoded = self._encode(value, new_blobs)
+                if len(encoded) >= self.inline_size:
+                    entries.append([key, _REF, self._store(encoded, new_blobs)])
+                    continue
+            entries.append([key, _VALUE, value])
+        return json.dumps(entries, separators=(',', ':'), ensure_ascii=False, sort_keys=True).encode()
+
+    def _store(self, encoded, new_blobs):
+        digest = hashlib.sha256(encoded).digest()
+        blob_hash = digest.hex()
+        if blob_hash in self._index:
+            return blob_hash
+
+        compressed = zlib.compress(encoded, self.compress_level)
+        self._pack.seek(0, os.SEEK_END)
+        offset = self._pack.tell()
+        self._pack.write(compressed)
+        new_blobs.append(_INDEX_RECORD.pack(digest, offset, len(compressed)))
+        self._index[blob_hash] = (offset, len(compressed))
+        return blob_hash
+
+    def put(self, device, config, timestamp=None):
+        """
+        Store a configuration snapshot.
+
+        Args:
+            device (str): The name to store the snapshot under, usually the device hostname.
+            config (dict): The configuration, as returned by retrieve_show_config([]).
+            timestamp (float, optional): When the snapshot was taken (default is now).
+
+        Returns:
+            Snapshot: The stored snapshot.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+
+        with self._lock:
+            new_blobs = []
+            root = self._store(self._encode(config or {}, new_blobs), new_blobs)
+
+            # The pack is made durable before the index and the snapshot entry that point into it
+            self._pack.flush()
+            os.fsync(self._pack.fileno())
+            if new_blobs:
+                with open(self._index_path, 'ab') as index:
+                    index.write(b''.join(new_blobs))
+            with open(self._snapshots_path, 'a') as snapshots:
+                snapshots.write(json.dumps({'device': device, 'timestamp': timestamp, 'root': root}) + '\n')
+
+            snapshot = Snapshot(device=device, timestamp=timestamp, root=root, new_blobs=len(new_blobs))
+            self._snapshots.setdefault(device, []).append(snapshot)
+            return snapshot
+
+    def history(self, device):
+        """
+        List the snapshots of a device.
+
+        Args:
+            device (str): The device name.
+
+        Returns:
+            list: The Snapshot objects, oldest first.
+        """
+        with self._lock:
+            return list(self._snapshots.get(device, []))
+
+    def devices(self):
+        """
+        List the devices with snapshots.
+
+        Returns:
+            list: The device names.
+        """
+        with self._lock:
+            return list(self._snapshots)
+
+    def get(self, device, index=-1):
+        """
+        Reconstruct a snapshot of a device.
+
+        Args:
+            device (str): The device name.
+            index (int, optional): The position of the snapshot in history(device) (default is -1, the latest).
+
+        Returns:
+            dict: The configuration, None if the device has no such snapshot.
+        """
+        with self._lock:
+            snapshots = self._snapshots.get(device, [])
+            try:
+                snapshot = snapshots[index]
+            except IndexError:
+                return None
+        return self.load(snapshot.root)
+
+    def _read(self, blob_hash):
+        """
+        Read and decode the entries of a blob, through the node cache.
+        """
+        with self._lock:
+            entries = self._nodes.get(blob_hash)
+            if entries is not None:
+                self._nodes.move_to_end(blob_hash)
+                return entries
+
+            offset, length = self._index[blob_hash]
+            if self._map is None or offset + length > len(self._map):
+                if self._map is not None:
+                    self._map.close()
+                self._pack.flush()
+                self._map = mmap.mmap(self._pack.fileno(), 0, access=mmap.ACCESS_READ)
+
+            entries = json_backend.loads(zlib.decompress(self._map[offset:offset + length]))
+            self._nodes[blob_hash] = entries
+            if len(self._nodes) > self.cache_size:
+                self._nodes.popitem(last=False)
+            return entries
+
+    def load(self, root):
+        """
+        Reconstruct the configuration with the given root hash.
+
+        Args:
+            root (str): The root hash of a snapshot.
+
+        Returns:
+            dict: A new copy of the configuration.
+        """
+        config = {}
+        stack = [(config, root)]
+        while stack:
+            node, blob_hash = stack.pop()
+            for key, kind, value in self._read(blob_hash):
+                if kind == _REF:
+                    node[key] = {}
+                    stack.append((node[key], value))
+                else:
+                    # Inline values are shared with the node cache, hand out copies
+                    node[key] = json_backend.loads(json_backend.dumps(value)) if isinstance(value, (dict, list)) else value
+        return config
+
+    def diff(self, old, new):
+        """
+        Compute the configure operations between two snapshots.
+
+        Subtrees with the same hash in both snapshots are skipped without being read, so the cost follows the
+        size of the change rather than the size of the configuration.
+
+        Args:
+            old (Snapshot or str): The snapshot, or root hash, to start from.
+            new (Snapshot or str): The snapshot, or root hash, to arrive at.
+
+        Returns:
+            ConfigDiff: The paths to delete and to set.
+        """
+        old = getattr(old, 'root', old)
+        new = getattr(new, 'root', new)
+        diff = ConfigDiff()
+
+        stack = [((), old, new)]
+        while stack:
+            prefix, old_hash, new_hash = stack.pop()
+            if old_hash == new_hash:
+                continue
+
+            old_entries = {key: (kind, value) for key, kind, value in self._read(old_hash)}
+            new_entries = {key: (kind, value) for key, kind, value in self._read(new_hash)}
+            old_changed = {}
+            new_changed = {}
+            for key in list(old_entries) + [key for key in new_entries if key not in old_entries]:
+                old_entry = old_entries.get(key)
+                new_entry = new_entries.get(key)
+                if old_entry == new_entry:
+                    continue
+                if old_entry and new_entry and old_entry[0] == new_entry[0] == _REF:
+                    stack.append((prefix + (key,), old_entry[1], new_entry[1]))
+                    continue
+                if old_entry:
+                    old_changed[key] = self._value(old_entry)
+                if new_entry:
+                    new_changed[key] = self._value(new_entry)
+
+            changes = config_diff(new_changed, old_changed)
+            diff.delete.extend(list(prefix) + path for path in changes.delete)
+            diff.set.extend(list(prefix) + path for path in changes.set)
+        return diff
+
+    def _value(self, entry):
+        kind, value = entry
+        return self.load(value) if kind == _REF else value
+
+    def stats(self):
+        """
+        Get the number of blobs and the size of the store.
+
+        Returns:
+            dict: The number of blobs, snapshots and devices, and the size of the pack file in bytes.
+        """
+        with self._lock:
+            self._pack.flush()
+            return {
+                'blobs': len(self._index),
+                'snapshots': sum(len(snapshots) for snapshots in self._snapshots.values()),
+                'devices': len(self._snapshots),
+                'pack_bytes': os.path.getsize(self._pack_path),
+            }
+
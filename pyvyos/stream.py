@@ -0,0 +1,730 @@
+import asyncio
+import codecs
+import json
+import re
+import time
+from urllib.parse import urlencode
+
+import requests
+
+from .timing import RequestTiming, reset_connection_timing, get_connection_timing
+
+
+class ShowOutputDecoder:
+    """
+    Incrementally decodes the JSON body of a show response, streaming the text of its data string.
+
+    The body is fed in arbitrary chunks. The data string is returned piece by piece as soon as it arrives and is
+    never held in full; the other members (success, error) are small and decoded whole.
+
+    Methods:
+        feed(chunk): Decode the next chunk of the body.
+        close(): Check that the body was complete.
+
+    Attributes:
+        success (bool): The success member of the response, None until decoded.
+        error (str): The error member of the response, or a decoding error.
+    """
+
+    _WHITESPACE = ' \t\r\n'
+
+    def __init__(self):
+        self.success = None
+        self.error = None
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._state = 'start'
+        self._buffer = ''
+        self._key = None
+        self._escape = ''
+        # nesting depth, in-string and escape flags of a buffered non-data value
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk):
+        """
+        Decode the next chunk of the body.
+
+        Args:
+            chunk (bytes): The next bytes of the body.
+
+        Returns:
+            list: The pieces of the data string decoded from the chunk.
+        """
+        text = self._decoder.decode(chunk)
+        pieces = []
+        position = 0
+
+        while position < len(text) and self._state not in ('done', 'failed'):
+            if self._state == 'string':
+                position = self._feed_string(text, position, pieces)
+            elif self._state == 'key_string':
+                position = self._feed_key(text, position)
+            elif self._state == 'value':
+                position = self._feed_value(text, position)
+            else:
+                position = self._feed_structure(text, position)
+
+        return pieces
+
+    def close(self):
+        """
+        Check that the body was complete.
+
+        Returns:
+            bool: True when the whole response object was decoded, otherwise error is set.
+        """
+        if self._state != 'done' and self.error is None:
+            self.error = 'json decode error'
+        return self._state == 'done'
+
+    def _fail(self):
+        self.error = 'json decode error'
+        self._state = 'failed'
+
+    def _feed_structure(self, text, position):
+        char = text[position]
+        if char in self._WHITESPACE:
+            return position + 1
+
+        if self._state == 'start':
+            if char != '{':
+                self._fail()
+                return position
+            self._state = 'key'
+        elif self._state == 'key':
+            if char == '}':
+                self._state = 'done'
+            elif char == '"':
+                self._state = 'key_string'
+            elif char != ',':
+                self._fail()
+        elif self._state == 'colon':
+            if char != ':':
+                self._fail()
+                return position
+            self._state = 'before_value'
+        elif self._state == 'before_value':
+            if self._key == 'data' and char == '"':
+                self._state = 'string'
+            else:
+                self._state = 'value'
+                return position
+        return position + 1
+
+    def _feed_key(self, text, position):
+        # keys are short and never escaped in API responses
+        end = text.find('"', position)
+        if end < 0:
+            self._buffer += text[position:]
+            return len(text)
+        self._key = self._buffer + text[position:end]
+        self._buffer = ''
+        self._state = 'colon'
+        return end + 1
+
+    def _feed_string(self, text, position, pieces):
+        if self._escape:
+            return self._feed_escape(text, position, pieces)
+
+        quote = text.find('"', position)
+        backslash = text.find('\\', position, quote if quote >= 0 else len(text))
+        end = backslash if backslash >= 0 else quote
+        if end < 0:
+            pieces.append(text[position:])
+            return len(text)
+
+        if end > position:
+            pieces.append(text[position:end])
+        if end == quote:
+            self._state = 'key'
+            return end + 1
+
+        self._escape = '\\'
+        return self._feed_escape(text, end + 1, pieces)
+
+    def _feed_escape(self, text, position, pieces):
+        while position < len(text):
+            self._escape += text[position]
+            position += 1
+            escape = self._escape
+            if len(escape) == 2 and escape[1] != 'u':
+                break
+            if len(escape) == 6 and not escape[2:6].lower().startswith(('d8', 'd9', 'da', 'db')):
+                break
+            # a high surrogate is followed by the escape of its low half
+            if len(escape) == 7 and escape[6] != '\\':
+                position -= 1
+                self._escape = escape[:6]
+                break
+            if len(escape) == 8 and escape[7] != 'u':
+                pieces.append(json.loads('"' + escape[:6] + '"'))
+                self._escape = escape[6:]
+                break
+            if len(escape) == 12:
+                break
+        else:
+            return position
+
+        try:
+            pieces.append(json.loads('"' + self._escape + '"'))
+        except ValueError:
+            self._fail()
+        self._escape = ''
+        return position
+
+    def _feed_value(self, text, position):
+        start = position
+        while position < len(text):
+            char = text[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '[{':
+                self._depth += 1
+            elif char in ']}':
+                if self._depth == 0:
+                    break
+                self._depth -= 1
+            elif char == ',' and self._depth == 0:
+                break
+            position += 1
+
+        self._buffer += text[start:position]
+        if position == len(text):
+            return position
+
+        try:
+            value = json.loads(self._buffer)
+        except ValueError:
+            self._fail()
+            return position
+        self._buffer = ''
+        self._state = 'key'
+
+        if self._key == 'success':
+            self.success = value
+        elif self._key == 'error':
+            self.error = value
+        return position
+
+
+class LineSplitter:
+    """
+    Splits streamed text into lines, holding back at most one incomplete line.
+
+    Methods:
+        feed(text): Split the next piece of text.
+        flush(): Return the last line if the text did not end with a newline.
+    """
+
+    def __init__(self):
+        self._pending = ''
+
+    def feed(self, text):
+        """
+        Split the next piece of text.
+
+        Args:
+            text (str): The next piece of text.
+
+        Returns:
+            list: The lines completed by the text, without line endings.
+        """
+        lines = (self._pending + text).split('\n')
+        self._pending = lines.pop()
+        return lines
+
+    def flush(self):
+        """
+        Return the last line if the text did not end with a newline.
+
+        Returns:
+            list: The incomplete last line, or an empty list.
+        """
+        lines = [self._pending] if self._pending else []
+        self._pending = ''
+        return lines
+
+
+class RouteParser:
+    """
+    Parses 'show ip route' and 'show ipv6 route' output into route records.
+
+    Lines listing additional next hops of an ECMP route are merged into the route, so a route is returned when
+    the line of the next route arrives.
+
+    Record keys: prefix, protocol, selected, fib, distance, metric, nexthops (a list of dicts with via and
+    interface, via being None for connected routes), uptime.
+
+    Methods:
+        feed(line): Parse the next line.
+        flush(): Return the last route.
+    """
+
+    _ROUTE = re.compile(r'^(?P<code>[A-Za-z])(?P<flags>[>*=qrbtos ]*?)\s*(?P<prefix>[0-9a-fA-F.:]+/\d+)\s*(?P<rest>.*)$')
+    _NEXTHOP = re.compile(r'^\s+[>*=qrbtos ]*\s+via\s')
+    _METRIC = re.compile(r'\[(\d+)/(\d+)\]')
+
+    def __init__(self):
+        self._route = None
+
+    def feed(self, line):
+        """
+        Parse the next line.
+
+        Args:
+            line (str): The next line of the output.
+
+        Returns:
+            list: The routes completed by the line.
+        """
+        if self._route is not None and self._NEXTHOP.match(line):
+            nexthop = self._nexthop(line.split('via', 1)[1])
+            nexthop.pop('uptime')
+            self._route['nexthops'].append(nexthop)
+            return []
+
+        match = self._ROUTE.match(line)
+        if match is None:
+            return []
+
+        completed = self.flush()
+        flags = match.group('flags')
+        rest = match.group('rest')
+        metric = self._METRIC.search(rest)
+        route = {
+            'prefix': match.group('prefix'),
+            'protocol': match.group('code'),
+            'selected': '>' in flags,
+            'fib': '*' in flags,
+            'distance': int(metric.group(1)) if metric else None,
+            'metric': int(metric.group(2)) if metric else None,
+            'nexthops': [],
+            'uptime': None,
+        }
+
+        if 'directly connected' in rest:
+            fields = [field.strip() for field in rest.split(',')]
+            route['nexthops'].append({'via': None, 'interface': fields[1] if len(fields) > 1 else None})
+            route['uptime'] = fields[-1] if len(fields) > 2 else None
+        elif 'via' in rest:
+            nexthop = self._nexthop(rest.split('via', 1)[1])
+            route['uptime'] = nexthop.pop('uptime')
+            route['nexthops'].append(nexthop)
+
+        self._route = route
+        return completed
+
+    def flush(self):
+        """
+        Return the last route.
+
+        Returns:
+            list: The route still held, or an empty list.
+        """
+        route, self._route = self._route, None
+        return [route] if route is not None else []
+
+    @staticmethod
+    def _nexthop(text):
+        fields = [field.strip() for field in text.split(',')]
+        interface = fields[1] if len(fields) > 1 and not fields[1].startswith('weight') else None
+        uptime = fields[-1] if len(fields) > 2 and not fields[-1].startswith('weight') else None
+        return {'via': fields[0], 'interface': interface, 'uptime': uptime}
+
+
+class InterfaceParser:
+    """
+    Parses 'show interfaces' output into interface records.
+
+    Record keys: interface, addresses, state, link, description. Addresses listed on the following lines are
+    merged into the interface, so an interface is returned when the line of the next one arrives.
+
+    Methods:
+        feed(line): Parse the next line.
+        flush(): Return the last interface.
+    """
+
+    _STATES = {'u': 'up', 'D': 'down', 'A': 'admin down'}
+
+    def __init__(self):
+        self._interface = None
+
+    def feed(self, line):
+        """
+        Parse the next line.
+
+        Args:
+            line (str): The next line of the output.
+
+        Returns:
+            list: The interfaces completed by the line.
+        """
+        fields = line.split()
+        if not fields or line.startswith(('Codes:', 'Interface', '-')):
+            return []
+
+        if line[0].isspace():
+            if self._interface is not None:
+                self._interface['addresses'].extend(field for field in fields if field != '-')
+            return []
+
+        if len(fields) < 3 or '/' not in fields[2]:
+            return []
+
+        completed = self.flush()
+        state, _, link = fields[2].partition('/')
+        self._interface = {
+            'interface': fields[0],
+            'addresses': [fields[1]] if fields[1] != '-' else [],
+            'state': self._STATES.get(state, state),
+            'link': self._STATES.get(link, link),
+            'description': ' '.join(fields[3:]),
+        }
+        return completed
+
+    def flush(self):
+        """
+        Return the last interface.
+
+        Returns:
+            list: The interface still held, or an empty list.
+        """
+        interface, self._interface = self._interface, None
+        return [interface] if interface is not None else []
+
+
+class NeighborParser:
+    """
+    Parses ARP and IPv6 neighbor tables, both the 'show arp' table and 'ip neigh' style lines.
+
+    Record keys: address, interface, mac, state.
+
+    Methods:
+        feed(line): Parse the next line.
+        flush(): Return nothing, every line is a complete record.
+    """
+
+    _MAC = re.compile(r'^[0-9a-fA-F]{2}(:[0-9a-fA-F]{2}){5}$')
+
+    def feed(self, line):
+        """
+        Parse the next line.
+
+        Args:
+            line (str): The next line of the output.
+
+        Returns:
+            list: The neighbor on the line, or an empty list for headers and blank lines.
+        """
+        fields = line.split()
+        if len(fields) < 2 or line.startswith(('Address', '-')):
+            return []
+
+        if 'dev' in fields:
+            # ip neigh: ADDRESS dev IFACE [lladdr MAC] [router] STATE
+            mac = fields[fields.index('lladdr') + 1] if 'lladdr' in fields else None
+            return [{'address': fields[0], 'interface': fields[fields.index('dev') + 1], 'mac': mac,
+                     'state': fields[-1]}]
+
+        # show arp: ADDRESS INTERFACE MAC STATE, or net-tools ADDRESS HWTYPE MAC FLAGS [MASK] IFACE
+        mac = next((field for field in fields if self._MAC.match(field)), None)
+        if len(fields) >= 4 and fields[1] == 'ether':
+            return [{'address': fields[0], 'interface': fields[-1], 'mac': mac, 'state': fields[3]}]
+        return [{'address': fields[0], 'interface': fields[1], 'mac': mac,
+                 'state': fields[-1] if fields[-1] != mac else None}]
+
+    def flush(self):
+        """
+        Return nothing, every line is a complete record.
+
+        Returns:
+            list: An empty list.
+        """
+        return []
+
+
+PARSERS = {
+    'routes': RouteParser,
+    'interfaces': InterfaceParser,
+    'arp': NeighborParser,
+    'neighbors': NeighborParser,
+}
+
+
+def get_parser(parser):
+    """
+    Get a parser object from a parser name or object.
+
+    Args:
+        parser (str or object): A name from PARSERS, or an object with feed(line) and flush() methods.
+
+    Returns:
+        object: The parser, None if parser is None.
+    """
+    if isinstance(parser, str):
+        if parser not in PARSERS:
+            raise ValueError(f"unknown parser '{parser}', expected one of {', '.join(PARSERS)}")
+        return PARSERS[parser]()
+    return parser
+
+
+class _ShowStreamBase:
+    """
+    The state and decoding shared by ShowStream and AsyncShowStream.
+    """
+
+    def __init__(self, device, path, payload, parser=None, chunk_size=64 * 1024):
+        self.device = device
+        self.path = path
+        self.request = payload
+        self.parser = get_parser(parser)
+        self.chunk_size = chunk_size
+        self.status = None
+        self.error = None
+        self.timing = None
+        self._decoder = ShowOutputDecoder()
+        self._lines = LineSplitter()
+        self._started = False
+        self._finished = False
+        self._bytes = 0
+        self._start = None
+        self._token = None
+
+    def _records(self, lines):
+        if self.parser is None:
+            return lines
+        records = []
+        for line in lines:
+            records.extend(self.parser.feed(line))
+        return records
+
+    def _process(self, chunk):
+        self._bytes += len(chunk)
+        records = []
+        for piece in self._decoder.feed(chunk):
+            records.extend(self._records(self._lines.feed(piece)))
+        return records
+
+    def _complete(self):
+        records = self._records(self._lines.flush())
+        if self.parser is not None:
+            records.extend(self.parser.flush())
+
+        complete = self._decoder.close()
+        if self._decoder.error:
+            self.error = self._decoder.error
+        elif complete and self._decoder.success is not True:
+            self.error = 'show command failed'
+        else:
+            self.error = False
+        return records
+
+    def _begin(self):
+        self._started = True
+        self.device._run_hooks('request_start', 'show', 'show', self.path)
+        if self.device.circuit_breaker is not None and not self.device.circuit_breaker.allow():
+            self.status = 0
+            self.error = f'circuit open: {self.device.hostname} is failing, request not sent'
+            return False
+        self._start = time.perf_counter()
+        return True
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self.error is None:
+            self.error = 'stream closed before the output was read'
+        if self.status is not None and not str(self.error).startswith('circuit open'):
+            self.device._record_outcome(self.status)
+        if self._token is not None:
+            # A stream lasts as long as its reader takes, so its duration says nothing about the device load
+            self.device.limiter.release(self._token, self.status or 0, latency=False)
+            self._token = None
+        self.device._run_hooks('request_end', 'show', 'show', self.path, self)
+
+
+class ShowStream(_ShowStreamBase):
+    """
+    The streamed output of a show command, returned by VyDevice.show_stream().
+
+    Iterating yields the output lines, or the records of the parser, while the response is still being read, so
+    output of any size is processed in constant memory. The stream can be iterated once. After iteration status
+    and error hold the outcome, as on ApiResponse; error is False on success.
+
+    Example:
+        stream = device.show_stream(["ip", "route"], parser='routes')
+        for route in stream:
+            print(route['prefix'])
+        if stream.error:
+            print(stream.error)
+
+    Args:
+        device (VyDevice): The device to run the command on.
+        path (list): The path of the show command.
+        payload (dict): The payload of the show request.
+        parser (str or object, optional): A parser name from PARSERS or a parser object; None yields lines
+            (default is None).
+        chunk_size (int, optional): The number of bytes read at a time (default is 64 KiB).
+
+    Attributes:
+        status (int): The HTTP status of the response, None before iteration and 0 for transport failures.
+        request (dict): The request payload sent to the API.
+        error (str): Any error message, False on success and None before iteration has finished.
+        timing (RequestTiming): Timing and size information, available once the stream is exhausted.
+
+    Methods:
+        close(): Stop reading and release the connection.
+    """
+
+    def __init__(self, device, path, payload, parser=None, chunk_size=64 * 1024):
+        super().__init__(device, path, payload, parser=parser, chunk_size=chunk_size)
+        self._response = None
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError('a ShowStream can be iterated only once')
+        return self._iterate()
+
+    def _iterate(self):
+        if not self._begin():
+            self._finish()
+            return
+
+        data = dict(self.request, key=self.device.apikey)
+        try:
+            if self.device.limiter is not None:
+                self._token = self.device.limiter.acquire()
+                self._start = time.perf_counter()
+            session = self.device._get_session()
+            reset_connection_timing()
+            self._response = session.post(self.device._get_url('show'), verify=self.device.verify, data=data,
+                                          timeout=self.device.timeout, stream=True)
+            self.status = self._response.status_code
+            if self.status != 200:
+                self.error = 'http error'
+                return
+
+            for chunk in self._response.iter_content(self.chunk_size):
+                yield from self._process(chunk)
+            yield from self._complete()
+
+            connect, tls = get_connection_timing()
+            self.timing = RequestTiming(connect=connect, tls=tls, ttfb=self._response.elapsed.total_seconds(),
+                                        total=time.perf_counter() - self._start,
+                                        request_bytes=len(self._response.request.body or ''),
+                                        response_bytes=self._bytes)
+
+        except requests.exceptions.ConnectionError as e:
+            self.error = 'connection error: ' + str(e)
+            self.status = 0
+
+        except requests.exceptions.Timeout as e:
+            self.error = 'timeout error: ' + str(e)
+            self.status = 0
+
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Stop reading and release the connection.
+        """
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+        if self._started:
+            self._finish()
+
+
+class AsyncShowStream(_ShowStreamBase):
+    """
+    The streamed output of a show command, returned by AsyncVyDevice.show_stream().
+
+    The asynchronous counterpart of ShowStream, iterated with async for.
+
+    Example:
+        stream = device.show_stream(["ip", "route"], parser='routes')
+        async for route in stream:
+            print(route['prefix'])
+
+    Args:
+        device (AsyncVyDevice): The device to run the command on.
+        path (list): The path of the show command.
+        payload (dict): The payload of the show request.
+        parser (str or object, optional): A parser name from PARSERS or a parser object; None yields lines
+            (default is None).
+        chunk_size (int, optional): The number of bytes read at a time (default is 64 KiB).
+
+    Methods:
+        close(): Stop reading and release the connection.
+    """
+
+    def __init__(self, device, path, payload, parser=None, chunk_size=64 * 1024):
+        super().__init__(device, path, payload, parser=parser, chunk_size=chunk_size)
+        self._response = None
+
+    def __aiter__(self):
+        if self._started:
+            raise RuntimeError('an AsyncShowStream can be iterated only once')
+        return self._iterate()
+
+    async def _iterate(self):
+        # Imported here so that the synchronous client does not pay for importing aiohttp
+        import aiohttp
+
+        if not self._begin():
+            self._finish()
+            return
+
+        data = dict(self.request, key=self.device.apikey)
+        try:
+            if self.device.limiter is not None:
+                self._token = await self.device.limiter.acquire_async()
+                self._start = time.perf_counter()
+            session = self.device._get_session()
+            trace = {'start': self._start, 'connect': 0.0}
+            self._response = await session.post(self.device._get_url('show'), data=data, trace_request_ctx=trace)
+            self.status = self._response.status
+            if self.status != 200:
+                self.error = 'http error'
+                return
+
+            async for chunk in self._response.content.iter_chunked(self.chunk_size):
+                for record in self._process(chunk):
+                    yield record
+            for record in self._complete():
+                yield record
+
+            total = time.perf_counter() - self._start
+            self.timing = RequestTiming(connect=trace['connect'], tls=None, ttfb=trace.get('ttfb', total), total=total,
+                                        request_bytes=len(urlencode(data)), response_bytes=self._bytes)
+
+        except aiohttp.ClientConnectionError as e:
+            self.error = 'connection error: ' + str(e)
+            self.status = 0
+
+        except asyncio.TimeoutError as e:
+            self.error = 'timeout error: ' + str(e)
+            self.status = 0
+
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Stop reading and release the connection.
+        """
+        if self._response is not None:
+            self._response.release()
+            self._response = None
+        if self._started:
+            self._finish()
@@ -0,0 +1,349 @@
+import re
+import time
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .fleet import VyFleet
+
+# The counters kept per interface, in column order
+COUNTERS = ('rx_packets', 'rx_bytes', 'tx_packets', 'tx_bytes', 'rx_dropped', 'tx_dropped', 'rx_errors', 'tx_errors')
+
+_MAX_32 = 0xFFFFFFFF
+
+
+def parse_counters(output, counters=COUNTERS):
+    """
+    Parse 'show interfaces counters' output into a counter matrix.
+
+    Columns are matched by their header, so 'Rx Bytes' fills rx_bytes whatever its position; counters missing
+    from the output are 0. Interfaces listed without counters are skipped.
+
+    Args:
+        output (str): The output of the show command.
+        counters (tuple, optional): The counters to extract, in column order (default is COUNTERS).
+
+    Returns:
+        tuple: The interface names, and a uint64 array with one row per interface and one column per counter.
+    """
+    lines = output.splitlines()
+    for start, line in enumerate(lines):
+        if line.lstrip().startswith('Interface'):
+            break
+    else:
+        return [], np.zeros((0, len(counters)), dtype=np.uint64)
+
+    columns = [name.lower().replace(' ', '_') for name in re.split(r'\s{2,}', lines[start].strip())[1:]]
+    width = len(columns) + 1
+
+    names = []
+    tokens = []
+    for line in lines[start + 1:]:
+        fields = line.split()
+        if len(fields) != width or line.startswith('-'):
+            continue
+        names.append(fields[0])
+        tokens.extend(fields[1:])
+
+    try:
+        table = np.array(tokens, dtype=np.uint64).reshape(len(names), len(columns))
+    except ValueError:
+        # Some row holds something else than numbers, drop those rows only
+        rows = [tokens[i:i + len(columns)] for i in range(0, len(tokens), len(columns))]
+        keep = [i for i, row in enumerate(rows) if all(token.isdigit() for token in row)]
+        names = [names[i] for i in keep]
+        table = np.array([rows[i] for i in keep], dtype=np.uint64).reshape(len(names), len(columns))
+
+    values = np.zeros((len(names), len(counters)), dtype=np.uint64)
+    for position, counter in enumerate(counters):
+        if counter in columns:
+            values[:, position] = table[:, columns.index(counter)]
+    return names, values
+
+
+class TelemetryCollector:
+    """
+    Polls interface counters across a fleet into a ring buffer of NumPy arrays, for vectorized rates.
+
+    Every (device, interface) pair is a row of the arrays and every counter a column; each tick writes one
+    sample of every row into the next slot of a ring buffer of history ticks. Rates, deltas and counter wraps
+    are then computed for the whole fleet at once with array operations, so thousands of interfaces cost a few
+    array passes per tick instead of Python objects per sample. The row of an interface is looked up once per
+    device layout, so steady-state ticks only parse numbers and copy them into place.
+
+    A counter that decreased between two samples wrapped or was reset. While the old value fits in 32 bits it
+    is taken as a 32-bit wrap; a larger counter is 64 bits wide, which does not wrap in practice, so it is taken
+    as reset to zero (a reboot or 'clear counters') and the new value is the delta.
+
+    Example:
+        collector = TelemetryCollector(fleet, history=120)
+        while True:
+            collector.tick()
+            for (hostname, interface), rate in collector.top('rx_bytes', 10):
+                print(hostname, interface, rate * 8)
+            time.sleep(1)
+
+    Args:
+        devices (VyFleet or list): The fleet to poll, or the device list of one.
+        path (list, optional): The show command returning the counters (default is ["interfaces", "counters"]).
+        history (int, optional): The number of ticks kept (default is 60).
+        counters (tuple, optional): The counters kept, in column order (default is COUNTERS).
+        max_workers (int, optional): The number of devices polled at the same time when devices is a list
+            (default is 32).
+
+    Attributes:
+        fleet (VyFleet): The polled fleet.
+        keys (list): The (hostname, interface) pair of every row.
+        ticks (int): The number of ticks taken.
+
+    Methods:
+        tick(poll=True): Poll every device and store the samples.
+        atick(): Poll every device from the event loop and store the samples.
+        ingest(hostname, output, timestamp=None): Store the output of one device in the current tick.
+        latest(): Get the counters of the last tick.
+        latest_valid(): Get which rows were sampled in the last tick.
+        deltas(window=1): Get the counter increase of every row over a number of ticks.
+        rates(window=1): Get the per-second rate of every counter of every row.
+        top(counter, n=10, window=1): Get the rows with the highest rate of a counter.
+        series(hostname, interface, counter): Get the history of one counter.
+    """
+
+    def __init__(self, devices, path=["interfaces", "counters"], history=60, counters=COUNTERS, max_workers=32):
+        if np is None:
+            raise ImportError("TelemetryCollector requires numpy, install it with 'pip install pyvyos[telemetry]'")
+        if history < 2:
+            raise ValueError('history must keep at least 2 ticks to compute rates')
+
+        self.fleet = devices if isinstance(devices, VyFleet) else VyFleet(devices, max_workers=max_workers)
+        self.path = list(path)
+        self.history = history
+        self.counters = tuple(counters)
+        self.keys = []
+        self.ticks = 0
+
+        self._rows = {}
+        self._layouts = {}
+        self._head = -1
+        self._values = np.zeros((history, 0, len(self.counters)), dtype=np.uint64)
+        self._times = np.full((history, 0), np.nan)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _advance(self):
+        self._head = (self._head + 1) % self.history
+        self.ticks += 1
+        self._times[self._head] = np.nan
+
+    def _grow(self, rows):
+        capacity = self._values.shape[1]
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 64)
+        values = np.zeros((self.history, capacity, len(self.counters)), dtype=np.uint64)
+        times = np.full((self.history, capacity), np.nan)
+        values[:, :self._values.shape[1]] = self._values
+        times[:, :self._times.shape[1]] = self._times
+        self._values, self._times = values, times
+
+    def _row_indexes(self, hostname, names):
+        """
+        Get the rows of the interfaces of a device, adding rows for new interfaces.
+
+        Returns:
+            numpy.ndarray: The row of each interface.
+        """
+        layout = self._layouts.get(hostname)
+        if layout is not None and layout[0] == names:
+            return layout[1]
+
+        indexes = []
+        for name in names:
+            key = (hostname, name)
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = len(self.keys)
+                self.keys.append(key)
+            indexes.append(row)
+        self._grow(len(self.keys))
+
+        indexes = np.array(indexes, dtype=np.intp)
+        self._layouts[hostname] = (names, indexes)
+        return indexes
+
+    def ingest(self, hostname, output, timestamp=None):
+        """
+        Store the output of one device in the current tick.
+
+        tick() and atick() call it for every device; call it directly with outputs collected elsewhere, after
+        starting a tick with tick(poll=False).
+
+        Args:
+            hostname (str): The device the output comes from.
+            output (str): The output of the counters show command.
+            timestamp (float, optional): The time of the sample (default is now).
+
+        Returns:
+            int: The number of interfaces stored.
+        """
+        if self._head < 0:
+            self._advance()
+
+        names, values = parse_counters(output, self.counters)
+        rows = self._row_indexes(hostname, tuple(names))
+        self._values[self._head, rows] = values
+        self._times[self._head, rows] = time.time() if timestamp is None else timestamp
+        return len(rows)
+
+    def _store(self, result):
+        response = result.response
+        if result.error:
+            return result.error
+        if response.error:
+            return response.error
+        if not isinstance(response.result, str):
+            return 'unexpected show output'
+        self.ingest(result.hostname, response.result)
+        return None
+
+    def tick(self, poll=True):
+        """
+        Poll every device and store the samples in the next slot of the ring buffer.
+
+        Args:
+            poll (bool, optional): Whether to poll the fleet; False only starts a new tick for ingest()
+                (default is True).
+
+        Returns:
+            dict: The error of every device that could not be sampled, keyed by hostname.
+        """
+        self._advance()
+        errors = {}
+        if poll:
+            for result in self.fleet.run('show', self.path):
+                error = self._store(result)
+                if error:
+                    errors[result.hostname] = error
+        return errors
+
+    async def atick(self):
+        """
+        Poll every device from the event loop and store the samples in the next slot of the ring buffer.
+
+        Returns:
+            dict: The error of every device that could not be sampled, keyed by hostname.
+        """
+        self._advance()
+        errors = {}
+        async for result in self.fleet.arun('show', self.path):
+            error = self._store(result)
+            if error:
+                errors[result.hostname] = error
+        return errors
+
+    def _slot(self, ago):
+        return (self._head - ago) % self.history
+
+    def latest(self):
+        """
+        Get the counters of the last tick.
+
+        Returns:
+            numpy.ndarray: A uint64 array with a row per key and a column per counter; rows not sampled in the
+            last tick hold their value from the tick the slot was last used in, see latest_valid().
+        """
+        return self._values[self._slot(0), :len(self.keys)]
+
+    def latest_valid(self):
+        """
+        Get which rows were sampled in the last tick.
+
+        Returns:
+            numpy.ndarray: A bool array with a value per key.
+        """
+        return ~np.isnan(self._times[self._slot(0), :len(self.keys)])
+
+    def deltas(self, window=1):
+        """
+        Get the counter increase of every row over a number of ticks, handling counter wraps and resets.
+
+        Args:
+            window (int, optional): The number of ticks to look back (default is 1).
+
+        Returns:
+            tuple: A uint64 array of the increases, with a row per key and a column per counter, and a float
+            array of the seconds between the samples of every row, NaN where either sample is missing.
+        """
+        if not 0 < window < self.history:
+            raise ValueError(f'window must be between 1 and {self.history - 1}')
+
+        rows = len(self.keys)
+        new = self._values[self._slot(0), :rows]
+        old = self._values[self._slot(window), :rows]
+        elapsed = self._times[self._slot(0), :rows] - self._times[self._slot(window), :rows]
+        if self.ticks <= window:
+            elapsed[:] = np.nan
+
+        delta = new - old
+        decreased = new < old
+        if decreased.any():
+            wrapped = decreased & (old <= _MAX_32)
+            delta[wrapped] = new[wrapped] + (np.uint64(_MAX_32) - old[wrapped]) + np.uint64(1)
+            reset = decreased & ~wrapped
+            delta[reset] = new[reset]
+        return delta, elapsed
+
+    def rates(self, window=1):
+        """
+        Get the per-second rate of every counter of every row.
+
+        Args:
+            window (int, optional): The number of ticks to average over (default is 1).
+
+        Returns:
+            numpy.ndarray: A float array with a row per key and a column per counter, NaN for rows not sampled
+            at both ends of the window.
+        """
+        delta, elapsed = self.deltas(window)
+        elapsed = np.where(elapsed > 0, elapsed, np.nan)
+        return delta.astype(np.float64) / elapsed[:, np.newaxis]
+
+    def top(self, counter, n=10, window=1):
+        """
+        Get the rows with the highest rate of a counter.
+
+        Args:
+            counter (str): The counter name, one of counters.
+            n (int, optional): The number of rows to return (default is 10).
+            window (int, optional): The number of ticks to average over (default is 1).
+
+        Returns:
+            list: The ((hostname, interface), rate) pairs, highest rate first.
+        """
+        rates = self.rates(window)[:, self.counters.index(counter)]
+        valid = np.flatnonzero(~np.isnan(rates))
+        if len(valid) > n:
+            valid = valid[np.argpartition(rates[valid], -n)[-n:]]
+        order = valid[np.argsort(rates[valid])[::-1]]
+        return [(self.keys[row], float(rates[row])) for row in order]
+
+    def series(self, hostname, interface, counter):
+        """
+        Get the history of one counter, oldest sample first.
+
+        Args:
+            hostname (str): The device.
+            interface (str): The interface name.
+            counter (str): The counter name, one of counters.
+
+        Returns:
+            tuple: The float array of sample times and the uint64 array of values, without missing samples.
+        """
+        row = self._rows[(hostname, interface)]
+        slots = [self._slot(ago) for ago in range(min(self.ticks, self.history) - 1, -1, -1)]
+        times = self._times[slots, row]
+        values = self._values[slots, row, self.counters.index(counter)]
+        present = ~np.isnan(times)
+        return times[present], values[present]
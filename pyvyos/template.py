@@ -0,0 +1,301 @@
+import string
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from . import json_backend
+from .config_diff import flatten_config
+
+_formatter = string.Formatter()
+
+
+class _Segment:
+    """
+    One path element of a template: a literal, or a format string with fields.
+    """
+    __slots__ = ('text', 'fields', 'value', 'encoded')
+
+    def __init__(self, text):
+        self.text = text
+        self.fields = frozenset(_field_names(text))
+        if not self.fields:
+            # Unescapes {{ and }} once, literals never change afterwards
+            self.value = sys.intern(text.format())
+            self.encoded = json_backend.dumps(self.value)
+        else:
+            self.value = None
+            self.encoded = None
+
+    def render(self, params):
+        if not self.fields:
+            return self.value, self.encoded
+        value = self.text.format_map(params)
+        return value, json_backend.dumps(value)
+
+
+class _Node:
+    __slots__ = ('segment', 'children', 'leaf', 'fields', 'memoized')
+
+    def __init__(self, segment):
+        self.segment = segment
+        self.children = {}
+        self.leaf = False
+        self.fields = frozenset()
+        # The sorted fields keying the memoized fragment of the node, None when it is not memoized
+        self.memoized = None
+
+
+def _field_names(text):
+    names = []
+    for _, field, _, _ in _formatter.parse(text):
+        if field is not None:
+            if not field:
+                raise ValueError(f'positional field in template element {text!r}, use a named field')
+            names.append(field.split('.')[0].split('[')[0])
+    return names
+
+
+class ConfigTemplate:
+    """
+    A parameterized configuration, compiled once and rendered cheaply for many devices.
+
+    Any key or value of the template may hold str.format fields, such as "{hostname}" or "10.{site}.0.1/24";
+    literal braces are doubled, as with str.format. The template is compiled into a tree of path elements, with
+    every literal element encoded to JSON once, so rendering only formats the elements holding fields. Where a
+    subtree depends on fewer parameters than its parent, its encoded operations are memoized by the values of
+    those parameters: static sections are encoded once for all devices, and a section depending only on {site}
+    once per site.
+
+    Rendering returns a RenderedConfig, which configure_set and configure_delete accept in place of a list of
+    paths. Its payload is joined from the memoized fragments, without building the list of paths or encoding
+    the long shared prefixes again; the paths themselves are only built when they are read.
+
+    Example:
+        template = ConfigTemplate({
+            "system": {"host-name": "{hostname}"},
+            "interfaces": {"ethernet": {"eth1": {"address": "10.{site}.0.1/24"}}},
+            "firewall": {"ipv4": {"name": {"WAN-IN": {"default-action": "drop"}}}},
+        })
+        for device, params in branches:
+            device.configure_set(template.render(params))
+
+    Args:
+        config (dict or list): The template, as a showConfig-style nested dict or a list of configure_set paths.
+        cache_size (int, optional): The number of memoized fragments kept (default is 4096).
+
+    Attributes:
+        fields (frozenset): The names of the template parameters.
+
+    Methods:
+        render(params=None, **kwargs): Render the template with parameter values.
+        cache_info(): Get the fragment cache counters.
+    """
+
+    def __init__(self, config, cache_size=4096):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+        self._root = _Node(None)
+        self._segments = {}
+        self._length = 0
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+        paths = flatten_config(config) if isinstance(config, dict) else config
+        for path in paths:
+            self._add(path)
+        self.fields = self._collect_fields()
+        self._mark_memoized()
+
+    def __len__(self):
+        return self._length
+
+    def _add(self, path):
+        node = self._root
+        for element in path:
+            child = node.children.get(element)
+            if child is None:
+                segment = self._segments.get(element)
+                if segment is None:
+                    segment = self._segments[element] = _Segment(str(element))
+                child = node.children[element] = _Node(segment)
+            node = child
+        if not node.leaf and node is not self._root:
+            node.leaf = True
+            self._length += 1
+
+    def _collect_fields(self):
+        """
+        Set the fields of every node: those of its own path and of every path below it.
+
+        Returns:
+            frozenset: The fields of the whole template.
+        """
+        stack = [(self._root, frozenset())]
+        order = []
+        while stack:
+            current, above = stack.pop()
+            own = above | current.segment.fields if current.segment is not None else above
+            current.fields = own
+            order.append(current)
+            stack.extend((child, own) for child in current.children.values())
+        for current in reversed(order):
+            for child in current.children.values():
+                current.fields = current.fields | child.fields
+        return self._root.fields
+
+    def _mark_memoized(self):
+        # Only a node depending on fewer parameters than its parent can be shared where the parent is not
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for child in node.children.values():
+                if child.fields != node.fields:
+                    child.memoized = tuple(sorted(child.fields))
+                stack.append(child)
+
+    def render(self, params=None, **kwargs):
+        """
+        Render the template with parameter values.
+
+        Args:
+            params (dict, optional): The parameter values (default is None).
+            **kwargs: More parameter values.
+
+        Returns:
+            RenderedConfig: The rendered configuration.
+        """
+        values = dict(params or {}, **kwargs)
+        missing = self.fields - values.keys()
+        if missing:
+            raise ValueError(f"missing template parameters: {', '.join(sorted(missing))}")
+        return RenderedConfig(self, values)
+
+    def _encode(self, op, params):
+        """
+        Encode the data of a configure request with every path of the template.
+
+        Returns:
+            str: The JSON list of operations.
+        """
+        prefix = '{"op":' + json_backend.dumps(op) + ',"path":['
+        parts = []
+        for child in self._root.children.values():
+            parts.append(self._block(child, '', op, prefix, params))
+        return '[' + ','.join(part for part in parts if part) + ']'
+
+    def _block(self, node, above, op, prefix, params):
+        """
+        Encode the operations of the paths under a node, joined with commas.
+        """
+        if node.memoized is not None:
+            key = (id(node), op, tuple(str(params[field]) for field in node.memoized))
+            with self._lock:
+                block = self._memo.get(key)
+                if block is not None:
+                    self._memo.move_to_end(key)
+                    self.hits += 1
+                    return block
+
+        encoded = above + ',' + node.segment.render(params)[1] if above else node.segment.render(params)[1]
+        parts = [prefix + encoded + ']}'] if node.leaf else []
+        for child in node.children.values():
+            parts.append(self._block(child, encoded, op, prefix, params))
+        block = ','.join(part for part in parts if part)
+
+        if node.memoized is not None:
+            with self._lock:
+                self.misses += 1
+                self._memo[key] = block
+                if len(self._memo) > self.cache_size:
+                    self._memo.popitem(last=False)
+        return block
+
+    def _paths(self, params):
+        """
+        Build the paths of the template, sharing prefix tuples between siblings.
+
+        Returns:
+            list: The paths, as lists.
+        """
+        paths = []
+        stack = [(child, ()) for child in reversed(list(self._root.children.values()))]
+        while stack:
+            node, above = stack.pop()
+            value = node.segment.render(params)[0] if node.segment.fields else node.segment.value
+            path = above + (sys.intern(value),)
+            if node.leaf:
+                paths.append(list(path))
+            stack.extend((child, path) for child in reversed(list(node.children.values())))
+        return paths
+
+    def cache_info(self):
+        """
+        Get the fragment cache counters.
+
+        Returns:
+            dict: The hits, misses and size of the cache of encoded fragments.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._memo)}
+
+
+class RenderedConfig(Sequence):
+    """
+    A ConfigTemplate rendered with parameter values, returned by ConfigTemplate.render().
+
+    It is a sequence of configure_set paths, built on first access, and can be passed as the path of
+    configure_set, configure_delete or configure_bulk. The payload of configure_set and configure_delete is
+    encoded from the memoized fragments of the template instead of from the paths.
+
+    Attributes:
+        template (ConfigTemplate): The rendered template.
+        params (dict): The parameter values.
+
+    Methods:
+        encode(op='set'): Encode the data of a configure request applying op to every path.
+        roots(): Get the first element of the paths, without building them.
+    """
+
+    def __init__(self, template, params):
+        self.template = template
+        self.params = params
+        self._paths = None
+        self._encoded = {}
+
+    def __len__(self):
+        return len(self.template)
+
+    def __getitem__(self, index):
+        if self._paths is None:
+            self._paths = self.template._paths(self.params)
+        return self._paths[index]
+
+    def __repr__(self):
+        return f'RenderedConfig({len(self)} paths, params={self.params!r})'
+
+    def encode(self, op='set'):
+        """
+        Encode the data of a configure request applying op to every path.
+
+        Args:
+            op (str, optional): The operation, 'set' or 'delete' (default is 'set').
+
+        Returns:
+            str: The JSON list of operations, the data of the request payload.
+        """
+        encoded = self._encoded.get(op)
+        if encoded is None:
+            encoded = self._encoded[op] = self.template._encode(op, self.params)
+        return encoded
+
+    def roots(self):
+        """
+        Get the first element of the paths, without building them.
+
+        Returns:
+            list: The distinct top-level path elements, in template order.
+        """
+        return [sys.intern(node.segment.render(self.params)[0]) for node in self.template._root.children.values()]
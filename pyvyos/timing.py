@@ -0,0 +1,96 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+@dataclass
+class RequestTiming:
+    """
+    Timing and size information of a single API request.
+
+    Times are in seconds. connect and tls are 0 when a pooled connection was reused, and None when the client
+    cannot measure them separately.
+
+    Attributes:
+        connect (float): The time spent opening the TCP connection.
+        tls (float): The time spent in the TLS handshake.
+        ttfb (float): The time from sending the request until the response headers arrived, connection setup included.
+        total (float): The time from sending the request until the response body was read.
+        request_bytes (int): The size of the request body.
+        response_bytes (int): The size of the response body.
+    """
+    connect: float
+    tls: float
+    ttfb: float
+    total: float
+    request_bytes: int
+    response_bytes: int
+
+
+_local = threading.local()
+
+
+def reset_connection_timing():
+    """
+    Reset the connection timing recorded for the current thread, before sending a request.
+    """
+    _local.connect = 0.0
+    _local.tls = 0.0
+
+
+def get_connection_timing():
+    """
+    Get the connect and TLS time recorded for the current thread since the last reset.
+
+    Returns:
+        tuple: The (connect, tls) times in seconds.
+    """
+    return getattr(_local, 'connect', 0.0), getattr(_local, 'tls', 0.0)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        _local.connect = time.perf_counter() - start
+        return sock
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        _local.connect = time.perf_counter() - start
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _local.tls = max(0.0, time.perf_counter() - start - _local.connect)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter whose connections record their TCP connect and TLS handshake times.
+
+    The times are recorded per thread and read with get_connection_timing().
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
@@ -0,0 +1,153 @@
+class Transaction:
+    """
+    Buffers set and delete operations and sends them as one configure request.
+
+    Created with VyDevice.transaction() and used as a context manager. Operations are sent in the order they
+    were added, in a single request and so a single commit on the device, when the with block exits without
+    an exception. If an exception escapes the block the buffered operations are discarded.
+
+    With max_operations set, the buffer is flushed every time it reaches that size, which bounds the request
+    size at the cost of splitting the change into several commits.
+
+    Args:
+        device (VyDevice): The device the operations are sent to.
+        max_operations (int, optional): Flush automatically once this many operations are buffered
+            (default is None, flush only on exit).
+
+    Attributes:
+        operations (list): The buffered (op, path) tuples.
+        responses (list): The ApiResponse of every flush so far.
+
+    Methods:
+        set(path): Buffer a set operation.
+        delete(path): Buffer a delete operation.
+        flush(): Send the buffered operations.
+        discard(): Drop the buffered operations.
+    """
+
+    def __init__(self, device, max_operations=None):
+        self.device = device
+        self.max_operations = max_operations
+        self.operations = []
+        self.responses = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+
+    def __len__(self):
+        return len(self.operations)
+
+    @property
+    def error(self):
+        """
+        str: The error of the first failed flush, or False if every flush succeeded.
+        """
+        for response in self.responses:
+            if response.error:
+                return response.error
+        return False
+
+    def _add(self, op, path):
+        if path and isinstance(path[0], list):
+            self.operations.extend((op, p) for p in path)
+        else:
+            self.operations.append((op, path))
+        return self.max_operations is not None and len(self.operations) >= self.max_operations
+
+    def set(self, path):
+        """
+        Buffer a set operation.
+
+        Args:
+            path (list): A configuration path, or a list of configuration paths.
+        """
+        if self._add('set', path):
+            self.flush()
+
+    def delete(self, path):
+        """
+        Buffer a delete operation.
+
+        Args:
+            path (list): A configuration path, or a list of configuration paths.
+        """
+        if self._add('delete', path):
+            self.flush()
+
+    def flush(self):
+        """
+        Send the buffered operations as one configure request.
+
+        Returns:
+            ApiResponse: The response of the request, or None if nothing was buffered.
+        """
+        operations, self.operations = self.operations, []
+        response = self.device.configure_batch(operations)
+        if response is not None:
+            self.responses.append(response)
+        return response
+
+    def discard(self):
+        """
+        Drop the buffered operations without sending them.
+        """
+        self.operations = []
+
+
+class AsyncTransaction(Transaction):
+    """
+    The AsyncVyDevice counterpart of Transaction, used with 'async with'.
+
+    set(), delete() and flush() are coroutines, since reaching max_operations sends a request.
+    """
+
+    def __enter__(self):
+        raise TypeError("AsyncTransaction must be used with 'async with'")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.flush()
+        else:
+            self.discard()
+
+    async def set(self, path):
+        """
+        Buffer a set operation.
+
+        Args:
+            path (list): A configuration path, or a list of configuration paths.
+        """
+        if self._add('set', path):
+            await self.flush()
+
+    async def delete(self, path):
+        """
+        Buffer a delete operation.
+
+        Args:
+            path (list): A configuration path, or a list of configuration paths.
+        """
+        if self._add('delete', path):
+            await self.flush()
+
+    async def flush(self):
+        """
+        Send the buffered operations as one configure request.
+
+        Returns:
+            ApiResponse: The response of the request, or None if nothing was buffered.
+        """
+        operations, self.operations = self.operations, []
+        response = await self.device.configure_batch(operations)
+        if response is not None:
+            self.responses.append(response)
+        return response
@@ -0,0 +1,461 @@
+import asyncio
+import functools
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+import urllib3
+
+from .timing import (RequestTiming, TimedHTTPAdapter, _TimedHTTPConnectionPool, _TimedHTTPSConnectionPool,
+                     reset_connection_timing, get_connection_timing)
+
+
+def new_session(pool_maxsize=10, keepalive=True):
+    """
+    Create a requests session with a timed connection pool.
+
+    Args:
+        pool_maxsize (int, optional): The maximum number of pooled connections (default is 10).
+        keepalive (bool, optional): Whether to keep connections open between requests (default is True).
+
+    Returns:
+        requests.Session: The new session.
+    """
+    session = requests.Session()
+    adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keepalive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def send_with_session(session, url, data, timeout, verify):
+    """
+    Send a form-encoded POST request over a requests session.
+
+    Args:
+        session (requests.Session): The session to send the request with.
+        url (str): The URL of the API command.
+        data (dict): The form fields of the request.
+        timeout (float): The request timeout in seconds.
+        verify (bool): Whether to verify SSL certificates.
+
+    Returns:
+        tuple: The (status, content, error, timing) of the request; content is the raw response body, or None
+        with status 0 and timing None for transport failures.
+    """
+    content = None
+    error = None
+    timing = None
+
+    try:
+        reset_connection_timing()
+        start = time.perf_counter()
+        resp = session.post(url, verify=verify, data=data, timeout=timeout, headers={})
+        content = resp.content
+        total = time.perf_counter() - start
+
+        connect, tls = get_connection_timing()
+        timing = RequestTiming(connect=connect, tls=tls, ttfb=resp.elapsed.total_seconds(), total=total,
+                               request_bytes=len(resp.request.body or ''), response_bytes=len(content))
+        status = resp.status_code
+
+    except requests.exceptions.ConnectionError as e:
+        error = 'connection error: ' + str(e)
+        status = 0
+
+    except requests.exceptions.Timeout as e:
+        error = 'timeout error: ' + str(e)
+        status = 0
+
+    except requests.exceptions.RequestException as e:
+        # Broken bodies, bad URLs, SSL failures: the request failed all the same
+        error = 'request error: ' + str(e)
+        status = 0
+
+    return status, content, error, timing
+
+
+class Transport:
+    """
+    Sends the HTTP requests of a device.
+
+    A transport owns the connections used to reach the device. VyDevice builds the payload and handles retries,
+    caching and hooks, and hands every request to its transport's send(); AsyncVyDevice awaits asend(), which
+    runs send() in a worker thread unless the transport has a native asyncio client. Subclasses implement
+    send() and close(). One transport may be shared by several devices, its connections are pooled per host.
+
+    Methods:
+        send(url, data, timeout, verify): Send a form-encoded POST request.
+        asend(url, data, timeout, verify): Send a form-encoded POST request from asyncio code.
+        close(): Close the pooled connections.
+        aclose(): Close the pooled connections from asyncio code.
+    """
+    name = None
+
+    def send(self, url, data, timeout, verify):
+        """
+        Send a form-encoded POST request.
+
+        Args:
+            url (str): The URL of the API command.
+            data (dict): The form fields of the request.
+            timeout (float): The request timeout in seconds.
+            verify (bool): Whether to verify SSL certificates.
+
+        Returns:
+            tuple: The (status, content, error, timing) of the request; content is the raw response body, or None
+            with status 0 and timing None for transport failures.
+        """
+        raise NotImplementedError
+
+    async def asend(self, url, data, timeout, verify):
+        """
+        Send a form-encoded POST request from asyncio code.
+
+        Args:
+            url (str): The URL of the API command.
+            data (dict): The form fields of the request.
+            timeout (float): The request timeout in seconds.
+            verify (bool): Whether to verify SSL certificates.
+
+        Returns:
+            tuple: The (status, content, error, timing) of the request, as returned by send().
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.send, url, data, timeout, verify))
+
+    def close(self):
+        """
+        Close the pooled connections.
+
+        The transport stays usable after close(); the next request opens a new connection.
+        """
+
+    async def aclose(self):
+        """
+        Close the pooled connections from asyncio code.
+        """
+        self.close()
+
+
+class RequestsTransport(Transport):
+    """
+    Sends requests with a pooled requests session, over HTTP/1.1.
+
+    This is what VyDevice uses when no transport is given; a RequestsTransport instance is useful to share one
+    pool between several devices.
+
+    Args:
+        pool_maxsize (int, optional): The maximum number of pooled connections per host (default is 10).
+        keepalive (bool, optional): Whether to keep connections open between requests (default is True).
+        idle_timeout (float, optional): Seconds a pooled connection may stay idle before it is discarded
+            instead of reused (default is 60, None disables idle eviction).
+
+    Methods:
+        session(): Get the pooled requests session.
+        send(url, data, timeout, verify): Send a form-encoded POST request.
+        close(): Close the pooled connections.
+    """
+    name = 'requests'
+
+    def __init__(self, pool_maxsize=10, keepalive=True, idle_timeout=60):
+        self.pool_maxsize = pool_maxsize
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self._session = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def session(self):
+        """
+        Get the pooled requests session, created on first use.
+
+        Returns:
+            requests.Session: The session of the transport.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._session is None:
+                self._session = new_session(self.pool_maxsize, self.keepalive)
+            elif self.idle_timeout is not None and now - self._last_used > self.idle_timeout:
+                self._session.close()
+            self._last_used = now
+            return self._session
+
+    def send(self, url, data, timeout, verify):
+        return send_with_session(self.session(), url, data, timeout, verify)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class Urllib3Transport(Transport):
+    """
+    Sends requests over a urllib3 pool manager directly, over HTTP/1.1.
+
+    It skips the request preparation, hooks and cookie handling of requests, which takes a noticeable share of
+    the time of small requests to a device on the local network.
+
+    Args:
+        pool_maxsize (int, optional): The maximum number of pooled connections per host (default is 10).
+        keepalive (bool, optional): Whether to keep connections open between requests (default is True).
+        idle_timeout (float, optional): Seconds the pool may stay idle before its connections are discarded
+            instead of reused (default is 60, None disables idle eviction).
+
+    Methods:
+        send(url, data, timeout, verify): Send a form-encoded POST request.
+        close(): Close the pooled connections.
+    """
+    name = 'urllib3'
+
+    def __init__(self, pool_maxsize=10, keepalive=True, idle_timeout=60):
+        self.pool_maxsize = pool_maxsize
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self._managers = {}
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _manager(self, verify):
+        with self._lock:
+            now = time.monotonic()
+            if self.idle_timeout is not None and now - self._last_used > self.idle_timeout:
+                for manager in self._managers.values():
+                    manager.clear()
+            self._last_used = now
+
+            manager = self._managers.get(verify)
+            if manager is None:
+                manager = urllib3.PoolManager(maxsize=self.pool_maxsize, block=False,
+                                              cert_reqs='CERT_REQUIRED' if verify else 'CERT_NONE')
+                manager.pool_classes_by_scheme = {
+                    'http': _TimedHTTPConnectionPool,
+                    'https': _TimedHTTPSConnectionPool,
+                }
+                self._managers[verify] = manager
+            return manager
+
+    def send(self, url, data, timeout, verify):
+        content = None
+        error = None
+        timing = None
+
+        body = urlencode(data)
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        if not self.keepalive:
+            headers['Connection'] = 'close'
+
+        try:
+            manager = self._manager(verify)
+            reset_connection_timing()
+            start = time.perf_counter()
+            resp = manager.request('POST', url, body=body, headers=headers, timeout=urllib3.Timeout(total=timeout),
+                                   retries=False, redirect=False, preload_content=False)
+            ttfb = time.perf_counter() - start
+            try:
+                content = resp.read()
+            finally:
+                resp.release_conn()
+            total = time.perf_counter() - start
+
+            connect, tls = get_connection_timing()
+            timing = RequestTiming(connect=connect, tls=tls, ttfb=ttfb, total=total,
+                                   request_bytes=len(body), response_bytes=len(content))
+            status = resp.status
+
+        except urllib3.exceptions.NewConnectionError as e:
+            # Derives from ConnectTimeoutError, a refused connection is no timeout
+            error = 'connection error: ' + str(e)
+            status = 0
+
+        except urllib3.exceptions.TimeoutError as e:
+            error = 'timeout error: ' + str(e)
+            status = 0
+
+        except urllib3.exceptions.HTTPError as e:
+            error = 'connection error: ' + str(e)
+            status = 0
+
+        return status, content, error, timing
+
+    def close(self):
+        with self._lock:
+            managers, self._managers = self._managers, {}
+        for manager in managers.values():
+            manager.clear()
+
+
+class Http2Transport(Transport):
+    """
+    Sends requests over HTTP/2 with httpx, multiplexing concurrent requests over one connection per device.
+
+    With HTTP/1.1 a connection carries one request at a time, so n threads or tasks querying one device need n
+    connections, or queue behind each other. Over HTTP/2 concurrent retrieve and show calls are sent as streams
+    of a single connection: one TLS handshake per device, and a slow request does not hold up the others.
+    Sync and async requests use separate clients, the async client is bound to the event loop that created it.
+
+    HTTP/2 is negotiated with ALPN on https; a device that only speaks HTTP/1.1 is served over HTTP/1.1
+    connections instead. Plain http uses HTTP/1.1 unless prior_knowledge is set.
+
+    Requires the optional httpx and h2 dependencies (pip install pyvyos[http2]).
+
+    Args:
+        pool_maxsize (int, optional): The maximum number of connections per host; further connections are only
+            opened once the device's limit of concurrent streams is reached (default is 10).
+        keepalive (bool, optional): Whether to keep connections open between requests (default is True).
+        idle_timeout (float, optional): Seconds an idle connection is kept open (default is 60, None keeps idle
+            connections open).
+        prior_knowledge (bool, optional): Whether to speak HTTP/2 on plain http without negotiation, for
+            servers that accept HTTP/2 cleartext (default is False).
+
+    Methods:
+        send(url, data, timeout, verify): Send a form-encoded POST request.
+        asend(url, data, timeout, verify): Send a form-encoded POST request from asyncio code.
+        close(): Close the sync client connections.
+        aclose(): Close all the client connections.
+    """
+    name = 'http2'
+
+    def __init__(self, pool_maxsize=10, keepalive=True, idle_timeout=60, prior_knowledge=False):
+        # Imported here, importing httpx costs every pyvyos import more than the rest of the client
+        try:
+            import httpx
+            import h2  # noqa: F401 - httpx only fails on the first HTTP/2 connection without it
+        except ImportError:
+            message = "Http2Transport requires httpx and h2, install them with 'pip install pyvyos[http2]'"
+            raise ImportError(message) from None
+        self._httpx = httpx
+
+        self.pool_maxsize = pool_maxsize
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self.prior_knowledge = prior_knowledge
+        self._clients = {}
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    def _client_args(self, verify):
+        limits = self._httpx.Limits(max_connections=self.pool_maxsize,
+                              max_keepalive_connections=self.pool_maxsize if self.keepalive else 0,
+                              keepalive_expiry=self.idle_timeout)
+        return {'http2': True, 'http1': not self.prior_knowledge, 'verify': verify, 'limits': limits}
+
+    def _client(self, verify):
+        with self._lock:
+            client = self._clients.get(verify)
+            if client is None:
+                client = self._clients[verify] = self._httpx.Client(**self._client_args(verify))
+            return client
+
+    def _async_client(self, verify):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(verify)
+            if client is None or client[0] is not loop:
+                client = (loop, self._httpx.AsyncClient(**self._client_args(verify)))
+                self._async_clients[verify] = client
+            return client[1]
+
+    def send(self, url, data, timeout, verify):
+        content = None
+        error = None
+        timing = None
+
+        try:
+            client = self._client(verify)
+            start = time.perf_counter()
+            with client.stream('POST', url, data=data, timeout=timeout) as resp:
+                ttfb = time.perf_counter() - start
+                content = resp.read()
+            total = time.perf_counter() - start
+
+            timing = RequestTiming(connect=None, tls=None, ttfb=ttfb, total=total,
+                                   request_bytes=len(urlencode(data)), response_bytes=len(content))
+            status = resp.status_code
+
+        except self._httpx.TimeoutException as e:
+            error = 'timeout error: ' + str(e)
+            status = 0
+
+        except self._httpx.TransportError as e:
+            error = 'connection error: ' + str(e)
+            status = 0
+
+        return status, content, error, timing
+
+    async def asend(self, url, data, timeout, verify):
+        content = None
+        error = None
+        timing = None
+
+        try:
+            client = self._async_client(verify)
+            start = time.perf_counter()
+            async with client.stream('POST', url, data=data, timeout=timeout) as resp:
+                ttfb = time.perf_counter() - start
+                content = await resp.aread()
+            total = time.perf_counter() - start
+
+            timing = RequestTiming(connect=None, tls=None, ttfb=ttfb, total=total,
+                                   request_bytes=len(urlencode(data)), response_bytes=len(content))
+            status = resp.status_code
+
+        except self._httpx.TimeoutException as e:
+            error = 'timeout error: ' + str(e)
+            status = 0
+
+        except self._httpx.TransportError as e:
+            error = 'connection error: ' + str(e)
+            status = 0
+
+        return status, content, error, timing
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+    async def aclose(self):
+        self.close()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients, self._async_clients = self._async_clients, {}
+        for client_loop, client in clients.values():
+            # A client of another event loop cannot be closed from this one, it is dropped
+            if client_loop is loop:
+                await client.aclose()
+
+
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'urllib3': Urllib3Transport,
+    'http2': Http2Transport,
+}
+
+
+def get_transport(transport, **kwargs):
+    """
+    Get a transport by name.
+
+    Args:
+        transport (str or Transport): The name of the transport, 'requests', 'urllib3' or 'http2', or a
+            Transport, returned as is.
+        **kwargs: The arguments of the transport, such as pool_maxsize.
+
+    Returns:
+        Transport: The transport.
+    """
+    if isinstance(transport, Transport):
+        return transport
+
+    cls = TRANSPORTS.get(transport)
+    if cls is None:
+        raise ValueError(f"unknown transport {transport!r}, expected one of: {', '.join(TRANSPORTS)}")
+    return cls(**kwargs)
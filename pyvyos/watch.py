@@ -0,0 +1,526 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+
+from .device import ApiResponse
+
+_MISSING = object()
+
+
+@dataclass
+class ChangeEvent:
+    """
+    A change of the configuration found by a ConfigWatcher.
+
+    Attributes:
+        kind (str): 'added', 'removed' or 'changed'.
+        path (list): The path of the node or leaf that changed.
+        old (object): The previous value or subtree, None when added.
+        new (object): The new value or subtree, None when removed.
+    """
+    kind: str
+    path: list
+    old: object = None
+    new: object = None
+
+
+def merkle_hashes(config, prefix=()):
+    """
+    Compute the Merkle hash of every node of a configuration.
+
+    The hash of a node covers its keys and the hashes of its children, so two subtrees with the same hash are
+    equal and a change anywhere changes the hashes of all its ancestors, and only theirs.
+
+    Args:
+        config (dict): A showConfig-style nested dict.
+        prefix (tuple, optional): The path of config, prepended to every key of the result (default is empty).
+
+    Returns:
+        dict: The hash of every non-leaf node, keyed by path tuple.
+    """
+    hashes = {}
+    _hash_node(config, tuple(prefix), hashes)
+    return hashes
+
+
+def _hash_node(node, path, hashes):
+    if not isinstance(node, dict):
+        return hashlib.sha256(b'v' + json.dumps(node).encode()).digest()
+
+    digest = hashlib.sha256(b'd')
+    for key in sorted(node):
+        digest.update(key.encode() + b'\0')
+        digest.update(_hash_node(node[key], path + (key,), hashes))
+    hashes[path] = digest.digest()
+    return hashes[path]
+
+
+def _rehash_node(node, path, hashes):
+    """
+    Recompute the hash of a node from the stored hashes of its children, as _hash_node would.
+    """
+    digest = hashlib.sha256(b'd')
+    for key in sorted(node):
+        child = node[key]
+        digest.update(key.encode() + b'\0')
+        digest.update(hashes[path + (key,)] if isinstance(child, dict) else _hash_node(child, path + (key,), hashes))
+    hashes[path] = digest.digest()
+
+
+def _drop_hashes(node, path, hashes):
+    if isinstance(node, dict):
+        hashes.pop(path, None)
+        for key, child in node.items():
+            _drop_hashes(child, path + (key,), hashes)
+
+
+def _log_entries(log):
+    # Drop the revision numbers, which shift with every commit
+    return [line.split(None, 1)[-1] for line in log.splitlines() if line[:1].isdigit()]
+
+
+def _changed_sections(diff):
+    """
+    Get the top-level sections changed by a commit from its 'show system commit diff' output.
+
+    Args:
+        diff (str): The output: blocks of a '[section ...]' header followed by its changed lines, and changed
+            top-level nodes as '+ name {' or '- name {' lines, with context lines in configuration syntax.
+
+    Returns:
+        set: The names of the changed top-level sections, None when the output cannot be attributed to them.
+    """
+    sections = set()
+    header = None
+    top = None
+    for line in diff.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            # A blank line ends the block of a header
+            header = None
+            continue
+        if stripped.startswith('[') and stripped.endswith(']'):
+            words = stripped[1:-1].split()
+            if words and words[0] == 'edit':
+                words = words[1:]
+            header = words[0] if words else None
+            if header is not None:
+                sections.add(header)
+            continue
+        if header is not None:
+            continue
+
+        changed = line[0] in '+-'
+        rest = line[1:] if changed else line
+        word = rest.split()[0]
+        if len(rest) - len(rest.lstrip()) <= 1:
+            if word != '}':
+                top = word
+                if changed:
+                    sections.add(word)
+        elif changed:
+            if top is None:
+                return None
+            sections.add(top)
+    return sections
+
+
+def compare_configs(old, new, old_hashes, new_hashes, prefix=()):
+    """
+    List the changes between two configurations, descending only into subtrees whose hashes differ.
+
+    Args:
+        old (dict): The previous configuration.
+        new (dict): The current configuration.
+        old_hashes (dict): The merkle_hashes of old.
+        new_hashes (dict): The merkle_hashes of new.
+        prefix (tuple, optional): The path of both configurations (default is empty).
+
+    Returns:
+        list: The ChangeEvent objects, in configuration order.
+    """
+    events = []
+    stack = [(tuple(prefix), old, new)]
+    while stack:
+        path, old_node, new_node = stack.pop()
+        if old_node is _MISSING:
+            events.append(ChangeEvent(kind='added', path=list(path), new=new_node))
+        elif new_node is _MISSING:
+            events.append(ChangeEvent(kind='removed', path=list(path), old=old_node))
+        elif isinstance(old_node, dict) and isinstance(new_node, dict) and old_node and new_node:
+            if old_hashes.get(path) == new_hashes.get(path):
+                continue
+            children = [(path + (key,), child, new_node.get(key, _MISSING)) for key, child in old_node.items()]
+            children.extend((path + (key,), _MISSING, child) for key, child in new_node.items() if key not in old_node)
+            stack.extend(reversed(children))
+        elif old_node != new_node:
+            events.append(ChangeEvent(kind='changed', path=list(path), old=old_node, new=new_node))
+    return events
+
+
+class _WatcherBase:
+    """
+    The state and comparison shared by ConfigWatcher and AsyncConfigWatcher.
+    """
+
+    PROBE_PATH = ["system", "commit"]
+    # Beyond this many new commits, retrieving the watched sections beats reading the diff of every commit
+    DIFF_LIMIT = 8
+
+    def __init__(self, device, sections=None, probe=True):
+        self.device = device
+        self.sections = [list(section) for section in sections] if sections else [[]]
+        self.probe = probe
+        self.config = None
+        self.hashes = {}
+        self.probes = 0
+        self.fetches = 0
+        self._marker = None
+        self._pending_marker = None
+
+    def _probe_unchanged(self, response):
+        """
+        Check a commit log probe, remembering it for the next poll.
+
+        Returns:
+            bool: True when the commit log is the same as at the last poll.
+        """
+        if response.error:
+            return False
+        unchanged = self._marker is not None and response.result == self._marker
+        # The probe is sent before the retrieval, so a commit in between is seen again by the next probe
+        self._pending_marker = response.result
+        return unchanged
+
+    def _new_commits(self):
+        """
+        Count the commits made since the last poll by lining up the commit logs of both polls.
+
+        Returns:
+            int: The number of new commits, None when the logs cannot be lined up.
+        """
+        if self.config is None or not isinstance(self._marker, str) or not isinstance(self._pending_marker, str):
+            return None
+        old = _log_entries(self._marker)
+        new = _log_entries(self._pending_marker)
+        count = len(new) - len(old)
+        if count > 0 and new[count:] == old:
+            return count
+        # Once the log is full, its oldest entries drop out as new ones come in
+        counts = [count for count in range(1, len(new)) if new[count:] == old[:len(new) - count]]
+        return counts[0] if len(counts) == 1 else None
+
+    def _diff_paths(self):
+        """
+        List the commit diffs to read to find the changed top-level sections.
+
+        Returns:
+            list: The show paths of the diffs of the new commits, None when the watched sections are retrieved
+            whole.
+        """
+        count = self._new_commits()
+        if count is None or count > self.DIFF_LIMIT:
+            return None
+        return [self.PROBE_PATH + ["diff", str(revision)] for revision in range(count)]
+
+    def _changed(self, diffs, recheck):
+        """
+        Get the top-level sections changed by the new commits.
+
+        Args:
+            diffs (list): The responses of the commit diffs listed by _diff_paths.
+            recheck (ApiResponse): A commit log probe sent after the diffs.
+
+        Returns:
+            set: The changed top-level sections, None when they are unknown.
+        """
+        # A commit between the probe and the diffs renumbers the revisions, the diffs would then miss a commit
+        if recheck.error or recheck.result != self._pending_marker:
+            return None
+        changed = set()
+        for response in diffs:
+            sections = None if response.error else _changed_sections(response.result or '')
+            if sections is None:
+                return None
+            changed |= sections
+        return changed
+
+    def _pieces(self, changed):
+        """
+        List the parts of the watched sections to retrieve.
+
+        Args:
+            changed (set): The changed top-level sections, None to retrieve every watched section.
+
+        Returns:
+            list: The (section, key) pairs to retrieve; key is a top-level section of a watched whole
+            configuration, or None to retrieve the whole watched section.
+        """
+        if changed is None:
+            return [(tuple(section), None) for section in self.sections]
+        pieces = []
+        for section in self.sections:
+            if not section:
+                pieces.extend(((), key) for key in sorted(changed))
+            elif section[0] in changed:
+                pieces.append((tuple(section), None))
+        return pieces
+
+    @staticmethod
+    def _piece_path(section, key):
+        return list(section) if key is None else list(section) + [key]
+
+    def _apply(self, fetched):
+        """
+        Update the known configuration with the retrieved parts and list the changes.
+
+        Only the hashes of the retrieved parts are computed again, and the hash of the whole configuration when
+        parts of it were retrieved.
+
+        Args:
+            fetched (list): The (section, key, subtree or _MISSING) triples of the pieces retrieved.
+
+        Returns:
+            list: The ChangeEvent objects, empty on the first poll.
+        """
+        first = self.config is None
+        config = {} if first else dict(self.config)
+        parents = {section for section, key, _ in fetched if key is not None}
+        for section in parents:
+            config[section] = dict(config.get(section) or {})
+
+        events = []
+        for section, key, subtree in fetched:
+            if key is None:
+                path = section
+                old = config.get(section, _MISSING)
+            else:
+                path = section + (key,)
+                old = config[section].get(key, _MISSING)
+            hashes = merkle_hashes(subtree, path) if subtree is not _MISSING else {}
+            if not first and not (old is _MISSING and subtree is _MISSING):
+                events.extend(compare_configs(old, subtree, self.hashes, hashes, path))
+            _drop_hashes(old, path, self.hashes)
+            self.hashes.update(hashes)
+
+            if key is None:
+                config[section] = subtree
+            elif subtree is _MISSING:
+                config[section].pop(key, None)
+            else:
+                config[section][key] = subtree
+        for section in parents:
+            _rehash_node(config[section], section, self.hashes)
+
+        self.config = config
+        self._marker = self._pending_marker
+        return events
+
+    def _invalidate_cache(self, pieces):
+        # The configuration changed behind the back of the device, so cached results of the retrieved paths are stale
+        if self.device.cache is not None:
+            for section, key in pieces:
+                self.device.cache.invalidate(self._piece_path(section, key))
+
+    @staticmethod
+    def _section_result(response, exists=None):
+        """
+        Get the subtree of a section from its retrieve response.
+
+        Args:
+            response (ApiResponse): The showConfig response of the section.
+            exists (ApiResponse, optional): The exists response of the section, checked when showConfig failed.
+
+        Returns:
+            object: The subtree, _MISSING for an empty section, None when the response is an error.
+        """
+        if not response.error:
+            return response.result
+        if exists is not None and not exists.error and exists.result is False:
+            return _MISSING
+        return None
+
+    def current(self):
+        """
+        Get the last known configuration of the watched sections.
+
+        Returns:
+            dict: The subtrees keyed by section path tuple, None before the first poll.
+        """
+        if self.config is None:
+            return None
+        return {section: subtree for section, subtree in self.config.items() if subtree is not _MISSING}
+
+
+class ConfigWatcher(_WatcherBase):
+    """
+    Polls a device for configuration changes, transferring the configuration only when it was committed.
+
+    Every poll first probes the commit log with 'show system commit', a response of a few hundred bytes. Only
+    when it changed does the watcher read the diff of every new commit ('show system commit diff <n>') to learn
+    which top-level sections they touched, and retrieve only those: the watched sections under them, or the
+    touched top-level sections themselves when the whole configuration is watched. The retrieved subtrees are
+    compared with the last known ones by Merkle hash, descending only into subtrees whose hash differs, and the
+    differences are reported as ChangeEvent objects. VyOS does not expose configuration hashes itself, so the
+    hashes are kept client-side and the commit log stands in for a remote root hash. When the diffs cannot be
+    used, after more than DIFF_LIMIT commits or on devices without them, every watched section is retrieved.
+
+    Example:
+        watcher = ConfigWatcher(device, sections=[["interfaces"], ["firewall"]])
+        for response in watcher.watch(interval=60):
+            for event in response.result or []:
+                print(event.kind, event.path)
+
+    Args:
+        device (VyDevice): The device to watch.
+        sections (list, optional): The configuration paths to watch (default is the whole configuration).
+        probe (bool, optional): Whether to skip the retrieval while the commit log is unchanged (default is True).
+
+    Attributes:
+        probes (int): The number of commit log and commit diff probes sent.
+        fetches (int): The number of section retrievals sent.
+        hashes (dict): The Merkle hashes of the last known configuration.
+
+    Methods:
+        poll(): Check the device once for changes.
+        watch(interval=60): Poll forever, yielding the polls that found changes or failed.
+        current(): Get the last known configuration of the watched sections.
+    """
+
+    def poll(self):
+        """
+        Check the device once for changes.
+
+        The first poll records the configuration and reports no changes.
+
+        Returns:
+            ApiResponse: An ApiResponse object whose result is the list of ChangeEvent objects on success.
+        """
+        response = None
+        if self.probe:
+            self.probes += 1
+            response = self.device.show(self.PROBE_PATH)
+            if self._probe_unchanged(response) and self.config is not None:
+                response.result = []
+                return response
+
+        changed = None
+        paths = self._diff_paths()
+        if paths:
+            self.probes += len(paths) + 1
+            diffs = [self.device.show(path) for path in paths]
+            changed = self._changed(diffs, self.device.show(self.PROBE_PATH))
+
+        pieces = self._pieces(changed)
+        self._invalidate_cache(pieces)
+        fetched = []
+        for section, key in pieces:
+            path = self._piece_path(section, key)
+            self.fetches += 1
+            response = self.device.retrieve_show_config(path)
+            subtree = self._section_result(response)
+            if subtree is None and path:
+                # showConfig fails on paths without configuration, tell those apart from real errors
+                subtree = self._section_result(response, self.device.retrieve_exists(path))
+            if subtree is None:
+                return response
+            fetched.append((section, key, subtree))
+
+        return ApiResponse(status=200, request=response.request, result=self._apply(fetched), error=False,
+                           timing=response.timing)
+
+    def watch(self, interval=60):
+        """
+        Poll forever, yielding the polls that found changes or failed.
+
+        Args:
+            interval (float, optional): The seconds between polls (default is 60).
+
+        Yields:
+            ApiResponse: The responses of poll() with changes or an error.
+        """
+        while True:
+            response = self.poll()
+            if response.error or response.result:
+                yield response
+            time.sleep(interval)
+
+
+class AsyncConfigWatcher(_WatcherBase):
+    """
+    Polls an AsyncVyDevice for configuration changes; the asynchronous counterpart of ConfigWatcher, reading
+    the commit diffs and retrieving the changed sections concurrently.
+
+    Example:
+        watcher = AsyncConfigWatcher(device)
+        async for response in watcher.watch(interval=60):
+            ...
+
+    Args:
+        device (AsyncVyDevice): The device to watch.
+        sections (list, optional): The configuration paths to watch (default is the whole configuration).
+        probe (bool, optional): Whether to skip the retrieval while the commit log is unchanged (default is True).
+
+    Methods:
+        poll(): Check the device once for changes.
+        watch(interval=60): Poll forever, yielding the polls that found changes or failed.
+        current(): Get the last known configuration of the watched sections.
+    """
+
+    async def poll(self):
+        """
+        Check the device once for changes, retrieving the watched sections concurrently.
+
+        Returns:
+            ApiResponse: An ApiResponse object whose result is the list of ChangeEvent objects on success.
+        """
+        response = None
+        if self.probe:
+            self.probes += 1
+            response = await self.device.show(self.PROBE_PATH)
+            if self._probe_unchanged(response) and self.config is not None:
+                response.result = []
+                return response
+
+        changed = None
+        paths = self._diff_paths()
+        if paths:
+            self.probes += len(paths) + 1
+            diffs = await asyncio.gather(*(self.device.show(path) for path in paths))
+            changed = self._changed(diffs, await self.device.show(self.PROBE_PATH))
+
+        pieces = self._pieces(changed)
+        self._invalidate_cache(pieces)
+        self.fetches += len(pieces)
+        paths = [self._piece_path(section, key) for section, key in pieces]
+        responses = await asyncio.gather(*(self.device.retrieve_show_config(path) for path in paths))
+
+        fetched = []
+        for (section, key), path, response in zip(pieces, paths, responses):
+            subtree = self._section_result(response)
+            if subtree is None and path:
+                subtree = self._section_result(response, await self.device.retrieve_exists(path))
+            if subtree is None:
+                return response
+            fetched.append((section, key, subtree))
+
+        return ApiResponse(status=200, request=response.request, result=self._apply(fetched), error=False,
+                           timing=response.timing)
+
+    async def watch(self, interval=60):
+        """
+        Poll forever, yielding the polls that found changes or failed.
+
+        Args:
+            interval (float, optional): The seconds between polls (default is 60).
+
+        Yields:
+            ApiResponse: The responses of poll() with changes or an error.
+        """
+        while True:
+            response = await self.poll()
+            if response.error or response.result:
+                yield response
+            await asyncio.sleep(interval)
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import unittest
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from pyvyos.device import ApiResponse
+from pyvyos.async_device import AsyncVyDevice
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class TestAsyncVyDevice(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+
+        async def handler(request):
+            form = await request.post()
+            data = json.loads(form['data'])
+            self.requests.append((request.path, form['key'], data))
+            if form['key'] != 'key':
+                return web.json_response({'success': False, 'data': None, 'error': 'invalid key'})
+            return web.json_response({'success': True, 'data': data, 'error': None})
+
+        app = web.Application()
+        app.router.add_post('/{command}', handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.device = AsyncVyDevice(hostname='127.0.0.1', apikey='key', protocol='http', port=port)
+
+    async def asyncTearDown(self):
+        await self.device.close()
+        await self.runner.cleanup()
+
+    async def test_001_retrieve_show_config(self):
+        response = await self.device.retrieve_show_config(["interfaces"])
+        self.assertIsInstance(response, ApiResponse)
+        self.assertEqual(response.status, 200)
+        self.assertFalse(response.error)
+        self.assertEqual(response.result, {'op': 'showConfig', 'path': ['interfaces']})
+        self.assertNotIn('key', response.request)
+        self.assertGreater(response.timing.connect, 0)
+        self.assertGreater(response.timing.response_bytes, 0)
+
+    async def test_002_payload_matches_sync_client(self):
+        path = [["interfaces", "dummy", "dum1"], ["interfaces", "dummy", "dum2"]]
+        response = await self.device.configure_set(path)
+        expected = self.device._get_payload('set', path=path)
+        self.assertEqual(response.request['data'], expected['data'])
+
+    async def test_003_concurrent_requests(self):
+        responses = await asyncio.gather(*(self.device.show(["version", str(i)]) for i in range(50)))
+        self.assertTrue(all(r.status == 200 and not r.error for r in responses))
+        self.assertEqual(len(self.requests), 50)
+
+    async def test_004_config_file_save_without_path(self):
+        response = await self.device.config_file_save(file="/config/test.config")
+        self.assertEqual(response.result, {'op': 'save', 'path': [], 'file': '/config/test.config'})
+
+    async def test_005_api_error(self):
+        self.device.apikey = 'wrong'
+        response = await self.device.show(["version"])
+        self.assertEqual(response.error, 'invalid key')
+
+    async def test_006_transaction(self):
+        async with self.device.transaction() as tx:
+            await tx.delete(["interfaces", "dummy", "dum1"])
+            await tx.set(["interfaces", "dummy", "dum2"])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual([d['op'] for d in self.requests[0][2]], ['delete', 'set'])
+
+    async def test_007_connection_error(self):
+        device = AsyncVyDevice(hostname='127.0.0.1', apikey='key', protocol='http', port=1)
+        response = await device.show(["version"])
+        await device.close()
+        self.assertEqual(response.status, 0)
+        self.assertTrue(response.error.startswith('connection error'))
+
+
+if __name__ == '__main__':
+    unittest.main()
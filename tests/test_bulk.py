@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import unittest
+
+from pyvyos.bulk import BulkPusher, AsyncBulkPusher
+from pyvyos.device import ApiResponse
+
+
+class FakeDevice:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def _respond(self, operations):
+        with self.lock:
+            self.batches.append(operations)
+        bad = [p for _, p in operations if p[-1].startswith('bad')]
+        error = f'invalid value {bad[0][-1]}' if bad else False
+        return ApiResponse(status=200, request={}, result=None, error=error)
+
+    def configure_batch(self, operations):
+        return self._respond(operations)
+
+
+class UnreachableDevice(FakeDevice):
+    def _respond(self, operations):
+        with self.lock:
+            self.batches.append(operations)
+        return ApiResponse(status=0, request={}, result={}, error='connection error: refused')
+
+
+class FakeAsyncDevice(FakeDevice):
+    async def configure_batch(self, operations):
+        await asyncio.sleep(0)
+        return self._respond(operations)
+
+
+def operations(count, bad=()):
+    return [('set', ['firewall', 'group', 'address-group', 'G', 'address', f'bad{i}' if i in bad else f'10.0.{i // 256}.{i % 256}'])
+            for i in range(count)]
+
+
+class TestBulkPusher(unittest.TestCase):
+    def test_001_chunks_by_byte_budget(self):
+        device = FakeDevice()
+        result = BulkPusher(device, initial_bytes=4096, min_bytes=4096, max_bytes=4096).push(operations(1000))
+        self.assertTrue(result.success)
+        self.assertEqual(sum(len(b) for b in device.batches), 1000)
+        self.assertGreater(result.requests, 10)
+        self.assertTrue(all(len(b) < 100 for b in device.batches))
+
+    def test_002_bisection_isolates_failures(self):
+        device = FakeDevice()
+        result = BulkPusher(device, initial_bytes=1024 * 1024, max_in_flight=1).push(operations(1024, bad={17, 900}))
+        self.assertFalse(result.success)
+        self.assertEqual([r.path[-1] for r in result.failed], ['bad17', 'bad900'])
+        self.assertEqual(result.failed[0].error, 'invalid value bad17')
+        self.assertEqual(len(result.results), 1024)
+        # Every good path is committed exactly once
+        committed = [p[-1] for b in device.batches if not any(p[-1].startswith('bad') for _, p in b) for _, p in b]
+        self.assertEqual(len(committed), len(set(committed)))
+        self.assertEqual(len(committed), 1022)
+        self.assertLess(result.requests, 50)
+
+    def test_003_budget_adapts_to_latency(self):
+        pusher = BulkPusher(FakeDevice(), initial_bytes=8192, target_latency=1)
+        pusher._start(operations(10))
+        pusher._adapt([0], 0.25, False)
+        self.assertEqual(pusher.budget, 8192)
+        pusher._sizes = [8192]
+        pusher._adapt([0], 0.25, False)
+        self.assertEqual(pusher.budget, 16384)
+        pusher._adapt([0], 4, 'timeout')
+        self.assertEqual(pusher.budget, 8192)
+
+    def test_004_async_push(self):
+        device = FakeAsyncDevice()
+        result = asyncio.run(AsyncBulkPusher(device, initial_bytes=2048).push(operations(300, bad={5})))
+        self.assertEqual([r.path[-1] for r in result.failed], ['bad5'])
+        self.assertEqual(sum(r.success for r in result.results), 299)
+
+    def test_005_transport_failure_aborts(self):
+        device = UnreachableDevice()
+        result = BulkPusher(device, initial_bytes=4096, max_in_flight=1).push(operations(1000))
+        self.assertEqual(result.requests, 1)
+        self.assertEqual(len(device.batches), 1)
+        self.assertEqual(len(result.failed), 1000)
+        self.assertEqual(result.failed[0].error, 'connection error: refused')
+        self.assertEqual(result.failed[-1].error, 'not sent: connection error: refused')
+
+
+if __name__ == '__main__':
+    unittest.main()
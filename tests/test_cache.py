@@ -0,0 +1,99 @@
+import json
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from pyvyos.cache import ResponseCache
+from pyvyos.device import VyDevice
+
+CONFIG = {
+    'interfaces': {'ethernet': {'eth0': {'address': ['192.0.2.1/24', '2001:db8::1/64'], 'description': 'WAN'}}},
+    'system': {'host-name': 'vyos'},
+}
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_001_exact_hit_and_miss(self):
+        cache = ResponseCache()
+        self.assertEqual(cache.get('showConfig', ['system']), (False, None))
+        cache.put('showConfig', ['system'], CONFIG['system'])
+        self.assertEqual(cache.get('showConfig', ['system']), (True, CONFIG['system']))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+
+    def test_002_served_from_ancestor(self):
+        cache = ResponseCache()
+        cache.put('showConfig', [], CONFIG)
+        self.assertEqual(cache.get('showConfig', ['interfaces', 'ethernet']), (True, CONFIG['interfaces']['ethernet']))
+        self.assertEqual(cache.get('returnValues', ['system', 'host-name']), (True, ['vyos']))
+        self.assertEqual(cache.get('returnValues', ['interfaces', 'ethernet', 'eth0', 'address']),
+                         (True, ['192.0.2.1/24', '2001:db8::1/64']))
+        self.assertEqual(cache.get('showConfig', ['protocols']), (False, None))
+        self.assertEqual(cache.get('returnValues', ['system']), (False, None))
+
+    def test_003_ttl_expiry(self):
+        cache = ResponseCache(ttl=10)
+        with mock.patch('pyvyos.cache.time.monotonic', return_value=100):
+            cache.put('showConfig', ['system'], CONFIG['system'])
+        with mock.patch('pyvyos.cache.time.monotonic', return_value=111):
+            self.assertEqual(cache.get('showConfig', ['system']), (False, None))
+        self.assertEqual(len(cache), 0)
+
+    def test_004_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        cache.put('showConfig', ['a'], {})
+        cache.put('showConfig', ['b'], {})
+        cache.get('showConfig', ['a'])
+        cache.put('showConfig', ['c'], {})
+        self.assertTrue(cache.get('showConfig', ['a'])[0])
+        self.assertFalse(cache.get('showConfig', ['b'])[0])
+
+    def test_005_invalidate_overlapping_paths(self):
+        cache = ResponseCache()
+        cache.put('showConfig', [], CONFIG)
+        cache.put('showConfig', ['interfaces', 'ethernet', 'eth0'], {})
+        cache.put('showConfig', ['system'], CONFIG['system'])
+        cache.invalidate(['interfaces', 'ethernet'])
+        self.assertFalse(cache.get('showConfig', [])[0])
+        self.assertFalse(cache.get('showConfig', ['interfaces', 'ethernet', 'eth0'])[0])
+        self.assertTrue(cache.get('showConfig', ['system'])[0])
+
+    def test_006_stale_generation_is_not_stored(self):
+        cache = ResponseCache()
+        generation = cache.generation
+        cache.invalidate(['system'])
+        cache.put('showConfig', ['system'], CONFIG['system'], generation)
+        self.assertEqual(len(cache), 0)
+
+
+class TestVyDeviceCache(unittest.TestCase):
+    def setUp(self):
+        self.device = VyDevice(hostname='127.0.0.1', apikey='key', cache=True)
+        self.session = mock.Mock()
+        self.session.post.return_value = mock.Mock(
+            status_code=200, content=json.dumps({'success': True, 'data': CONFIG, 'error': None}).encode(),
+            elapsed=timedelta(0), request=mock.Mock(body=''))
+        self.device._get_session = lambda: self.session
+
+    def test_001_read_through(self):
+        first = self.device.retrieve_show_config([])
+        second = self.device.retrieve_return_values(['system', 'host-name'])
+        self.assertEqual(first.result, CONFIG)
+        self.assertEqual(second.result, ['vyos'])
+        self.assertNotIn('key', second.request)
+        self.assertEqual(self.session.post.call_count, 1)
+        self.assertEqual(self.device.cache.stats()['hits'], 1)
+
+    def test_002_writes_invalidate(self):
+        self.device.retrieve_show_config([])
+        self.device.configure_set(['system', 'host-name', 'router'])
+        self.device.retrieve_show_config([])
+        self.assertEqual(self.session.post.call_count, 3)
+
+    def test_003_config_file_load_clears(self):
+        self.device.retrieve_show_config(['system'])
+        self.device.config_file_load(file='/config/config.boot')
+        self.assertEqual(len(self.device.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
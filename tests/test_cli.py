@@ -0,0 +1,73 @@
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pyvyos.cli import main
+from pyvyos.mock_server import MockVyOSServer, generate_config
+
+
+class TestCli(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockVyOSServer(config=generate_config(interfaces=2)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def run_cli(self, *argv, stdin=''):
+        stdout = io.StringIO()
+        args = ['--host', '127.0.0.1', '--port', str(self.server.port), '--protocol', 'http', '--apikey', 'key']
+        status = main(args + list(argv), stdin=io.StringIO(stdin), stdout=stdout)
+        return status, stdout.getvalue()
+
+    def test_001_import_is_lazy(self):
+        code = "import sys, pyvyos.cli; print(sorted(m for m in ('requests', 'aiohttp', 'urllib3') if m in sys.modules))"
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_002_retrieve(self):
+        status, output = self.run_cli('retrieve', 'interfaces', 'ethernet', 'eth0', 'mtu')
+        self.assertEqual(status, 0)
+        self.assertEqual(output, '1500\n')
+
+    def test_003_error_exit_status(self):
+        status, output = self.run_cli('--json', 'delete', 'interfaces', 'dummy', 'missing')
+        self.assertEqual(status, 1)
+        self.assertTrue(json.loads(output)['error'])
+
+    def test_004_batch(self):
+        operations = [{'id': i, 'command': 'configure', 'path': ['interfaces', 'dummy', f'dum{i}', 'description', 'x']}
+                      for i in range(20)]
+        operations.append({'id': 'check', 'command': 'retrieve', 'op': 'exists', 'path': ['interfaces', 'dummy', 'dum19']})
+        stdin = '\n'.join(json.dumps(operation) for operation in operations) + '\n\n'
+        status, output = self.run_cli('batch', '--workers', '4', '--max-pending', '2', stdin=stdin)
+        results = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(status, 0)
+        self.assertEqual([result['id'] for result in results], list(range(20)) + ['check'])
+        self.assertIs(results[-1]['result'], True)
+
+    def test_005_batch_per_device_concurrency(self):
+        with MockVyOSServer() as other:
+            stdin = '\n'.join([
+                json.dumps({'device': 'a', 'command': 'show', 'path': ['version']}),
+                json.dumps({'device': 'b', 'command': 'show', 'path': ['version']}),
+                'not json',
+            ])
+            inventory = {'a': {'hostname': '127.0.0.1', 'port': self.server.port},
+                         'b': {'hostname': '127.0.0.1', 'port': other.port}}
+            with tempfile.NamedTemporaryFile('w', suffix='.json') as inventory_file:
+                json.dump(inventory, inventory_file)
+                inventory_file.flush()
+                status, output = self.run_cli('--inventory', inventory_file.name, 'batch', stdin=stdin)
+            results = [json.loads(line) for line in output.splitlines()]
+            self.assertEqual(status, 1)
+            self.assertEqual(sorted(result.get('device', '') for result in results), ['', 'a', 'b'])
+            self.assertEqual(other.request_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
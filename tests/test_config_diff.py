@@ -0,0 +1,112 @@
+import json
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from pyvyos.config_diff import config_diff, flatten_config
+from pyvyos.device import VyDevice
+
+CURRENT = {
+    'interfaces': {
+        'ethernet': {
+            'eth0': {'address': ['192.0.2.1/24', '2001:db8::1/64'], 'description': 'WAN'},
+            'eth1': {'address': '198.51.100.1/24', 'disable': {}},
+        },
+    },
+    'system': {'host-name': 'vyos'},
+}
+
+
+class TestConfigDiff(unittest.TestCase):
+    def test_001_flatten_config(self):
+        self.assertEqual(flatten_config(CURRENT), [
+            ('interfaces', 'ethernet', 'eth0', 'address', '192.0.2.1/24'),
+            ('interfaces', 'ethernet', 'eth0', 'address', '2001:db8::1/64'),
+            ('interfaces', 'ethernet', 'eth0', 'description', 'WAN'),
+            ('interfaces', 'ethernet', 'eth1', 'address', '198.51.100.1/24'),
+            ('interfaces', 'ethernet', 'eth1', 'disable'),
+            ('system', 'host-name', 'vyos'),
+        ])
+
+    def test_002_no_changes(self):
+        self.assertFalse(config_diff(CURRENT, CURRENT))
+        self.assertFalse(config_diff(flatten_config(CURRENT), CURRENT))
+
+    def test_003_minimal_changes(self):
+        desired = {
+            'interfaces': {
+                'ethernet': {
+                    'eth0': {'address': ['192.0.2.1/24', '192.0.2.2/24'], 'description': 'uplink'},
+                },
+            },
+            'system': {'host-name': 'vyos'},
+        }
+        diff = config_diff(desired, CURRENT)
+        self.assertEqual(diff.delete, [
+            ['interfaces', 'ethernet', 'eth0', 'address', '2001:db8::1/64'],
+            ['interfaces', 'ethernet', 'eth0', 'description', 'WAN'],
+            ['interfaces', 'ethernet', 'eth1'],
+        ])
+        self.assertEqual(diff.set, [
+            ['interfaces', 'ethernet', 'eth0', 'address', '192.0.2.2/24'],
+            ['interfaces', 'ethernet', 'eth0', 'description', 'uplink'],
+        ])
+        self.assertEqual(diff.operations()[0][0], 'delete')
+
+    def test_004_whole_section_added_and_removed(self):
+        diff = config_diff([['protocols', 'static', 'route', '0.0.0.0/0', 'next-hop', '192.0.2.254']], CURRENT)
+        self.assertEqual(diff.delete, [['interfaces'], ['system']])
+        self.assertEqual(diff.set, [['protocols', 'static', 'route', '0.0.0.0/0', 'next-hop', '192.0.2.254']])
+
+    def test_005_single_value_replaced(self):
+        # showConfig returns a multi-value node holding one value as a plain string
+        current = {'interfaces': {'ethernet': {'eth1': {'address': '10.0.0.1/24'}}}}
+        diff = config_diff({'interfaces': {'ethernet': {'eth1': {'address': '10.0.0.2/24'}}}}, current)
+        self.assertEqual(diff.delete, [['interfaces', 'ethernet', 'eth1', 'address', '10.0.0.1/24']])
+        self.assertEqual(diff.set, [['interfaces', 'ethernet', 'eth1', 'address', '10.0.0.2/24']])
+
+    def test_006_value_replaced_by_valueless_node(self):
+        diff = config_diff({'a': {'b': {}}}, {'a': {'b': 'x'}})
+        self.assertEqual(diff.delete, [['a', 'b', 'x']])
+        self.assertEqual(diff.set, [['a', 'b']])
+
+    def test_007_large_configuration(self):
+        current = {'firewall': {'ipv4': {'name': {'WAN': {'rule': {
+            str(i): {'action': 'accept', 'destination': {'port': str(i)}} for i in range(20000)}}}}}}
+        desired = json.loads(json.dumps(current))
+        rules = desired['firewall']['ipv4']['name']['WAN']['rule']
+        rules['5']['action'] = 'drop'
+        del rules['6']
+        start = time.monotonic()
+        diff = config_diff(desired, current)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(diff.delete, [['firewall', 'ipv4', 'name', 'WAN', 'rule', '5', 'action', 'accept'],
+                                       ['firewall', 'ipv4', 'name', 'WAN', 'rule', '6']])
+        self.assertEqual(diff.set, [['firewall', 'ipv4', 'name', 'WAN', 'rule', '5', 'action', 'drop']])
+
+
+class TestVyDeviceConfigureSync(unittest.TestCase):
+    def test_001_single_mixed_request(self):
+        device = VyDevice(hostname='127.0.0.1', apikey='key')
+        session = mock.Mock()
+        session.post.return_value = mock.Mock(
+            status_code=200, content=b'{"success": true, "data": null, "error": null}',
+            elapsed=timedelta(0), request=mock.Mock(body=''))
+        device._get_session = lambda: session
+
+        response = device.configure_sync({'ethernet': {'eth0': {'description': 'uplink'}}},
+                                         path=['interfaces'], current=CURRENT['interfaces'])
+        self.assertEqual(session.post.call_count, 1)
+        self.assertEqual(json.loads(response.request['data']), [
+            {'op': 'delete', 'path': ['interfaces', 'ethernet', 'eth0', 'address']},
+            {'op': 'delete', 'path': ['interfaces', 'ethernet', 'eth0', 'description', 'WAN']},
+            {'op': 'delete', 'path': ['interfaces', 'ethernet', 'eth1']},
+            {'op': 'set', 'path': ['interfaces', 'ethernet', 'eth0', 'description', 'uplink']},
+        ])
+        self.assertIsNone(device.configure_sync(CURRENT['interfaces'], path=['interfaces'],
+                                                current=CURRENT['interfaces']))
+
+
+if __name__ == '__main__':
+    unittest.main()
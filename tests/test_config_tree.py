@@ -0,0 +1,58 @@
+import unittest
+
+from pyvyos.config_tree import ConfigTree
+from pyvyos.device import ApiResponse
+
+CONFIG = {
+    'interfaces': {
+        'ethernet': {
+            'eth0': {'address': ['192.0.2.1/24', '2001:db8::1/64'], 'description': 'WAN'},
+            'eth1': {'address': '198.51.100.1/24', 'disable': {}},
+        },
+    },
+    'system': {'host-name': 'vyos'},
+}
+
+
+class TestConfigTree(unittest.TestCase):
+    def setUp(self):
+        self.tree = ConfigTree(CONFIG)
+
+    def test_001_exists(self):
+        self.assertTrue(self.tree.exists(['interfaces', 'ethernet', 'eth0']))
+        self.assertTrue(self.tree.exists(['interfaces', 'ethernet', 'eth0', 'address', '192.0.2.1/24']))
+        self.assertTrue(self.tree.exists(['interfaces', 'ethernet', 'eth1', 'disable']))
+        self.assertFalse(self.tree.exists(['interfaces', 'ethernet', 'eth2']))
+        self.assertIn(['system', 'host-name', 'vyos'], self.tree)
+
+    def test_002_return_values(self):
+        self.assertEqual(self.tree.return_values(['interfaces', 'ethernet', 'eth0', 'address']),
+                         ['192.0.2.1/24', '2001:db8::1/64'])
+        self.assertEqual(self.tree.return_values(['interfaces', 'ethernet', 'eth1', 'address']), ['198.51.100.1/24'])
+        self.assertEqual(self.tree.return_values(['interfaces', 'ethernet']), [])
+        self.assertEqual(self.tree.return_value(['system', 'host-name']), 'vyos')
+        self.assertIsNone(self.tree.return_value(['system', 'domain-name']))
+
+    def test_003_list_nodes_and_get(self):
+        self.assertEqual(self.tree.list_nodes(['interfaces', 'ethernet']), ['eth0', 'eth1'])
+        self.assertEqual(self.tree.list_nodes(['system', 'host-name']), [])
+        self.assertIs(self.tree.get(['system']), CONFIG['system'])
+        self.assertIsNone(self.tree.get(['system', 'host-name', 'vyos']))
+
+    def test_004_iter_prefix(self):
+        self.assertEqual(list(self.tree.iter_prefix(['interfaces', 'ethernet', 'eth1'])), [
+            (('interfaces', 'ethernet', 'eth1', 'address'), ['198.51.100.1/24']),
+            (('interfaces', 'ethernet', 'eth1', 'disable'), []),
+        ])
+        self.assertEqual(len(list(self.tree.iter_prefix())), 5)
+        self.assertEqual(list(self.tree.iter_prefix(['protocols'])), [])
+
+    def test_005_from_response(self):
+        tree = ConfigTree.from_response(ApiResponse(status=200, request={}, result=CONFIG, error=False))
+        self.assertEqual(tree.return_value(['system', 'host-name']), 'vyos')
+        with self.assertRaises(ValueError):
+            ConfigTree.from_response(ApiResponse(status=200, request={}, result={}, error='failed'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+from pyvyos.device import VyDevice
+
+
+class TestVyDeviceSession(unittest.TestCase):
+    def setUp(self):
+        self.device = VyDevice(hostname="127.0.0.1", apikey="key", protocol="http", port=8080, idle_timeout=30)
+
+    def tearDown(self):
+        self.device.close()
+
+    def test_001_session_is_reused(self):
+        session = self.device._get_session()
+        self.assertIs(session, self.device._get_session())
+        self.assertEqual(session.get_adapter("http://127.0.0.1")._pool_maxsize, 10)
+
+    def test_002_close_drops_session(self):
+        session = self.device._get_session()
+        self.device.close()
+        self.assertIsNone(self.device._session)
+        self.assertIsNot(session, self.device._get_session())
+
+    def test_003_context_manager_closes(self):
+        with VyDevice(hostname="127.0.0.1", apikey="key") as device:
+            device._get_session()
+            self.assertIsNotNone(device._session)
+        self.assertIsNone(device._session)
+
+    def test_004_idle_connections_are_evicted(self):
+        session = self.device._get_session()
+        self.device._last_used -= 60
+        with mock.patch.object(session, "close") as close:
+            self.assertIs(session, self.device._get_session())
+            close.assert_called_once()
+
+    def test_005_keepalive_disabled(self):
+        device = VyDevice(hostname="127.0.0.1", apikey="key", keepalive=False)
+        self.assertEqual(device._get_session().headers["Connection"], "close")
+        device.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
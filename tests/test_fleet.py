@@ -0,0 +1,69 @@
+import asyncio
+import time
+import unittest
+
+from pyvyos.fleet import VyFleet, FleetResult
+
+
+def definitions(count):
+    return [{'hostname': f'10.0.0.{i}', 'apikey': 'key'} for i in range(count)]
+
+
+class TestVyFleet(unittest.TestCase):
+    def test_001_runs_in_parallel(self):
+        fleet = VyFleet(definitions(20), max_workers=20)
+        start = time.monotonic()
+        results = list(fleet.run(lambda device, delay: time.sleep(delay) or device.hostname, 0.2))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(sorted(r.response for r in results), sorted(d['hostname'] for d in fleet.definitions))
+        self.assertTrue(all(isinstance(r, FleetResult) and not r.error for r in results))
+
+    def test_002_results_stream_in_completion_order(self):
+        delays = {'10.0.0.0': 0.3, '10.0.0.1': 0.0}
+        fleet = VyFleet(definitions(2))
+        results = fleet.run(lambda device: time.sleep(delays[device.hostname]))
+        self.assertEqual(next(results).hostname, '10.0.0.1')
+        self.assertEqual(next(results).hostname, '10.0.0.0')
+
+    def test_003_per_device_timeout(self):
+        fleet = VyFleet(definitions(2), timeout=0.1)
+        delays = {'10.0.0.0': 1.0, '10.0.0.1': 0.0}
+        start = time.monotonic()
+        results = {r.hostname: r for r in fleet.run(lambda device: time.sleep(delays[device.hostname]))}
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(results['10.0.0.0'].error, 'timeout')
+        self.assertFalse(results['10.0.0.1'].error)
+
+    def test_004_timeout_of_queued_devices(self):
+        # More devices than workers: the queued ones get their timeout once they start
+        fleet = VyFleet(definitions(3), max_workers=1, timeout=0.1)
+        start = time.monotonic()
+        results = list(fleet.run(lambda device: time.sleep(0.5)))
+        self.assertEqual([r.error for r in results], ['timeout'] * 3)
+        self.assertTrue(all(r.elapsed < 0.3 for r in results))
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_005_exceptions_are_reported(self):
+        fleet = VyFleet(definitions(1))
+        result = next(fleet.run(lambda device: 1 / 0))
+        self.assertEqual(result.error, 'ZeroDivisionError: division by zero')
+
+    def test_006_async_run(self):
+        async def probe(device, delay):
+            await asyncio.sleep(delay)
+            return device.hostname
+
+        async def main():
+            fleet = VyFleet(definitions(200), max_workers=100, timeout=1)
+            results = [r async for r in fleet.arun(probe, 0.1)]
+            await fleet.aclose()
+            return results
+
+        start = time.monotonic()
+        results = asyncio.run(main())
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(len(results), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import unittest
+
+from pyvyos.async_device import aiohttp
+from pyvyos.device import ApiResponse
+from pyvyos.inventory import ConfigInventory, ConfigPool, FrozenConfig
+from pyvyos.mock_server import MockVyOSServer, generate_config
+
+
+def branch_config(number):
+    config = generate_config(interfaces=4, firewall_rules=20)
+    config['system']['host-name'] = f'branch{number}'
+    config['interfaces']['ethernet']['eth0']['address'] = [f'10.0.{number}.1/24']
+    return config
+
+
+def envelope(config):
+    return json.dumps({'success': True, 'data': config, 'error': None}).encode()
+
+
+class TestConfigPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = ConfigPool()
+
+    def test_001_mapping(self):
+        config = branch_config(1)
+        frozen = self.pool.loads(json.dumps(config))
+        self.assertIsInstance(frozen, FrozenConfig)
+        self.assertEqual(frozen, config)
+        self.assertEqual(frozen.to_dict(), config)
+        self.assertEqual(frozen['interfaces']['ethernet']['eth0']['address'], ('10.0.1.1/24',))
+        self.assertIn('firewall', frozen)
+        self.assertNotIn('nothing', frozen)
+        self.assertEqual(list(frozen), list(config))
+        self.assertIsNone(frozen.get('nothing'))
+        self.assertRaises(KeyError, frozen.__getitem__, 'nothing')
+
+        # Nodes above the scan limit are searched through an index
+        rules = frozen['firewall']['ipv4']['name']['WAN-IN']['rule']
+        self.assertGreater(len(rules), 8)
+        self.assertEqual(rules['20'], config['firewall']['ipv4']['name']['WAN-IN']['rule']['20'])
+
+    def test_002_shared_subtrees(self):
+        first = self.pool.loads(json.dumps(branch_config(1)))
+        second = self.pool.freeze(branch_config(2))
+        self.assertIsNot(first, second)
+        self.assertIs(first['firewall'], second['firewall'])
+        self.assertIs(first['interfaces']['ethernet']['eth1'], second['interfaces']['ethernet']['eth1'])
+        self.assertIsNot(first['interfaces']['ethernet']['eth0'], second['interfaces']['ethernet']['eth0'])
+        self.assertIs(self.pool.freeze(branch_config(1)), first)
+        self.assertEqual(hash(first), hash(self.pool.freeze(first)))
+
+    def test_003_unused_nodes_dropped(self):
+        config = self.pool.loads(json.dumps(branch_config(1)))
+        size = len(self.pool)
+        self.pool.loads(json.dumps(branch_config(2)))
+        self.assertEqual(len(self.pool), size)
+        del config
+        self.assertEqual(len(self.pool), 0)
+
+
+class TestConfigInventory(unittest.TestCase):
+    def setUp(self):
+        self.inventory = ConfigInventory()
+        for number in range(10):
+            self.inventory.add(f'branch{number}', envelope(branch_config(number)))
+
+    def test_001_add(self):
+        self.assertEqual(len(self.inventory), 10)
+        self.assertEqual(self.inventory['branch3']['system']['host-name'], 'branch3')
+        self.assertEqual(self.inventory.stats()['devices'], 10)
+
+        response = ApiResponse.from_content(200, {}, envelope(branch_config(10)))
+        self.inventory.add('branch10', response)
+        self.assertIs(self.inventory['branch10']['firewall'], self.inventory['branch0']['firewall'])
+        self.inventory.add('branch11', branch_config(11))
+        self.assertEqual(self.inventory.values(["system", "host-name"])['branch11'], ('branch11',))
+
+        failed = ApiResponse.from_content(200, {}, b'{"success": false, "data": null, "error": "denied"}')
+        self.assertRaises(ValueError, self.inventory.add, 'branch12', failed)
+        self.assertRaises(ValueError, self.inventory.add, 'branch12', ApiResponse(400, {}, {}, 'http error'))
+        self.inventory.remove('branch11')
+        self.assertNotIn('branch11', self.inventory)
+
+    def test_002_find(self):
+        self.assertEqual(self.inventory.find(["interfaces", "*", "*", "address"], "10.0.7.1/24"), ['branch7'])
+        self.assertEqual(len(self.inventory.find(["interfaces", "ethernet", "eth1"])), 10)
+        self.assertEqual(len(self.inventory.find(["interfaces", "ethernet"], "eth3")), 10)
+        self.assertEqual(self.inventory.find(["system", "host-name"], "branch2"), ['branch2'])
+        self.assertEqual(self.inventory.find(["interfaces", "*", "*", "address", "*"]), [])
+        self.assertEqual(self.inventory.find(["service", "nothing"]), [])
+
+    def test_003_values(self):
+        values = self.inventory.values(["interfaces", "ethernet", "*", "address"])
+        self.assertEqual(len(values), 10)
+        self.assertIn('10.0.4.1/24', values['branch4'])
+        self.assertEqual(self.inventory.values(["interfaces", "ethernet"])['branch0'], ('eth0', 'eth1', 'eth2', 'eth3'))
+        self.assertEqual(self.inventory.values(["nothing"]), {})
+
+
+class TestInventoryFleet(unittest.TestCase):
+    def test_001_refresh(self):
+        with MockVyOSServer(config=branch_config(1)) as server, MockVyOSServer(error_rate=1.0) as failing:
+            failing_kwargs = dict(failing.device_kwargs(), hostname='localhost')
+            inventory = ConfigInventory([server.device_kwargs(), failing_kwargs])
+            errors = inventory.refresh()
+            inventory.fleet.close()
+        self.assertEqual(list(errors), ['localhost'])
+        self.assertEqual(inventory.find(["system", "host-name"], "branch1"), ['127.0.0.1'])
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_002_arefresh(self):
+        async def refresh(inventory):
+            errors = await inventory.arefresh()
+            await inventory.fleet.aclose()
+            return errors
+
+        with MockVyOSServer(config=branch_config(2)) as server:
+            inventory = ConfigInventory([server.device_kwargs()], path=["interfaces"])
+            self.assertEqual(asyncio.run(refresh(inventory)), {})
+        self.assertIn('eth3', inventory['127.0.0.1']['ethernet'])
+
+
+if __name__ == '__main__':
+    unittest.main()
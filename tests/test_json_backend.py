@@ -0,0 +1,91 @@
+import json
+import threading
+import unittest
+from unittest import mock
+from pyvyos import json_backend
+from pyvyos.device import ApiResponse
+
+
+class TestJsonBackend(unittest.TestCase):
+    def tearDown(self):
+        json_backend.set_backend()
+
+    def test_001_backends_round_trip(self):
+        data = [{"op": "set", "path": ["interfaces", "ethernet", "eth0", "description", "ünïcode"]}]
+        for name in json_backend.BACKENDS:
+            try:
+                self.assertEqual(json_backend.set_backend(name), name)
+            except ImportError:
+                continue
+            encoded = json_backend.dumps(data)
+            self.assertIsInstance(encoded, str)
+            self.assertEqual(json.loads(encoded), data)
+            self.assertEqual(json_backend.loads(encoded.encode()), data)
+
+    def test_002_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            json_backend.set_backend("yaml")
+
+
+class TestLazyApiResponse(unittest.TestCase):
+    def test_001_decoded_on_access(self):
+        response = ApiResponse.from_content(200, {}, b'{"success": true, "data": {"a": 1}, "error": null}')
+        self.assertIsNotNone(response.raw)
+        self.assertEqual(response.result, {"a": 1})
+        self.assertIsNone(response.raw)
+        self.assertFalse(response.error)
+
+    def test_002_api_error(self):
+        response = ApiResponse.from_content(200, {}, b'{"success": false, "data": null, "error": "bad path"}')
+        self.assertEqual(response.error, "bad path")
+        self.assertEqual(response.result, {})
+
+    def test_003_invalid_json(self):
+        response = ApiResponse.from_content(200, {}, b'<html>')
+        self.assertEqual(response.error, "json decode error")
+
+    def test_004_http_error_is_not_decoded(self):
+        response = ApiResponse.from_content(500, {}, b'<html>')
+        self.assertIsNone(response.raw)
+        self.assertEqual(response.error, "http error")
+
+    def test_005_equality_and_slots(self):
+        lazy = ApiResponse.from_content(200, {}, b'{"success": true, "data": "x", "error": null}')
+        self.assertEqual(lazy, ApiResponse(status=200, request={}, result="x", error=False))
+        with self.assertRaises(AttributeError):
+            lazy.other = 1
+
+    def test_006_setter_decodes_first(self):
+        response = ApiResponse.from_content(200, {}, b'{"success": true, "data": "x", "error": null}')
+        response.result = "y"
+        self.assertEqual(response.result, "y")
+        self.assertFalse(response.error)
+
+    def test_007_concurrent_reader(self):
+        response = ApiResponse.from_content(200, {}, b'{"success": true, "data": "x", "error": null}')
+        decoding = threading.Event()
+        release = threading.Event()
+        loads = json_backend.loads
+
+        def slow_loads(content):
+            decoding.set()
+            release.wait()
+            return loads(content)
+
+        seen = []
+        with mock.patch.object(json_backend, 'loads', slow_loads):
+            first = threading.Thread(target=lambda: seen.append(response.result))
+            first.start()
+            decoding.wait()
+            # Mid-decode, a reader sees the raw body, never cleared fields
+            self.assertIsNotNone(response.raw)
+            second = threading.Thread(target=lambda: seen.append((response.result, response.error)))
+            second.start()
+            release.set()
+            first.join()
+            second.join()
+        self.assertEqual(sorted(map(str, seen)), ["('x', False)", 'x'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pyvyos.device import VyDevice
+from pyvyos.async_device import AsyncVyDevice, aiohttp
+from pyvyos.limiter import HostLimiter, TokenBucket, get_limiter
+from pyvyos.mock_server import MockVyOSServer
+
+
+class _PeakLimiter(HostLimiter):
+    # Records the highest number of requests in flight at once
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.peak = 0
+
+    def _started(self, start):
+        with self._lock:
+            self.peak = max(self.peak, self.in_flight)
+        return super()._started(start)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_001_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, burst=3)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        waits = [bucket.reserve() for _ in range(3)]
+        for expected, wait in zip((0.1, 0.2, 0.3), waits):
+            self.assertAlmostEqual(wait, expected, delta=0.01)
+
+    def test_002_limiter_paces_requests(self):
+        limiter = HostLimiter(rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.release(limiter.acquire(), 200, latency=False)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(limiter.stats()['throttled'], 5)
+
+
+class TestHostLimiter(unittest.TestCase):
+    def test_001_decrease_once_per_round(self):
+        limiter = HostLimiter(initial_limit=8)
+        tokens = [limiter.acquire() for _ in range(8)]
+        for token in tokens:
+            limiter.release(token, 503)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.decreases, 1)
+
+        limiter.release(limiter.acquire(), 0)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_002_increase_on_success(self):
+        limiter = HostLimiter(initial_limit=2, max_limit=4)
+        for _ in range(20):
+            limiter.release(limiter.acquire(), 200, latency=False)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.increases, 2)
+
+    def test_003_latency_congestion(self):
+        limiter = HostLimiter(initial_limit=8, latency_target=0.05)
+        token = limiter.acquire()
+        limiter.release(token - 0.1, 200)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_004_latency_per_kind(self):
+        limiter = HostLimiter(initial_limit=8)
+        show = VyDevice._latency_kind("show", "show", ["version"])
+        retrieve = VyDevice._latency_kind("retrieve", "showConfig", [])
+        self.assertNotEqual(show, retrieve)
+        for _ in range(20):
+            limiter.release(limiter.acquire() - 0.001, 200, kind=show)
+        # A large retrieve is slower than a show command without the device being congested
+        for _ in range(5):
+            limiter.release(limiter.acquire() - 0.5, 200, kind=retrieve)
+        self.assertEqual(limiter.decreases, 0)
+        self.assertGreaterEqual(limiter.limit, 8)
+
+        limiter.release(limiter.acquire() - 5, 200, kind=retrieve)
+        self.assertEqual(limiter.decreases, 1)
+
+    def test_005_waiters_woken_in_order(self):
+        limiter = HostLimiter(initial_limit=1, max_limit=1)
+        token = limiter.acquire()
+        order = []
+
+        def worker(number):
+            token = limiter.acquire()
+            order.append(number)
+            limiter.release(token, 200, latency=False)
+
+        threads = []
+        for number in range(3):
+            threads.append(threading.Thread(target=worker, args=(number,)))
+            threads[-1].start()
+            while limiter.stats()['waiting'] < number + 1:
+                time.sleep(0.001)
+        limiter.release(token, 200, latency=False)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, [0, 1, 2])
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_006_shared_per_hostname(self):
+        self.assertIs(get_limiter('limiter-test'), get_limiter('limiter-test'))
+        self.assertIsNot(get_limiter('limiter-test'), get_limiter('limiter-other'))
+
+
+class TestDeviceLimiter(unittest.TestCase):
+    def test_001_concurrency_capped(self):
+        with MockVyOSServer(latency=0.05) as server:
+            limiter = _PeakLimiter(initial_limit=2, max_limit=2)
+            device = VyDevice(limiter=limiter, **server.device_kwargs())
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                responses = list(executor.map(lambda _: device.show(["version"]), range(8)))
+            device.close()
+        self.assertTrue(all(not response.error for response in responses))
+        self.assertEqual(limiter.peak, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_002_backs_off_on_errors(self):
+        with MockVyOSServer(error_rate=1.0) as server:
+            device = VyDevice(limiter=HostLimiter(initial_limit=16), **server.device_kwargs())
+            for _ in range(5):
+                self.assertEqual(device.show(["version"]).status, 503)
+            device.close()
+        self.assertEqual(device.limiter.limit, 1)
+
+    def test_003_stream_releases_slot(self):
+        with MockVyOSServer() as server:
+            device = VyDevice(limiter=HostLimiter(initial_limit=1), **server.device_kwargs())
+            stream = device.show_stream(["interfaces"])
+            lines = iter(stream)
+            next(lines)
+            self.assertEqual(device.limiter.in_flight, 1)
+            stream.close()
+            self.assertEqual(device.limiter.in_flight, 0)
+            self.assertFalse(device.show(["version"]).error)
+            device.close()
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncDeviceLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_001_concurrency_capped(self):
+        limiter = _PeakLimiter(initial_limit=3, max_limit=3)
+        with MockVyOSServer(latency=0.05) as server:
+            async with AsyncVyDevice(limiter=limiter, **server.device_kwargs()) as device:
+                responses = await asyncio.gather(*(device.show(["version"]) for _ in range(12)))
+        self.assertTrue(all(not response.error for response in responses))
+        self.assertEqual(limiter.peak, 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_002_cancelled_waiter_passes_slot(self):
+        limiter = HostLimiter(initial_limit=1, max_limit=1)
+        token = await limiter.acquire_async()
+        cancelled = asyncio.ensure_future(limiter.acquire_async())
+        waiting = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0)
+        limiter.release(token, 200, latency=False)
+        cancelled.cancel()
+        limiter.release(await asyncio.wait_for(waiting, 1), 200, latency=False)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pyvyos.device import VyDevice, ApiResponse
+from pyvyos.metrics import LatencyHistogram, MetricsCollector
+from pyvyos.timing import RequestTiming
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps({'success': True, 'data': 'x' * 100, 'error': None}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timing(total):
+    return RequestTiming(connect=0.0, tls=0.0, ttfb=total, total=total, request_bytes=10, response_bytes=20)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_001_histogram(self):
+        histogram = LatencyHistogram((0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(0.1, 2), (1, 3), ('+Inf', 4)])
+        self.assertEqual(histogram.count, 4)
+
+    def test_002_prometheus_export(self):
+        device = VyDevice(hostname='r1', apikey='key')
+        metrics = MetricsCollector(buckets=(0.1, 1))
+        metrics.attach(device)
+        device._run_hooks('request_end', 'show', 'show', ['version'],
+                          ApiResponse(status=200, request={}, result='', error=False, timing=timing(0.05)))
+        device._run_hooks('request_end', 'show', 'show', ['version'],
+                          ApiResponse(status=0, request={}, result={}, error='connection error'))
+        text = metrics.export_prometheus()
+        self.assertIn('pyvyos_request_duration_seconds_bucket{host="r1",command="show",op="show",le="0.1"} 1', text)
+        self.assertIn('pyvyos_request_duration_seconds_count{host="r1",command="show",op="show"} 1', text)
+        self.assertIn('pyvyos_request_errors_total{host="r1",command="show",op="show"} 1', text)
+        self.assertIn('pyvyos_response_bytes_total{host="r1",command="show",op="show"} 20', text)
+
+
+class TestRequestTiming(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.device = VyDevice(hostname='127.0.0.1', apikey='key', protocol='http', port=self.server.server_port)
+
+    def tearDown(self):
+        self.device.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_001_timing_and_hooks(self):
+        events = []
+        self.device.register_hook('request_start', lambda device, command, op, path: events.append(('start', op)))
+        self.device.register_hook('request_end', lambda device, command, op, path, response: events.append(('end', op)))
+
+        first = self.device.show(['version'])
+        second = self.device.show(['version'])
+        self.assertEqual(events, [('start', 'show'), ('end', 'show')] * 2)
+
+        self.assertGreater(first.timing.connect, 0)
+        self.assertEqual(second.timing.connect, 0)
+        self.assertEqual(first.timing.tls, 0)
+        self.assertLessEqual(first.timing.ttfb, first.timing.total)
+        self.assertEqual(first.timing.response_bytes, len(json.dumps({'success': True, 'data': 'x' * 100, 'error': None})))
+        self.assertGreater(first.timing.request_bytes, 0)
+
+    def test_002_unknown_hook(self):
+        with self.assertRaises(ValueError):
+            self.device.register_hook('request_retry', print)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+
+from pyvyos.device import VyDevice
+from pyvyos.mock_server import MockVyOSServer, generate_config
+
+
+class TestMockVyOSServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockVyOSServer(config=generate_config(interfaces=2, addresses=1)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.device = VyDevice(**self.server.device_kwargs())
+
+    def tearDown(self):
+        self.device.close()
+
+    def test_001_retrieve_show_config(self):
+        response = self.device.retrieve_show_config(["interfaces", "ethernet", "eth0"])
+        self.assertEqual(response.status, 200)
+        self.assertFalse(response.error)
+        self.assertEqual(response.result, {'address': '10.0.0.1/24', 'description': 'interface 0', 'mtu': '1500'})
+
+    def test_010_configure_set_interface(self):
+        response = self.device.configure_set(path=["interfaces", "dummy", "dum1", "address", "192.168.140.1/24"])
+        self.assertEqual(response.status, 200)
+        self.assertIsNone(response.result)
+        self.assertFalse(response.error)
+
+    def test_011_retrieve_return_values(self):
+        response = self.device.retrieve_return_values(path=["interfaces", "dummy", "dum1", "address"])
+        self.assertEqual(response.result, ['192.168.140.1/24'])
+
+    def test_012_configure_multiple_values(self):
+        self.device.configure_set(path=[["interfaces", "dummy", "dum2", "address", "192.168.141.1/24"],
+                                        ["interfaces", "dummy", "dum2", "address", "192.168.142.1/24"],
+                                        ["interfaces", "dummy", "dum2", "disable"]])
+        response = self.device.retrieve_show_config(["interfaces", "dummy", "dum2"])
+        self.assertEqual(response.result, {'address': ['192.168.141.1/24', '192.168.142.1/24'], 'disable': {}})
+
+    def test_020_configure_delete_interface(self):
+        response = self.device.configure_delete(path=["interfaces", "dummy", "dum1"])
+        self.assertFalse(response.error)
+        response = self.device.configure_delete(path=["interfaces", "dummy", "dum1"])
+        self.assertEqual(response.status, 400)
+        self.assertTrue(response.error)
+
+    def test_021_failed_batch_is_atomic(self):
+        response = self.device.configure_batch([('set', ["interfaces", "dummy", "dum9", "description", "x"]),
+                                                ('delete', ["interfaces", "dummy", "missing"])])
+        self.assertTrue(response.error)
+        self.assertFalse(self.device.retrieve_show_config(["interfaces", "dummy", "dum9"]).result)
+
+    def test_050_generate(self):
+        response = self.device.generate(path=["ssh", "client-key", "/tmp/key"])
+        self.assertFalse(response.error)
+        self.assertIsNotNone(response.result)
+
+    def test_100_show(self):
+        response = self.device.show(path=["system", "image"])
+        self.assertEqual(response.result, "mock output of 'show system image'\n")
+
+    def test_200_reset(self):
+        response = self.device.reset(path=["conntrack-sync", "internal-cache"])
+        self.assertFalse(response.error)
+
+    def test_300_config_file_save_and_load(self):
+        self.assertFalse(self.device.config_file_save(file="/config/test300.config").error)
+        self.device.configure_set(["system", "host-name", "changed"])
+        response = self.device.config_file_load(file="/config/test300.config")
+        self.assertIsNone(response.result)
+        self.assertFalse(response.error)
+        self.assertEqual(self.device.retrieve_return_values(["system", "host-name"]).result, ['vyos'])
+
+    def test_400_image(self):
+        self.assertFalse(self.device.image_add(url="https://example.com/vyos-1.5.iso").error)
+        self.assertFalse(self.device.image_delete(name="vyos-1.5.iso").error)
+
+    def test_500_invalid_key(self):
+        device = VyDevice(**dict(self.server.device_kwargs(), apikey='wrong'))
+        self.assertEqual(device.show(["version"]).status, 401)
+
+
+class TestMockVyOSServerInjection(unittest.TestCase):
+    def test_001_error_injection(self):
+        with MockVyOSServer(error_rate=1) as server:
+            response = VyDevice(**server.device_kwargs()).show(["version"])
+        self.assertEqual(response.status, 503)
+        self.assertEqual(response.error, 'http error')
+
+    def test_002_reject_and_bulk_bisection(self):
+        reject = lambda path: 'invalid port' if path[-1] == '99999' else None
+        with MockVyOSServer(reject=reject) as server:
+            device = VyDevice(**server.device_kwargs())
+            paths = [["firewall", "group", "port-group", "P", "port", str(p)] for p in (22, 80, 99999, 443)]
+            result = device.configure_bulk(paths)
+            self.assertEqual([r.path[-1] for r in result.failed], ['99999'])
+            self.assertEqual(server.config['firewall']['group']['port-group']['P']['port'], ['22', '80', '443'])
+
+    def test_003_generated_config_size(self):
+        config = generate_config(interfaces=4, firewall_rules=100, static_routes=50)
+        self.assertEqual(len(config['interfaces']['ethernet']), 4)
+        self.assertEqual(len(config['firewall']['ipv4']['name']['WAN-IN']['rule']), 100)
+        self.assertEqual(len(config['protocols']['static']['route']), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+import requests
+
+from pyvyos.device import VyDevice
+from pyvyos.retry import RetryPolicy, CircuitBreaker, get_circuit_breaker
+
+OK = mock.Mock(
+    status_code=200, content=b'{"success": true, "data": "ok", "error": null}',
+    elapsed=timedelta(0), request=mock.Mock(body=''))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_001_should_retry(self):
+        policy = RetryPolicy(max_attempts=3)
+        self.assertTrue(policy.should_retry('show', 1, 0))
+        self.assertTrue(policy.should_retry('retrieve', 2, 503))
+        self.assertFalse(policy.should_retry('retrieve', 3, 503))
+        self.assertFalse(policy.should_retry('retrieve', 1, 400))
+        self.assertFalse(policy.should_retry('configure', 1, 0))
+        self.assertTrue(RetryPolicy(commands=['configure']).should_retry('configure', 1, 0))
+
+    def test_002_backoff(self):
+        policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+        self.assertEqual([policy.delay(a) for a in range(1, 6)], [1, 2, 4, 5, 5])
+        self.assertLessEqual(RetryPolicy(backoff=1).delay(3), 4)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_001_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        with mock.patch('pyvyos.retry.time.monotonic', return_value=100):
+            breaker.record_failure()
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, 'open')
+            self.assertFalse(breaker.allow())
+        with mock.patch('pyvyos.retry.time.monotonic', return_value=111):
+            self.assertTrue(breaker.allow())
+            self.assertEqual(breaker.state, 'half-open')
+            self.assertFalse(breaker.allow())
+            breaker.record_success()
+            self.assertEqual(breaker.state, 'closed')
+
+    def test_002_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+
+    def test_003_shared_per_hostname(self):
+        self.assertIs(get_circuit_breaker('192.0.2.10'), get_circuit_breaker('192.0.2.10'))
+        self.assertIsNot(get_circuit_breaker('192.0.2.10'), get_circuit_breaker('192.0.2.11'))
+
+
+class TestVyDeviceRetry(unittest.TestCase):
+    def make_device(self, responses, **kwargs):
+        device = VyDevice(hostname='127.0.0.1', apikey='key', **kwargs)
+        session = mock.Mock()
+        session.post.side_effect = responses
+        device._get_session = lambda: session
+        return device, session
+
+    def test_001_retries_timeouts(self):
+        device, session = self.make_device([requests.exceptions.ReadTimeout('slow'), OK],
+                                           retry=RetryPolicy(backoff=0))
+        response = device.show(["version"])
+        self.assertFalse(response.error)
+        self.assertEqual(session.post.call_count, 2)
+
+    def test_002_timeout_without_retry(self):
+        device, session = self.make_device([requests.exceptions.ReadTimeout('slow')])
+        response = device.show(["version"])
+        self.assertEqual(response.status, 0)
+        self.assertTrue(response.error.startswith('timeout error'))
+
+    def test_003_configure_not_retried(self):
+        device, session = self.make_device([requests.exceptions.ReadTimeout('slow'), OK], retry=True)
+        device.configure_set(["system", "host-name", "vyos"])
+        self.assertEqual(session.post.call_count, 1)
+
+    def test_004_circuit_breaker_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        device, session = self.make_device([requests.exceptions.ConnectionError('refused')] * 2,
+                                           circuit_breaker=breaker)
+        device.show(["version"])
+        device.show(["version"])
+        response = device.show(["version"])
+        self.assertTrue(response.error.startswith('circuit open'))
+        self.assertEqual(session.post.call_count, 2)
+
+    def test_005_unexpected_error_settles_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        device, session = self.make_device([requests.exceptions.ConnectionError('refused'),
+                                            requests.exceptions.ChunkedEncodingError('truncated'), OK],
+                                           circuit_breaker=breaker)
+        device.show(["version"])
+        response = device.show(["version"])
+        self.assertEqual(response.status, 0)
+        self.assertTrue(response.error.startswith('request error'))
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(device.show(["version"]).error)
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_006_escaping_error_settles_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        device, session = self.make_device([requests.exceptions.ConnectionError('refused'), RuntimeError('bug'), OK],
+                                           circuit_breaker=breaker)
+        device.show(["version"])
+        self.assertRaises(RuntimeError, device.show, ["version"])
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(device.show(["version"]).error)
+
+
+if __name__ == '__main__':
+    unittest.main()
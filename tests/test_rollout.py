@@ -0,0 +1,182 @@
+import json
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pyvyos.device import VyDevice
+from pyvyos.async_device import aiohttp
+from pyvyos.mock_server import MockVyOSServer, generate_config
+from pyvyos.rollout import AsyncRollout, Rollout, exists_check, plan_waves, show_check
+from pyvyos.template import ConfigTemplate
+
+NTP = [("set", ["service", "ntp", "server", "192.0.2.123"])]
+
+
+def start_servers(count, **kwargs):
+    return [MockVyOSServer(config=generate_config(interfaces=1), **kwargs).start() for _ in range(count)]
+
+
+def stop_servers(servers):
+    # Every server takes up to half a second to shut down, stop them together
+    with ThreadPoolExecutor(max_workers=len(servers) or 1) as executor:
+        list(executor.map(lambda server: server.stop(), servers))
+
+
+def ntp_servers(server):
+    return server.config.get('service', {}).get('ntp', {}).get('server')
+
+
+class TestPlanWaves(unittest.TestCase):
+    def test_001_sizes(self):
+        self.assertEqual(plan_waves(10), [1, 2, 4, 3])
+        self.assertEqual(plan_waves(20, canary=2, growth=3, max_wave=5), [2, 5, 5, 5, 3])
+        self.assertEqual(plan_waves(3, growth=1), [1, 2])
+        self.assertEqual(plan_waves(0), [])
+
+
+class TestCommitConfirm(unittest.TestCase):
+    def test_001_payload(self):
+        device = VyDevice('192.0.2.1', 'key')
+        data = json.loads(device._get_payload('set', path=["system", "host-name", "x"], confirm_time=2)['data'])
+        self.assertEqual(data, {'commands': [{'op': 'set', 'path': ["system", "host-name", "x"]}], 'confirm_time': 2})
+
+        rendered = ConfigTemplate({"system": {"host-name": "{name}"}}).render(name='x')
+        data = json.loads(device._get_payload('set', path=rendered, confirm_time=2)['data'])
+        self.assertEqual(data['commands'], [{'op': 'set', 'path': ["system", "host-name", "x"]}])
+
+    def test_002_unconfirmed_commit_reverts(self):
+        with MockVyOSServer(config=generate_config(interfaces=1), confirm_minute=0.05) as server:
+            device = VyDevice(**server.device_kwargs())
+            self.assertFalse(device.configure_batch(NTP, confirm_time=1).error)
+            self.assertEqual(ntp_servers(server), '192.0.2.123')
+            time.sleep(0.1)
+            self.assertIs(device.retrieve_exists(["service", "ntp"]).result, False)
+            self.assertTrue(device.configure_confirm().error)
+
+            self.assertFalse(device.configure_batch(NTP, confirm_time=1).error)
+            self.assertFalse(device.configure_confirm().error)
+            time.sleep(0.1)
+            self.assertIs(device.retrieve_exists(["service", "ntp"]).result, True)
+            device.close()
+
+
+class TestRollout(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        stop_servers(self.servers)
+
+    def devices(self):
+        return [server.device_kwargs() for server in self.servers]
+
+    def test_001_success(self):
+        self.servers = start_servers(7)
+        rollout = Rollout(self.devices(), NTP, health_check=exists_check(["service", "ntp", "server"]))
+        result = rollout.run()
+        rollout.fleet.close()
+
+        self.assertTrue(result.success)
+        self.assertFalse(result.halted)
+        self.assertEqual([len(wave) for wave in result.waves], [1, 2, 4])
+        self.assertEqual([outcome.wave for outcome in result.outcomes], [0, 1, 1, 2, 2, 2, 2])
+        for server in self.servers:
+            self.assertEqual(ntp_servers(server), '192.0.2.123')
+            self.assertIsNone(server._rollback)
+            self.assertIn('/config/pyvyos-rollout.boot', server.files)
+
+    def test_002_canary_rolled_back(self):
+        self.servers = start_servers(4)
+        rollout = Rollout(self.devices(), NTP, health_check=show_check(["ntp"], contains="synchronised"))
+        result = rollout.run()
+        rollout.fleet.close()
+
+        self.assertFalse(result.success)
+        self.assertIn('wave 0', result.halted)
+        self.assertEqual(result.outcomes[0].status, 'rolled back')
+        self.assertIn('does not contain', result.outcomes[0].error)
+        self.assertEqual(len(result.by_status('skipped')), 3)
+        self.assertTrue(all(ntp_servers(server) is None for server in self.servers))
+        # The restore confirmed the pending commit, nothing fires later
+        self.assertTrue(all(server._rollback is None for server in self.servers))
+
+    def test_003_failed_wave_rolls_back_everything(self):
+        self.servers = start_servers(4)
+        self.servers[2].reject = lambda path: 'rejected' if 'ntp' in path else None
+        rollout = Rollout(self.devices(), NTP, on_failure='rollback')
+        result = rollout.run()
+        rollout.fleet.close()
+
+        self.assertEqual([outcome.status for outcome in result.outcomes],
+                         ['rolled back', 'rolled back', 'failed', 'skipped'])
+        self.assertEqual(result.outcomes[0].error, 'rolled back after the rollout halted')
+        self.assertTrue(all(ntp_servers(server) is None for server in self.servers))
+        self.assertTrue(all(server._rollback is None for server in self.servers))
+
+    def test_004_failure_rate_and_templates(self):
+        self.servers = start_servers(7)
+        self.servers[4].reject = lambda path: 'rejected'
+        template = ConfigTemplate({"system": {"host-name": "branch-{port}"}})
+        rollout = Rollout(self.devices(), lambda device: template.render(port=device.port), max_failure_rate=0.25)
+        result = rollout.run()
+        rollout.fleet.close()
+
+        self.assertFalse(result.halted)
+        self.assertEqual(len(result.by_status('applied')), 6)
+        self.assertEqual(self.servers[0].config['system']['host-name'], f'branch-{self.servers[0].port}')
+
+    def test_005_unreachable_device_reverts(self):
+        self.servers = start_servers(1, confirm_minute=0.05)
+        rollout = Rollout(self.devices(), NTP, backup_file=None, confirm_time=1, health_check=lambda device: False)
+        result = rollout.run()
+
+        self.assertEqual(result.outcomes[0].status, 'reverting')
+        time.sleep(0.1)
+        self.assertIs(rollout.fleet.devices[0].retrieve_exists(["service", "ntp"]).result, False)
+        rollout.fleet.close()
+
+    def test_006_failed_restore_of_confirmed_devices(self):
+        self.servers = start_servers(3)
+        self.servers[1].reject = lambda path: 'rejected' if 'ntp' in path else None
+        servers = {server.port: server for server in self.servers}
+
+        def lose_backup(device):
+            # The first device loses its backup, the restore of the last one raises
+            if device.port == self.servers[0].port:
+                servers[device.port].files.clear()
+            else:
+                device.config_file_load = lambda file: 1 / 0
+            return True
+
+        rollout = Rollout(self.devices(), NTP, health_check=lose_backup, on_failure='rollback')
+        result = rollout.run()
+        rollout.fleet.close()
+
+        # Both commits were confirmed, nothing will revert them
+        self.assertEqual([outcome.status for outcome in result.outcomes],
+                         ['rollback failed', 'failed', 'rollback failed'])
+        self.assertIn('restore failed', result.outcomes[0].error)
+        self.assertIn('ZeroDivisionError', result.outcomes[2].error)
+        self.assertEqual(ntp_servers(self.servers[0]), '192.0.2.123')
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncRollout(unittest.IsolatedAsyncioTestCase):
+    async def test_001_rollout(self):
+        servers = start_servers(3)
+        servers[2].reject = lambda path: 'rejected'
+        try:
+            rollout = AsyncRollout([server.device_kwargs() for server in servers], NTP,
+                                   health_check=show_check(["version"]))
+            result = await rollout.run()
+            await rollout.fleet.aclose()
+        finally:
+            stop_servers(servers)
+
+        self.assertEqual([outcome.status for outcome in result.outcomes], ['applied', 'applied', 'failed'])
+        self.assertIn('wave 1', result.halted)
+        self.assertEqual(ntp_servers(servers[1]), '192.0.2.123')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pyvyos.device import VyDevice
+from pyvyos.async_device import AsyncVyDevice, aiohttp
+from pyvyos.mock_server import MockVyOSServer, generate_config
+from pyvyos.singleflight import Singleflight
+
+
+class TestSingleflight(unittest.TestCase):
+    def test_001_concurrent_calls_share_one(self):
+        flight = Singleflight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def function():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return 'result'
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            leader = executor.submit(flight.do, 'key', function)
+            started.wait()
+            followers = [executor.submit(flight.do, 'key', function) for _ in range(4)]
+            while flight.shared < 4:
+                time.sleep(0.001)
+            release.set()
+            self.assertEqual(leader.result(), ('result', False))
+            self.assertEqual([future.result() for future in followers], [('result', True)] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats(), {'calls': 1, 'shared': 4, 'in_flight': 0})
+
+    def test_002_errors_are_shared(self):
+        flight = Singleflight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def function():
+            started.set()
+            release.wait()
+            raise ValueError('failed')
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, 'key', function)
+            started.wait()
+            follower = executor.submit(flight.do, 'key', function)
+            while flight.shared < 1:
+                time.sleep(0.001)
+            release.set()
+            self.assertRaises(ValueError, leader.result)
+            self.assertRaises(ValueError, follower.result)
+        self.assertEqual(flight.do('key', lambda: 'again'), ('again', False))
+
+
+class TestAsyncSingleflight(unittest.IsolatedAsyncioTestCase):
+    async def test_001_cancelled_leader(self):
+        flight = Singleflight()
+        release = asyncio.Event()
+        calls = []
+
+        async def function():
+            calls.append(1)
+            await release.wait()
+            return 'result'
+
+        leader = asyncio.ensure_future(flight.ado('key', function))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.ado('key', function))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await follower, ('result', True))
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+    async def test_002_cancelled_by_last_caller(self):
+        flight = Singleflight()
+        cancelled = asyncio.Event()
+
+        async def function():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        caller = asyncio.ensure_future(flight.ado('key', function))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        self.assertEqual(await flight.ado('key', lambda: asyncio.sleep(0, 'again')), ('again', False))
+
+
+class TestDeviceSingleflight(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVyOSServer(config=generate_config(interfaces=2), latency=0.2).start()
+        self.device = VyDevice(singleflight=True, **self.server.device_kwargs())
+
+    def tearDown(self):
+        self.device.close()
+        self.server.stop()
+
+    def test_001_retrieve_coalesced(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(lambda _: self.device.retrieve_show_config(["interfaces"]), range(8)))
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(self.device.singleflight.stats()['shared'], 7)
+        self.assertTrue(all(response.result == responses[0].result for response in responses))
+        self.assertEqual(len({id(response) for response in responses}), 8)
+
+    def test_002_configure_not_coalesced(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: self.device.configure_set(["system", "host-name", "x"]), range(4)))
+        self.assertEqual(self.server.request_count, 4)
+
+    def test_003_config_tree_per_caller(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            trees = list(executor.map(lambda _: self.device.retrieve_config_tree(["interfaces"]).result, range(4)))
+        self.assertTrue(all(tree.exists(["ethernet", "eth0"]) for tree in trees))
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncDeviceSingleflight(unittest.IsolatedAsyncioTestCase):
+    async def test_001_show_coalesced(self):
+        with MockVyOSServer(latency=0.1) as server:
+            async with AsyncVyDevice(singleflight=True, **server.device_kwargs()) as device:
+                responses = await asyncio.gather(*(device.show(["version"]) for _ in range(10)))
+                other = await device.show(["interfaces"])
+        self.assertEqual(server.request_count, 2)
+        self.assertEqual(device.singleflight.stats(), {'calls': 2, 'shared': 9, 'in_flight': 0})
+        self.assertTrue(all(response.result == responses[0].result for response in responses))
+        self.assertFalse(other.error)
+
+
+if __name__ == '__main__':
+    unittest.main()
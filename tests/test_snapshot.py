@@ -0,0 +1,108 @@
+import copy
+import os
+import tempfile
+import unittest
+
+from pyvyos.device import VyDevice
+from pyvyos.mock_server import MockVyOSServer, generate_config
+from pyvyos.snapshot import SnapshotStore
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(self.directory.name)
+        self.config = generate_config(interfaces=50, addresses=2, firewall_rules=200, static_routes=20)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_001_round_trip(self):
+        self.store.put("r1", self.config)
+        self.assertEqual(self.store.get("r1"), self.config)
+        self.assertIsNone(self.store.get("missing"))
+
+    def test_002_unchanged_snapshot_adds_nothing(self):
+        first = self.store.put("r1", self.config)
+        size = self.store.stats()['pack_bytes']
+        second = self.store.put("r1", copy.deepcopy(self.config))
+        self.assertGreater(first.new_blobs, 0)
+        self.assertEqual(second.new_blobs, 0)
+        self.assertEqual(first.root, second.root)
+        self.assertEqual(self.store.stats()['pack_bytes'], size)
+
+    def test_003_small_change_adds_few_blobs(self):
+        first = self.store.put("r1", self.config)
+        changed = copy.deepcopy(self.config)
+        changed['interfaces']['ethernet']['eth3']['description'] = 'changed'
+        second = self.store.put("r1", changed)
+        self.assertLess(second.new_blobs, 5)
+        self.assertEqual(self.store.get("r1", 0), self.config)
+        self.assertEqual(self.store.get("r1"), changed)
+        self.assertEqual(len(self.store.history("r1")), 2)
+        self.assertEqual(self.store.diff(first, second).set,
+                         [['interfaces', 'ethernet', 'eth3', 'description', 'changed']])
+
+    def test_004_deduplicated_across_devices(self):
+        self.store.put("r1", self.config)
+        other = copy.deepcopy(self.config)
+        other['system']['host-name'] = 'r2'
+        self.assertLess(self.store.put("r2", other).new_blobs, 3)
+        self.assertEqual(sorted(self.store.devices()), ["r1", "r2"])
+
+    def test_005_diff_deletes(self):
+        first = self.store.put("r1", self.config)
+        changed = copy.deepcopy(self.config)
+        del changed['firewall']
+        del changed['interfaces']['ethernet']['eth0']['address'][1]
+        diff = self.store.diff(first, self.store.put("r1", changed))
+        self.assertEqual(sorted(diff.delete), [['firewall'], ['interfaces', 'ethernet', 'eth0', 'address', '10.0.0.2/24']])
+        self.assertEqual(diff.set, [])
+
+    def test_006_reopen(self):
+        snapshot = self.store.put("r1", self.config)
+        self.store.close()
+        with SnapshotStore(self.directory.name) as store:
+            self.assertEqual(store.history("r1"), [snapshot.__class__(device="r1", timestamp=snapshot.timestamp,
+                                                                    root=snapshot.root)])
+            self.assertEqual(store.get("r1"), self.config)
+        self.store = SnapshotStore(self.directory.name)
+
+    def test_007_torn_index_is_ignored(self):
+        self.store.put("r1", self.config)
+        self.store.close()
+        with open(os.path.join(self.directory.name, 'objects.idx'), 'ab') as index:
+            index.write(b'\x00' * 10)
+        self.store = SnapshotStore(self.directory.name)
+        self.assertEqual(self.store.get("r1"), self.config)
+
+    def test_008_results_are_copies(self):
+        self.store.put("r1", self.config)
+        self.store.get("r1")['system']['host-name'] = 'mutated'
+        self.assertEqual(self.store.get("r1"), self.config)
+
+    def test_009_key_order(self):
+        first = self.store.put("r1", self.config)
+
+        def reverse(node):
+            return {key: reverse(value) for key, value in reversed(node.items())} if isinstance(node, dict) else node
+
+        second = self.store.put("r2", reverse(self.config))
+        self.assertEqual(second.root, first.root)
+        self.assertEqual(second.new_blobs, 0)
+
+
+class TestDeviceSnapshot(unittest.TestCase):
+    def test_001_snapshot(self):
+        config = generate_config(interfaces=4)
+        with tempfile.TemporaryDirectory() as directory, SnapshotStore(directory) as store, \
+                MockVyOSServer(config=config) as server, VyDevice(**server.device_kwargs()) as device:
+            response = device.snapshot(store)
+            self.assertFalse(response.error)
+            self.assertEqual(response.result.device, "127.0.0.1")
+            self.assertEqual(store.get("127.0.0.1"), config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import json
+import unittest
+
+from pyvyos.device import VyDevice
+from pyvyos.async_device import AsyncVyDevice, aiohttp
+from pyvyos.mock_server import MockVyOSServer
+from pyvyos.stream import ShowOutputDecoder, RouteParser, InterfaceParser, NeighborParser
+
+ROUTES = """Codes: K - kernel route, C - connected, S - static, R - RIP,
+       O - OSPF, I - IS-IS, B - BGP, E - EIGRP, N - NHRP,
+       > - selected route, * - FIB route, q - queued, r - rejected, b - backup
+
+S>* 0.0.0.0/0 [210/0] via 192.168.1.1, eth0, weight 1, 00:10:00
+C>* 192.168.1.0/24 is directly connected, eth0, 00:10:00
+B>* 10.0.0.0/8 [20/0] via 203.0.113.1, eth1, weight 1, 1d02h03m
+  *                   via 203.0.113.2, eth2, weight 1, 1d02h03m
+B   172.16.0.0/12 [200/0] via 198.51.100.1 (recursive), weight 1, 01:00:00
+"""
+
+INTERFACES = """Codes: S - State, L - Link, u - Up, D - Down, A - Admin Down
+Interface        IP Address                        S/L  Description
+---------        ----------                        ---  -----------
+eth0             192.168.1.1/24                    u/u  WAN uplink
+                 2001:db8::1/64
+eth1             -                                 A/D
+lo               127.0.0.1/8                       u/u
+"""
+
+ARP = """Address        Interface    Link layer address    State
+-------------  -----------  --------------------  ---------
+192.168.1.1    eth0         00:53:00:11:22:33     REACHABLE
+fe80::1 dev eth1 lladdr 00:53:00:44:55:66 router STALE
+"""
+
+
+def parse(parser, text):
+    records = []
+    for line in text.split('\n'):
+        records.extend(parser.feed(line))
+    return records + parser.flush()
+
+
+class TestShowOutputDecoder(unittest.TestCase):
+    def decode(self, body, size):
+        decoder = ShowOutputDecoder()
+        pieces = []
+        for start in range(0, len(body), size):
+            pieces.extend(decoder.feed(body[start:start + size]))
+        return ''.join(pieces), decoder
+
+    def test_001_any_chunking(self):
+        data = 'line "one"\n\ttab \\ backé \U0001f600 end'
+        for ensure_ascii in (True, False):
+            body = json.dumps({"success": True, "data": data, "error": None}, ensure_ascii=ensure_ascii).encode()
+            for size in (1, 2, 3, 7, len(body)):
+                text, decoder = self.decode(body, size)
+                self.assertEqual(text, data)
+                self.assertTrue(decoder.close())
+                self.assertIs(decoder.success, True)
+                self.assertIsNone(decoder.error)
+
+    def test_002_error_response(self):
+        body = json.dumps({"success": False, "error": "bad path, \"x\"", "data": None}).encode()
+        text, decoder = self.decode(body, 4)
+        self.assertEqual(text, '')
+        self.assertFalse(decoder.success)
+        self.assertEqual(decoder.error, 'bad path, "x"')
+
+    def test_003_truncated(self):
+        _, decoder = self.decode(b'{"success": true, "data": "abc', 5)
+        self.assertFalse(decoder.close())
+        self.assertEqual(decoder.error, 'json decode error')
+
+    def test_004_malformed(self):
+        for body in (b'[1,2]', b'{"success" true}', b'{"success": true; "data": "abc"}'):
+            text, decoder = self.decode(body, 2)
+            self.assertEqual(text, '')
+            self.assertFalse(decoder.close())
+            self.assertEqual(decoder.error, 'json decode error')
+
+
+class TestParsers(unittest.TestCase):
+    def test_001_routes(self):
+        routes = parse(RouteParser(), ROUTES)
+        self.assertEqual([route['prefix'] for route in routes],
+                         ['0.0.0.0/0', '192.168.1.0/24', '10.0.0.0/8', '172.16.0.0/12'])
+        self.assertEqual(routes[0]['distance'], 210)
+        self.assertTrue(routes[0]['selected'] and routes[0]['fib'])
+        self.assertEqual(routes[1]['nexthops'], [{'via': None, 'interface': 'eth0'}])
+        self.assertEqual(routes[2]['nexthops'], [{'via': '203.0.113.1', 'interface': 'eth1'},
+                                                 {'via': '203.0.113.2', 'interface': 'eth2'}])
+        self.assertEqual(routes[2]['uptime'], '1d02h03m')
+        self.assertFalse(routes[3]['selected'])
+
+    def test_002_interfaces(self):
+        interfaces = parse(InterfaceParser(), INTERFACES)
+        self.assertEqual(interfaces[0], {'interface': 'eth0', 'addresses': ['192.168.1.1/24', '2001:db8::1/64'],
+                                         'state': 'up', 'link': 'up', 'description': 'WAN uplink'})
+        self.assertEqual(interfaces[1]['addresses'], [])
+        self.assertEqual(interfaces[1]['state'], 'admin down')
+        self.assertEqual(len(interfaces), 3)
+
+    def test_003_neighbors(self):
+        neighbors = parse(NeighborParser(), ARP)
+        self.assertEqual(neighbors, [
+            {'address': '192.168.1.1', 'interface': 'eth0', 'mac': '00:53:00:11:22:33', 'state': 'REACHABLE'},
+            {'address': 'fe80::1', 'interface': 'eth1', 'mac': '00:53:00:44:55:66', 'state': 'STALE'},
+        ])
+
+
+class TestShowStream(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        routes = ROUTES + ''.join(f'B>* 10.{i // 256}.{i % 256}.0/24 [20/0] via 203.0.113.1, eth1, weight 1, 00:01:00\n'
+                                  for i in range(5000))
+        cls.server = MockVyOSServer(show_output={('ip', 'route'): routes, ('interfaces',): INTERFACES}).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.device = VyDevice(**self.server.device_kwargs())
+
+    def tearDown(self):
+        self.device.close()
+
+    def test_001_lines_match_show(self):
+        stream = self.device.show_stream(["interfaces"], chunk_size=16)
+        self.assertEqual('\n'.join(stream), self.device.show(["interfaces"]).result.rstrip('\n'))
+        self.assertEqual(stream.status, 200)
+        self.assertFalse(stream.error)
+        self.assertNotIn('key', stream.request)
+        self.assertGreater(stream.timing.response_bytes, 0)
+
+    def test_002_parsed_routes(self):
+        stream = self.device.show_stream(["ip", "route"], parser='routes', chunk_size=1024)
+        self.assertEqual(sum(1 for _ in stream), 5004)
+        self.assertFalse(stream.error)
+
+    def test_003_early_close(self):
+        stream = self.device.show_stream(["ip", "route"], chunk_size=1024)
+        for _ in stream:
+            break
+        stream.close()
+        self.assertEqual(stream.error, 'stream closed before the output was read')
+        self.assertFalse(self.device.show(["interfaces"]).error)
+
+    def test_004_request_hooks(self):
+        events = []
+        self.device.register_hook('request_end', lambda device, command, op, path, response: events.append(path))
+        list(self.device.show_stream(["interfaces"]))
+        self.assertEqual(events, [["interfaces"]])
+
+    def test_005_single_iteration(self):
+        stream = self.device.show_stream(["interfaces"])
+        list(stream)
+        with self.assertRaises(RuntimeError):
+            iter(stream)
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncShowStream(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockVyOSServer(show_output={('interfaces',): INTERFACES}).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    async def test_001_parsed_interfaces(self):
+        async with AsyncVyDevice(**self.server.device_kwargs()) as device:
+            stream = device.show_stream(["interfaces"], parser='interfaces', chunk_size=8)
+            interfaces = [interface async for interface in stream]
+        self.assertEqual([interface['interface'] for interface in interfaces], ['eth0', 'eth1', 'lo'])
+        self.assertEqual(stream.status, 200)
+        self.assertFalse(stream.error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import unittest
+
+from pyvyos.async_device import aiohttp
+from pyvyos.mock_server import MockVyOSServer
+from pyvyos.telemetry import COUNTERS, TelemetryCollector, np, parse_counters
+
+HEADER = ("Interface    Rx Packets    Rx Bytes    Tx Packets    Tx Bytes    Rx Dropped    Tx Dropped    Rx Errors    "
+          "Tx Errors\n"
+          "-----------  ------------  ----------  ------------  ----------  ------------  ------------  -----------  "
+          "-----------\n")
+
+
+def counters_output(interfaces, step, base=0):
+    lines = [HEADER]
+    for number in range(interfaces):
+        value = base + step * (number + 1)
+        lines.append(f"eth{number}  {value}  {value * 100}  {value}  {value * 50}  0  0  {number}  0\n")
+    lines.append("lo\n")
+    return ''.join(lines)
+
+
+class _Counters:
+    # A show_output callable whose counters grow by the interface number on every call
+    def __init__(self, interfaces):
+        self.interfaces = interfaces
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return counters_output(self.interfaces, self.calls)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestParseCounters(unittest.TestCase):
+    def test_001_parse(self):
+        names, values = parse_counters(counters_output(3, 10))
+        self.assertEqual(names, ['eth0', 'eth1', 'eth2'])
+        self.assertEqual(values.dtype, np.uint64)
+        self.assertEqual(values.shape, (3, len(COUNTERS)))
+        self.assertEqual(values[2].tolist(), [30, 3000, 30, 1500, 0, 0, 2, 0])
+
+    def test_002_columns_by_header(self):
+        output = "Interface  Tx Bytes  Rx Bytes\neth0  5  7\neth1  x  1\n"
+        names, values = parse_counters(output, counters=('rx_bytes', 'tx_bytes', 'rx_errors'))
+        self.assertEqual(names, ['eth0'])
+        self.assertEqual(values.tolist(), [[7, 5, 0]])
+
+    def test_003_no_table(self):
+        names, values = parse_counters("no counters here")
+        self.assertEqual(names, [])
+        self.assertEqual(values.shape, (0, len(COUNTERS)))
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestTelemetryCollector(unittest.TestCase):
+    def setUp(self):
+        self.collector = TelemetryCollector([], history=4)
+
+    def test_001_rates(self):
+        self.collector.tick(poll=False)
+        self.collector.ingest('r1', counters_output(2, 10), timestamp=100.0)
+        self.assertTrue(np.isnan(self.collector.rates()).all())
+
+        self.collector.tick(poll=False)
+        self.collector.ingest('r1', counters_output(2, 30), timestamp=102.0)
+        rates = self.collector.rates()
+        self.assertEqual(self.collector.keys, [('r1', 'eth0'), ('r1', 'eth1')])
+        self.assertEqual(rates[:, COUNTERS.index('rx_bytes')].tolist(), [1000.0, 2000.0])
+        self.assertEqual(self.collector.top('rx_bytes', 1), [(('r1', 'eth1'), 2000.0)])
+
+    def test_002_wrap_and_reset(self):
+        self.collector.tick(poll=False)
+        self.collector.ingest('r1', HEADER + "eth0  4294967290  2  0  0  0  0  0  0\n", timestamp=0.0)
+        self.collector.tick(poll=False)
+        self.collector.ingest('r1', HEADER + "eth0  4  1  0  0  0  0  0  0\n", timestamp=1.0)
+        delta, elapsed = self.collector.deltas()
+        self.assertEqual(delta[0, 0], 10)
+        self.assertEqual(delta[0, 1], 4294967295)
+
+        self.collector.tick(poll=False)
+        self.collector.ingest('r1', HEADER + "eth0  5000000000  0  0  0  0  0  0  0\n", timestamp=2.0)
+        self.collector.tick(poll=False)
+        self.collector.ingest('r1', HEADER + "eth0  7  0  0  0  0  0  0  0\n", timestamp=3.0)
+        delta, elapsed = self.collector.deltas()
+        self.assertEqual(delta[0, 0], 7)
+        self.assertEqual(elapsed.tolist(), [1.0])
+
+    def test_003_new_and_missing_interfaces(self):
+        self.collector.tick(poll=False)
+        self.collector.ingest('r1', counters_output(1, 10), timestamp=0.0)
+        self.collector.tick(poll=False)
+        self.collector.ingest('r1', counters_output(2, 20), timestamp=1.0)
+        self.collector.ingest('r2', counters_output(100, 20), timestamp=1.0)
+        self.assertEqual(len(self.collector), 102)
+        rates = self.collector.rates()
+        self.assertEqual(rates[0, 0], 10.0)
+        self.assertEqual(np.isnan(rates[:, 0]).sum(), 101)
+        self.assertEqual(self.collector.latest_valid().sum(), 102)
+
+    def test_004_ring_buffer(self):
+        for tick in range(6):
+            self.collector.tick(poll=False)
+            self.collector.ingest('r1', counters_output(1, tick + 1), timestamp=float(tick))
+        times, values = self.collector.series('r1', 'eth0', 'rx_packets')
+        self.assertEqual(times.tolist(), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(values.tolist(), [3, 4, 5, 6])
+        self.assertEqual(self.collector.rates(window=3)[0, 0], 1.0)
+        self.assertRaises(ValueError, self.collector.rates, 4)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestTelemetryFleet(unittest.TestCase):
+    def test_001_tick(self):
+        counters = _Counters(8)
+        with MockVyOSServer(show_output=counters) as server, MockVyOSServer(error_rate=1.0) as failing:
+            failing_kwargs = dict(failing.device_kwargs(), hostname='localhost')
+            collector = TelemetryCollector([server.device_kwargs(), failing_kwargs])
+            collector.tick()
+            errors = collector.tick()
+            collector.fleet.close()
+        self.assertEqual(list(errors), ['localhost'])
+        self.assertEqual(len(collector), 8)
+        rates = collector.rates()
+        self.assertTrue((rates[:, COUNTERS.index('rx_packets')] > 0).all())
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_002_atick(self):
+        counters = _Counters(4)
+
+        async def poll(collector):
+            await collector.atick()
+            await collector.atick()
+            await collector.fleet.aclose()
+
+        with MockVyOSServer(show_output=counters) as server:
+            collector = TelemetryCollector([server.device_kwargs()])
+            asyncio.run(poll(collector))
+        self.assertEqual(collector.ticks, 2)
+        self.assertEqual(collector.latest()[:, 0].tolist(), [2, 4, 6, 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import unittest
+
+from pyvyos.device import VyDevice
+from pyvyos.mock_server import MockVyOSServer, generate_config
+from pyvyos.template import ConfigTemplate, RenderedConfig
+
+TEMPLATE = {
+    "system": {"host-name": "{hostname}", "name-server": ["192.0.2.53", "192.0.2.54"]},
+    "interfaces": {"ethernet": {"eth1": {"address": "10.{site}.0.1/24", "description": "uplink {{primary}}"}}},
+    "firewall": {"ipv4": {"name": {"WAN-IN": {"default-action": "drop", "rule": {"10": {"action": "accept"}}}}}},
+    "service": {"ssh": {}},
+}
+
+
+class TestConfigTemplate(unittest.TestCase):
+    def setUp(self):
+        self.template = ConfigTemplate(TEMPLATE)
+
+    def test_001_render(self):
+        rendered = self.template.render({'hostname': 'branch1'}, site=7)
+        self.assertIsInstance(rendered, RenderedConfig)
+        self.assertEqual(self.template.fields, {'hostname', 'site'})
+        self.assertEqual(len(rendered), 8)
+        self.assertEqual(rendered[0], ['system', 'host-name', 'branch1'])
+        self.assertIn(['interfaces', 'ethernet', 'eth1', 'address', '10.7.0.1/24'], rendered)
+        self.assertIn(['interfaces', 'ethernet', 'eth1', 'description', 'uplink {primary}'], rendered)
+        self.assertEqual(rendered[-1], ['service', 'ssh'])
+
+    def test_002_encode_matches_paths(self):
+        rendered = self.template.render(hostname='branch "1"', site=7)
+        for op in ('set', 'delete'):
+            data = json.loads(rendered.encode(op))
+            self.assertEqual(data, [{'op': op, 'path': path} for path in rendered])
+
+    def test_003_fragments_shared(self):
+        for number in range(10):
+            self.template.render(hostname=f'branch{number}', site=number % 2).encode()
+        info = self.template.cache_info()
+        # The system section is encoded per hostname, the interfaces per site, the static sections once
+        self.assertEqual(info['misses'], 10 + 2 + 4)
+        self.assertEqual(info['hits'], 9 * 4)
+
+    def test_004_cache_bounded(self):
+        template = ConfigTemplate(TEMPLATE, cache_size=3)
+        for number in range(10):
+            template.render(hostname=f'branch{number}', site=number).encode()
+        self.assertEqual(template.cache_info()['size'], 3)
+
+    def test_005_missing_parameter(self):
+        self.assertRaises(ValueError, self.template.render, hostname='branch1')
+        self.assertRaises(ValueError, ConfigTemplate, [["system", "host-name", "{}"]])
+
+    def test_006_path_list(self):
+        template = ConfigTemplate([["interfaces", "ethernet", "{interface}", "description", "x"],
+                                   ["interfaces", "ethernet", "{interface}"]])
+        rendered = template.render(interface='eth2')
+        self.assertEqual(list(rendered), [["interfaces", "ethernet", "eth2"],
+                                          ["interfaces", "ethernet", "eth2", "description", "x"]])
+        self.assertEqual(json.loads(rendered.encode())[1]['path'], rendered[1])
+
+
+class TestDeviceTemplate(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVyOSServer(config=generate_config(interfaces=2)).start()
+        self.device = VyDevice(cache=True, **self.server.device_kwargs())
+
+    def tearDown(self):
+        self.device.close()
+        self.server.stop()
+
+    def test_001_configure_set(self):
+        template = ConfigTemplate(TEMPLATE)
+        self.assertEqual(self.device.retrieve_show_config(["system"]).result['host-name'], 'vyos')
+
+        rendered = template.render(hostname='branch1', site=7)
+        self.assertEqual(rendered.roots(), ['system', 'interfaces', 'firewall', 'service'])
+        response = self.device.configure_set(rendered)
+        self.assertFalse(response.error)
+        # The cached system section is invalidated without building the rendered paths
+        self.assertIsNone(rendered._paths)
+        self.assertEqual(self.device.retrieve_show_config(["system"]).result['host-name'], 'branch1')
+        self.assertIn('WAN-IN', self.device.retrieve_show_config(["firewall", "ipv4", "name"]).result)
+
+    def test_002_configure_delete(self):
+        template = ConfigTemplate({"service": {"ssh": {}}})
+        self.device.configure_set(template.render())
+        response = self.device.configure_delete(template.render())
+        self.assertFalse(response.error)
+        self.assertIs(self.device.retrieve_exists(["service", "ssh"]).result, False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from pyvyos.device import VyDevice
+
+
+class TestTransaction(unittest.TestCase):
+    def setUp(self):
+        self.device = VyDevice(hostname='127.0.0.1', apikey='key')
+        self.session = mock.Mock()
+        self.session.post.return_value = mock.Mock(
+            status_code=200, content=b'{"success": true, "data": null, "error": null}',
+            elapsed=timedelta(0), request=mock.Mock(body=''))
+        self.device._get_session = lambda: self.session
+
+    def sent(self):
+        return [json.loads(call.kwargs['data']['data']) for call in self.session.post.call_args_list]
+
+    def test_001_single_mixed_request_on_exit(self):
+        with self.device.transaction() as tx:
+            tx.delete(["interfaces", "dummy", "dum1"])
+            tx.set([["interfaces", "dummy", "dum2"], ["interfaces", "dummy", "dum3"]])
+            self.assertEqual(len(tx), 3)
+            self.session.post.assert_not_called()
+
+        self.assertEqual(self.sent(), [[
+            {'op': 'delete', 'path': ["interfaces", "dummy", "dum1"]},
+            {'op': 'set', 'path': ["interfaces", "dummy", "dum2"]},
+            {'op': 'set', 'path': ["interfaces", "dummy", "dum3"]},
+        ]])
+        self.assertFalse(tx.error)
+
+    def test_002_auto_flush(self):
+        with self.device.transaction(max_operations=2) as tx:
+            for i in range(5):
+                tx.set(["interfaces", "dummy", f"dum{i}"])
+        self.assertEqual([len(data) for data in self.sent()], [2, 2, 1])
+        self.assertEqual(len(tx.responses), 3)
+
+    def test_003_exception_discards(self):
+        with self.assertRaises(RuntimeError):
+            with self.device.transaction() as tx:
+                tx.set(["interfaces", "dummy", "dum1"])
+                raise RuntimeError()
+        self.session.post.assert_not_called()
+        self.assertEqual(len(tx), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
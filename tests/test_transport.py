@@ -0,0 +1,126 @@
+import asyncio
+import importlib.util
+import subprocess
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pyvyos.device import VyDevice
+from pyvyos.async_device import AsyncVyDevice, aiohttp
+from pyvyos.mock_server import MockVyOSServer, generate_config
+from pyvyos.transport import Http2Transport, RequestsTransport, Transport, Urllib3Transport, get_transport
+
+HTTP2 = all(importlib.util.find_spec(name) is not None for name in ('httpx', 'h2'))
+
+
+class TestGetTransport(unittest.TestCase):
+    def test_001_by_name(self):
+        self.assertIsInstance(get_transport('urllib3', pool_maxsize=2), Urllib3Transport)
+        transport = RequestsTransport()
+        self.assertIs(get_transport(transport), transport)
+        self.assertRaises(ValueError, get_transport, 'carrier-pigeon')
+
+    def test_002_device(self):
+        self.assertIsNone(VyDevice('192.0.2.1', 'key').transport)
+        self.assertIsNone(VyDevice('192.0.2.1', 'key', transport='requests').transport)
+        device = VyDevice('192.0.2.1', 'key', transport='urllib3', pool_maxsize=3, keepalive=False)
+        self.assertEqual(device.transport.pool_maxsize, 3)
+        self.assertFalse(device.transport.keepalive)
+
+    def test_003_httpx_imported_lazily(self):
+        code = "import sys, pyvyos.device; print('httpx' in sys.modules)"
+        self.assertEqual(subprocess.check_output([sys.executable, '-c', code], text=True).strip(), 'False')
+
+
+class _TransportTests:
+    transport = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockVyOSServer(config=generate_config(interfaces=4)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.device = VyDevice(transport=self.transport, **self.server.device_kwargs())
+
+    def tearDown(self):
+        self.device.close()
+
+    def test_001_requests(self):
+        response = self.device.retrieve_show_config(["interfaces"])
+        self.assertEqual(response.status, 200)
+        self.assertIn('eth3', response.result['ethernet'])
+        self.assertGreater(response.timing.response_bytes, 0)
+        self.assertGreater(response.timing.request_bytes, 0)
+
+        self.assertFalse(self.device.configure_set(["system", "host-name", "branch1"]).error)
+        self.assertEqual(self.device.retrieve_return_values(["system", "host-name"]).result, ['branch1'])
+        self.assertTrue(self.device.retrieve_show_config(["nothing"]).error)
+
+    def test_002_concurrent(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(lambda _: self.device.show(["version"]), range(32)))
+        self.assertTrue(all(response.status == 200 and response.result for response in responses))
+
+    def test_003_close_and_reuse(self):
+        self.device.retrieve_exists(["interfaces"])
+        self.device.close()
+        self.assertIs(self.device.retrieve_exists(["interfaces"]).result, True)
+
+    def test_004_connection_error(self):
+        device = VyDevice('127.0.0.1', 'key', protocol='http', port=1, transport=self.transport)
+        response = device.retrieve_exists(["interfaces"])
+        self.assertEqual(response.status, 0)
+        self.assertTrue(response.error.startswith('connection error: '))
+        self.assertIsNone(response.timing)
+
+
+class TestRequestsTransport(_TransportTests, unittest.TestCase):
+    transport = 'requests'
+
+
+class TestSharedRequestsTransport(_TransportTests, unittest.TestCase):
+    transport = RequestsTransport(pool_maxsize=2)
+
+
+class TestUrllib3Transport(_TransportTests, unittest.TestCase):
+    transport = 'urllib3'
+
+    def test_005_timing(self):
+        self.device.close()
+        timing = self.device.show(["version"]).timing
+        self.assertGreater(timing.connect, 0)
+        self.assertEqual(self.device.show(["version"]).timing.connect, 0)
+
+
+@unittest.skipIf(not HTTP2, "httpx and h2 are not installed")
+class TestHttp2Transport(_TransportTests, unittest.TestCase):
+    # The mock server speaks HTTP/1.1 only, the transport falls back to it on plain http
+    transport = 'http2'
+
+    def test_005_async(self):
+        async def main():
+            async with AsyncVyDevice(transport=self.transport, **self.server.device_kwargs()) as device:
+                responses = await asyncio.gather(*(device.show(["version"]) for _ in range(16)))
+                self.assertIsInstance(device.transport, Http2Transport)
+            return responses
+
+        responses = asyncio.run(main())
+        self.assertTrue(all(response.status == 200 for response in responses))
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncTransport(unittest.IsolatedAsyncioTestCase):
+    async def test_001_threaded_transport(self):
+        with MockVyOSServer(config=generate_config(interfaces=2)) as server:
+            async with AsyncVyDevice(transport='urllib3', **server.device_kwargs()) as device:
+                self.assertIsInstance(device.transport, Transport)
+                response = await device.retrieve_show_config(["interfaces"])
+        self.assertIn('eth1', response.result['ethernet'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import copy
+import unittest
+
+from pyvyos.device import VyDevice
+from pyvyos.async_device import AsyncVyDevice, aiohttp
+from pyvyos.mock_server import MockVyOSServer, generate_config
+from pyvyos.watch import ConfigWatcher, AsyncConfigWatcher, ChangeEvent, merkle_hashes, compare_configs
+from pyvyos.watch import _changed_sections
+
+
+class TestCompareConfigs(unittest.TestCase):
+    def test_001_only_changed_subtrees(self):
+        old = generate_config(interfaces=20, firewall_rules=50)
+        new = copy.deepcopy(old)
+        new['interfaces']['ethernet']['eth3']['mtu'] = '9000'
+        new['interfaces']['ethernet']['eth4']['disable'] = {}
+        del new['firewall']
+        events = compare_configs(old, new, merkle_hashes(old), merkle_hashes(new))
+        self.assertEqual(events, [
+            ChangeEvent(kind='changed', path=['interfaces', 'ethernet', 'eth3', 'mtu'], old='1500', new='9000'),
+            ChangeEvent(kind='added', path=['interfaces', 'ethernet', 'eth4', 'disable'], new={}),
+            ChangeEvent(kind='removed', path=['firewall'], old=old['firewall']),
+        ])
+
+    def test_002_equal_hashes(self):
+        config = generate_config(interfaces=5)
+        self.assertEqual(merkle_hashes(config), merkle_hashes(copy.deepcopy(config)))
+        self.assertEqual(compare_configs(config, config, merkle_hashes(config), merkle_hashes(config)), [])
+
+    def test_003_commit_diff(self):
+        diff = ("[interfaces ethernet eth1]\n- mtu 1500\n+ mtu 9000\n\n"
+                "[edit service ntp]\n+ server 192.0.2.1 {\n+ }\n\n"
+                "+ protocols {\n+     static {\n+     }\n+ }\n")
+        self.assertEqual(_changed_sections(diff), {'interfaces', 'service', 'protocols'})
+        self.assertEqual(_changed_sections(" system {\n-    host-name vyos\n+    host-name edge1\n }\n"), {'system'})
+        self.assertEqual(_changed_sections(""), set())
+        self.assertIsNone(_changed_sections("-    host-name vyos\n"))
+
+
+class TestConfigWatcher(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVyOSServer(config=generate_config(interfaces=4)).start()
+        self.device = VyDevice(cache=True, **self.server.device_kwargs())
+
+    def tearDown(self):
+        self.device.close()
+        self.server.stop()
+
+    def test_001_no_fetch_without_commit(self):
+        watcher = ConfigWatcher(self.device)
+        self.assertEqual(watcher.poll().result, [])
+        self.assertEqual(watcher.poll().result, [])
+        self.assertEqual(watcher.poll().result, [])
+        self.assertEqual((watcher.probes, watcher.fetches), (3, 1))
+
+    def test_002_changes_after_commit(self):
+        watcher = ConfigWatcher(self.device)
+        watcher.poll()
+        self.device.retrieve_show_config([])
+        # A commit logged by hand has no diff, the whole configuration is retrieved again
+        with self.server._lock:
+            self.server.config['interfaces']['ethernet']['eth1']['mtu'] = '9000'
+            self.server.commits.append(0)
+        response = watcher.poll()
+        self.assertFalse(response.error)
+        self.assertEqual(response.result, [ChangeEvent(kind='changed', path=['interfaces', 'ethernet', 'eth1', 'mtu'],
+                                                       old='1500', new='9000')])
+        self.assertEqual(watcher.fetches, 2)
+
+    def test_003_sections(self):
+        watcher = ConfigWatcher(self.device, sections=[["interfaces"], ["protocols", "static"]])
+        watcher.poll()
+        self.device.configure_set(["protocols", "static", "route", "0.0.0.0/0", "next-hop", "192.0.2.1"])
+        self.device.configure_set(["system", "host-name", "other"])
+        events = watcher.poll().result
+        self.assertEqual([(event.kind, event.path) for event in events], [('added', ['protocols', 'static'])])
+        self.device.configure_delete(["protocols", "static"])
+        self.assertEqual([event.kind for event in watcher.poll().result], ['removed'])
+
+    def test_004_only_changed_sections(self):
+        watcher = ConfigWatcher(self.device)
+        watcher.poll()
+        self.device.retrieve_show_config(["system"])
+        self.server.handle('configure', {'op': 'set', 'path': ["interfaces", "ethernet", "eth1", "mtu", "9000"]})
+        self.server.handle('configure', {'op': 'set', 'path': ["policy", "route-map", "RM", "rule", "10"]})
+        events = watcher.poll().result
+        self.assertEqual([(event.kind, event.path) for event in events],
+                         [('changed', ['interfaces', 'ethernet', 'eth1', 'mtu']), ('added', ['policy'])])
+        self.assertEqual(watcher.fetches, 3)
+        self.assertEqual(watcher.current()[()], self.server.config)
+        self.assertEqual(watcher.hashes, merkle_hashes(self.server.config))
+
+        self.server.handle('configure', {'op': 'delete', 'path': ["policy"]})
+        self.assertEqual([(event.kind, event.path) for event in watcher.poll().result], [('removed', ['policy'])])
+        self.assertEqual(watcher.hashes, merkle_hashes(self.server.config))
+        self.assertEqual(watcher.fetches, 4)
+
+    def test_005_cache_kept(self):
+        watcher = ConfigWatcher(self.device, sections=[["interfaces"], ["system"]])
+        watcher.poll()
+        self.server.handle('configure', {'op': 'set', 'path': ["interfaces", "ethernet", "eth1", "mtu", "9000"]})
+        self.assertEqual(len(watcher.poll().result), 1)
+        hits = self.device.cache.stats()['hits']
+        # The system section was not touched and stays cached, the interfaces were retrieved afresh
+        self.device.retrieve_show_config(["system"])
+        mtu = self.device.retrieve_return_values(["interfaces", "ethernet", "eth1", "mtu"])
+        self.assertEqual(self.device.cache.stats()['hits'], hits + 2)
+        self.assertEqual(mtu.result, ['9000'])
+
+    def test_006_error(self):
+        watcher = ConfigWatcher(self.device, sections=[["interfaces"]])
+        self.device.apikey = "wrong"
+        response = watcher.poll()
+        self.assertTrue(response.error)
+        self.assertIsNone(watcher.current())
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncConfigWatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_001_changes_after_commit(self):
+        with MockVyOSServer(config=generate_config(interfaces=2)) as server:
+            async with AsyncVyDevice(**server.device_kwargs()) as device:
+                watcher = AsyncConfigWatcher(device, sections=[["interfaces"], ["system"]])
+                self.assertEqual((await watcher.poll()).result, [])
+                await device.configure_set(["system", "host-name", "edge1"])
+                events = (await watcher.poll()).result
+                self.assertEqual(events, [ChangeEvent(kind='changed', path=['system', 'host-name'], old='vyos',
+                                                      new='edge1')])
+                self.assertEqual(watcher.fetches, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()